@@ -0,0 +1,225 @@
+import collections
+import itertools
+import json
+import queue
+import subprocess
+import threading
+import time
+
+from django.conf import settings
+
+# Must match RESULT_PREFIX and PROGRESS_PREFIX in blender_scripts/generate_model.py
+RESULT_PREFIX = "@civi:result "
+PROGRESS_PREFIX = "@civi:progress "
+
+
+def forward_progress(line, progress):
+    """Hand a progress line's event to `progress`, if given; False for any other line."""
+    if not line.startswith(PROGRESS_PREFIX):
+        return False
+    if progress is not None:
+        try:
+            progress(json.loads(line[len(PROGRESS_PREFIX):]))
+        except ValueError:
+            pass
+    return True
+
+
+def output_buffer():
+    # Blender's own chatter is only worth reading when the job went wrong, and
+    # a long job can print a lot of it: keep the most recent lines only.
+    return collections.deque(maxlen=settings.BLENDER_OUTPUT_LINES)
+
+
+def dump_output(output):
+    for line in output:
+        print("Blender Output:", line)
+
+
+class WorkerError(Exception):
+    pass
+
+
+class BlenderWorker:
+    """One long-lived `blender --background` process running generate_model.py in --serve mode."""
+
+    def __init__(self, script_path):
+        self.script_path = str(script_path)
+        self.process = None
+        self.lines = None
+        self.jobs_done = 0
+        self._ids = itertools.count(1)
+
+    def start(self):
+        self.stop()
+        try:
+            self.process = subprocess.Popen(
+                [
+                    settings.BLENDER_BINARY, "--background", "--factory-startup",
+                    "--python", self.script_path, "--", "--serve",
+                ],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+                bufsize=1,
+            )
+        except OSError as e:
+            raise WorkerError(f"Could not start Blender: {e}")
+        self.lines = queue.Queue()
+        self.jobs_done = 0
+        threading.Thread(target=self._pump, args=(self.process, self.lines), daemon=True).start()
+        self.ping(timeout=settings.BLENDER_STARTUP_TIMEOUT)
+
+    @staticmethod
+    def _pump(process, lines):
+        for line in process.stdout:
+            lines.put(line)
+        lines.put(None)
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def stop(self):
+        if self.process is None:
+            return
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+        self.process = None
+
+    def ping(self, timeout):
+        return self.request({"op": "ping"}, timeout)
+
+    def request(self, message, timeout, progress=None):
+        if not self.is_alive():
+            raise WorkerError("Blender worker is not running")
+
+        message = dict(message, id=next(self._ids))
+        try:
+            self.process.stdin.write(json.dumps(message) + "\n")
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise WorkerError(f"Could not send job to Blender worker: {e}")
+
+        output = output_buffer()
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                dump_output(output)
+                raise WorkerError(f"Blender worker timed out after {timeout}s")
+            try:
+                line = self.lines.get(timeout=remaining)
+            except queue.Empty:
+                continue
+            if line is None:
+                dump_output(output)
+                raise WorkerError("Blender worker exited unexpectedly")
+            if forward_progress(line, progress):
+                continue
+            if not line.startswith(RESULT_PREFIX):
+                output.append(line.rstrip())
+                continue
+
+            reply = json.loads(line[len(RESULT_PREFIX):])
+            if reply.get("id") == message["id"]:
+                if "error" in reply or any("error" in result for result in reply.get("results", [])):
+                    dump_output(output)
+                return reply
+
+
+class BlenderPool:
+    def __init__(self, size, script_path):
+        self.size = size
+        self.workers = [BlenderWorker(script_path) for _ in range(size)]
+        self.idle = queue.Queue()
+        for worker in self.workers:
+            self.idle.put(worker)
+
+        self._monitor = threading.Thread(target=self._monitor_loop, daemon=True)
+        self._monitor.start()
+
+    def run(self, params, timeout=None, progress=None):
+        """Generate one model; `progress` is called with each event generate_model.py reports."""
+        return self._run({"op": "generate", "params": params}, 1, timeout or settings.BLENDER_JOB_TIMEOUT, progress)
+
+    def run_batch(self, params_list, timeout=None):
+        """Run every job on one worker, back to back; returns one reply per job, each with its own error."""
+        timeout = timeout or settings.BLENDER_JOB_TIMEOUT * len(params_list)
+        return self._run({"op": "batch", "jobs": params_list}, len(params_list), timeout)["results"]
+
+    def _run(self, message, jobs, timeout, progress=None):
+        try:
+            worker = self.idle.get(timeout=timeout)
+        except queue.Empty:
+            raise WorkerError("No Blender worker became available")
+
+        try:
+            if not worker.is_alive() or worker.jobs_done >= settings.BLENDER_WORKER_MAX_JOBS:
+                worker.start()
+            reply = worker.request(message, timeout, progress)
+            worker.jobs_done += jobs
+        except WorkerError:
+            # Timed out or crashed mid-job; the next user restarts it.
+            worker.stop()
+            raise
+        finally:
+            self.idle.put(worker)
+
+        if "error" in reply:
+            raise WorkerError(reply["error"])
+        return reply
+
+    def live_idle(self):
+        """Idle workers whose Blender is running; one that failed to start is idle but cannot take a job."""
+        with self.idle.mutex:
+            waiting = list(self.idle.queue)
+        return sum(1 for worker in waiting if worker.is_alive())
+
+    def health_check(self):
+        # Only idle workers are checked, busy ones are proven alive by their job.
+        checked = []
+        for _ in range(self.size):
+            try:
+                worker = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                if worker.is_alive():
+                    worker.ping(timeout=settings.BLENDER_STARTUP_TIMEOUT)
+                else:
+                    # Never started, crashed, or stopped after a failed job.
+                    worker.start()
+            except WorkerError as e:
+                print("Blender worker failed health check:", str(e))
+                try:
+                    worker.start()
+                except WorkerError as e:
+                    print("Blender worker restart failed:", str(e))
+                    worker.stop()
+            checked.append(worker)
+
+        for worker in checked:
+            self.idle.put(worker)
+        return len(checked)
+
+    def _monitor_loop(self):
+        # The first pass warms the workers up before any request needs them.
+        while True:
+            self.health_check()
+            time.sleep(settings.BLENDER_HEALTH_CHECK_INTERVAL)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BlenderPool(settings.BLENDER_POOL_SIZE, settings.BLENDER_SCRIPT)
+        return _pool
@@ -0,0 +1,77 @@
+import hashlib
+import json
+
+from blender_scripts.scene.ir import SHELL
+from blender_scripts.scene.layout import generate_layout
+from blender_scripts.scene.lod import with_lod
+
+from .generation import build_model
+from .jobs import DONE, FAILED, QueueFull, get_queue
+from .model_cache import GENERATOR_VERSION, normalize_params, texture_key
+from .warming import is_cached, record_request
+
+# Chunked delivery: the house's shell (floor, exterior walls, front door and
+# windows) is built while the client waits, every room becomes its own GLB
+# built in the background, and a manifest tells the client where each one is.
+# Chunks are keyed by their content, so a room that comes out the same in two
+# layouts is only generated once.
+
+
+def chunk_key(scene, params):
+    export = {key: params[key] for key in ("engine", "nodes", "texture_format", "compress")}
+    canonical = {
+        "parts": [part.record() for part in scene.parts],
+        "export": export,
+        "version": GENERATOR_VERSION,
+        **texture_key(params["texture_format"]),
+    }
+    payload = json.dumps(canonical, sort_keys=True, separators=(",", ":"), default=list)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def plan_chunks(params):
+    """(tag, key, bounds) for the shell and then each room of the layout `params` describe."""
+    params = normalize_params(params)
+    if params["storeys"] > 1 or params["buildings"] > 1:
+        raise ValueError("chunked delivery is for single houses, not storeys or buildings")
+    scene = with_lod(generate_layout(params["width"], params["depth"], params["height"], params["budget"],
+                                     params["seed"]), params["lod"])
+
+    rooms = scene.info["room_positions"]
+    chunks = []
+    for tag in scene.tags():
+        if tag == SHELL:
+            bounds = (-scene.info["width"] / 2, -scene.info["depth"] / 2, scene.info["width"] / 2, scene.info["depth"] / 2)
+        else:
+            x, y, width, depth = rooms[tag.split(":", 1)[1]]
+            bounds = (x - width / 2, y - depth / 2, x + width / 2, y + depth / 2)
+        chunks.append((tag, chunk_key(scene.subset(tag), params), bounds))
+    return chunks
+
+
+def build_chunks(params):
+    """Build the shell now and queue the rooms; returns one entry per chunk, shell first.
+
+    Calling it again for the same layout is cheap: finished chunks come
+    from the cache and chunks still being built are not queued twice.
+    """
+    chunks = []
+    for tag, key, bounds in plan_chunks(params):
+        chunk = {"tag": tag, "key": key, "bounds": bounds, "job": None, "error": None}
+        chunk_params = dict(params, chunk=tag)
+        if tag == SHELL:
+            # Rooms are counted by the queue; the shell is built here.
+            record_request(key, chunk_params, hit=is_cached(key))
+            if build_model(key, chunk_params) is None:
+                chunk.update(status=FAILED, error="Shell model was not generated")
+            else:
+                chunk["status"] = DONE
+        else:
+            try:
+                job = get_queue().submit(chunk_params, key=key)
+                chunk.update(job=job, status=job.status, error=job.error)
+            except QueueFull as e:
+                # Asking for the manifest again queues it once there is room.
+                chunk.update(status="deferred", error=str(e))
+        chunks.append(chunk)
+    return chunks
@@ -0,0 +1,299 @@
+import contextlib
+import json
+import os
+import subprocess
+import threading
+import time
+
+from django.conf import settings
+
+from blender_scripts.scene.layout import TEXTURES
+from blender_scripts.scene import native, timing
+
+from .blender_pool import RESULT_PREFIX, WorkerError, dump_output, forward_progress, get_pool, output_buffer
+from .metrics import observe_failure, observe_generation
+from .model_cache import get_cache, normalize_params
+from .serving import precompress
+from .storage import discard, ensure_sweeper, publish, temp_output_path
+from .textures import prepare_textures
+
+
+def params_from_query(query):
+    return {
+        "width": query.get("width", 5),
+        "depth": query.get("length", 5),
+        "height": query.get("height", 3),
+        "location_size": query.get("location_size", 50),
+        "budget": query.get("budget", 5000),
+        "seed": query.get("seed", 0),
+        "nodes": query.get("nodes", "named"),
+        "engine": query.get("engine", "blender"),
+        "texture_format": query.get("texture_format", "jpeg"),
+        "compress": query.get("compress", "none"),
+        "lod": query.get("lod", "full"),
+        "storeys": query.get("storeys", 1),
+        "buildings": query.get("buildings", 1),
+    }
+
+
+def build_model(key, params, progress=None):
+    """The cached model for `key`, generating it first if needed.
+
+    `progress`, if given, is called with each progress event of the
+    generation ({"event": "stage", "stage": ...} or {"event": "room", ...}).
+    """
+    if is_site(params):
+        # Imported here: site builds its parts with this function.
+        from .site import build_site
+        return build_site(key, params, progress)
+
+    ensure_sweeper()
+    cache = get_cache()
+    model_path = cache.get(key)
+    if model_path:
+        return model_path
+
+    with cache.lock_for(key):
+        # Another request may have generated it while we waited.
+        if os.path.exists(cache.path_for(key)):
+            return cache.path_for(key)
+
+        # Each run gets its own file; it only becomes visible under the cache key once complete.
+        temp_path = temp_output_path()
+        try:
+            params = job_params(params, temp_path)
+            start = time.monotonic()
+            try:
+                if params["engine"] == "native":
+                    stats = run_native_or_blender(params, progress)
+                else:
+                    stats = run_blender(params, progress)
+            except (subprocess.SubprocessError, WorkerError):
+                observe_failure(params["engine"])
+                raise
+            model_path = publish_model(key, temp_path)
+            observe(params["engine"], time.monotonic() - start, stats, model_path)
+        finally:
+            discard(temp_path)
+
+    cache.evict()
+    return model_path
+
+
+def build_models(items):
+    """Build several (key, params) models, all Blender ones in a single Blender session.
+
+    Returns ({key: model_path or None}, {key: error}); one model failing
+    does not stop the others.
+    """
+    # Imported here: warming builds models with this module.
+    from .warming import is_cached, record_request
+
+    ensure_sweeper()
+    cache = get_cache()
+    paths, errors, missing = {}, {}, {}
+    for key, params in items:
+        record_request(key, params, hit=is_cached(key))
+        if key in paths or key in missing:
+            continue
+        if is_site(params):
+            # A site already builds its parts in parallel on its own.
+            try:
+                paths[key] = build_model(key, params)
+            except (subprocess.SubprocessError, WorkerError) as e:
+                paths[key], errors[key] = None, f"Blender execution failed: {str(e)}"
+            if paths[key] is None:
+                errors.setdefault(key, f"Model not found at: {cache.path_for(key)}")
+            continue
+        paths[key] = cache.get(key)
+        if paths[key] is None:
+            missing[key] = params
+
+    with contextlib.ExitStack() as stack:
+        # Taken in key order, so two overlapping batches cannot each hold a key the other waits for.
+        jobs = []
+        for key in sorted(missing):
+            stack.enter_context(cache.lock_for(key))
+            if os.path.exists(cache.path_for(key)):
+                paths[key] = cache.path_for(key)
+                continue
+            temp_path = temp_output_path()
+            stack.callback(discard, temp_path)
+            jobs.append((key, job_params(missing[key], temp_path)))
+
+        stats, blender_jobs = {}, []
+        for key, params in jobs:
+            start = time.monotonic()
+            try:
+                stats[key] = run_native_if_possible(params) if params["engine"] == "native" else None
+            except WorkerError as e:
+                # Reported with its variant, like a Blender job's error; nothing is published for it.
+                errors[key] = str(e)
+                stats[key] = {"engine": "native"}
+            if stats[key] is None:
+                blender_jobs.append((key, params))
+            else:
+                stats[key]["seconds"] = time.monotonic() - start
+        if blender_jobs:
+            try:
+                replies = run_blender_batch([params for _, params in blender_jobs])
+            except (subprocess.SubprocessError, WorkerError) as e:
+                print("Blender batch failed:", str(e))
+                replies = [{"error": f"Blender execution failed: {str(e)}"}] * len(blender_jobs)
+            for (key, _), reply in zip(blender_jobs, replies):
+                if reply.get("error"):
+                    errors[key] = reply["error"]
+                # The batch is timed as a whole, so each job is charged the sum of its own stages.
+                stats[key] = dict(reply.get("stats", {}), engine="blender")
+                stats[key]["seconds"] = sum(stats[key].get("stages", {}).values())
+
+        for key, params in jobs:
+            paths[key] = publish_model(key, params["output_path"])
+            if paths[key] is None:
+                errors.setdefault(key, f"Model not found at: {cache.path_for(key)}")
+            observe(params["engine"], stats[key]["seconds"], stats[key], paths[key])
+
+    cache.evict()
+    return paths, errors
+
+
+def is_site(params):
+    """Whether `params` ask for more than one storey or building."""
+    return int(params.get("storeys", 1)) > 1 or int(params.get("buildings", 1)) > 1
+
+
+def job_params(params, output_path):
+    params = dict(normalize_params(params), location_size=params["location_size"], chunk=params.get("chunk"),
+                  output_path=output_path)
+    params["textures"] = prepare_textures(TEXTURES, params["texture_format"])
+    return params
+
+
+def publish_model(key, temp_path):
+    print("Expected Output Path:", temp_path)
+    model_path = publish(temp_path, get_cache().path_for(key))
+    if model_path:
+        precompress(model_path)
+    return model_path
+
+
+def observe(requested_engine, seconds, stats, model_path):
+    # Labelled with the engine that actually ran, which differs when native fell back to Blender.
+    engine = stats.get("engine", requested_engine)
+    if model_path is None:
+        observe_failure(engine)
+    else:
+        observe_generation(engine, seconds, stats)
+
+
+def run_blender(params, progress=None):
+    """Generate with Blender; returns the script's stats record ({"stages", "counts"}) plus the engine."""
+    if settings.BLENDER_POOL_SIZE > 0:
+        reply = get_pool().run(params, progress=progress)
+    else:
+        reply = run_blender_once(params, progress)
+    return dict(reply.get("stats", {}), engine="blender")
+
+
+def run_native(params, progress=None):
+    timing.set_listener(progress)
+    try:
+        return native.generate(params)
+    finally:
+        timing.set_listener(None)
+
+
+def run_native_if_possible(params, progress=None):
+    """The native run's stats, or None if Blender has to build this model instead."""
+    try:
+        return run_native(params, progress)
+    except (ImportError, ValueError) as e:
+        # Blender can build anything the layout produces; the native writer only knows the basic
+        # shapes and cannot encode Draco.
+        print("Native export failed, falling back to Blender:", str(e))
+        discard(params["output_path"])
+        return None
+    except OSError as e:
+        # Blender would hit the same full disk or missing directory; a half-written file is never published.
+        discard(params["output_path"])
+        raise WorkerError(f"Native export failed: {str(e)}")
+
+
+def run_native_or_blender(params, progress=None):
+    return run_native_if_possible(params, progress) or run_blender(params, progress)
+
+
+def run_blender_batch(params_list):
+    """Run every job in one Blender session; returns one {"output_path", "stats"} or {"error"} per job."""
+    if settings.BLENDER_POOL_SIZE > 0:
+        return get_pool().run_batch(params_list)
+    return run_blender_batch_once(params_list)
+
+
+def run_script(arguments, timeout, progress=None):
+    """Run generate_model.py in a fresh Blender, reading its output as it is printed.
+
+    Returns the tagged reply the script prints last. Progress events go to
+    `progress`; the rest of Blender's output is kept in a bounded buffer and
+    shown only if there is no reply or it reports an error.
+    """
+    command = [settings.BLENDER_BINARY, "--background", "--python", str(settings.BLENDER_SCRIPT), "--"] + arguments
+    process = subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+        bufsize=1,
+    )
+    timed_out = threading.Event()
+
+    def kill():
+        timed_out.set()
+        process.kill()
+
+    timer = threading.Timer(timeout, kill)
+    timer.start()
+    output, reply = output_buffer(), None
+    try:
+        with process:
+            for line in process.stdout:
+                if forward_progress(line, progress):
+                    continue
+                if line.startswith(RESULT_PREFIX):
+                    reply = json.loads(line[len(RESULT_PREFIX):])
+                else:
+                    output.append(line.rstrip())
+    finally:
+        timer.cancel()
+
+    if reply is not None and "error" not in reply and not any("error" in item for item in reply.get("results", [])):
+        return reply
+    dump_output(output)
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(command, timeout)
+    if reply is None:
+        raise WorkerError(f"Blender exited with code {process.returncode} without a result")
+    return reply
+
+
+def run_blender_once(params, progress=None):
+    arguments = [
+        str(params["width"]), str(params["depth"]), str(params["height"]),
+        str(params["location_size"]), str(params["budget"]), params["output_path"], str(params["seed"]),
+        params["nodes"], json.dumps(params["textures"]), params["compress"],
+        params["lod"], params.get("chunk") or "", "1" if params.get("entrance", True) else "0",
+    ]
+    return run_script(arguments, settings.BLENDER_JOB_TIMEOUT, progress)
+
+
+def run_blender_batch_once(params_list):
+    jobs_path = temp_output_path(".json")
+    try:
+        with open(jobs_path, "w", encoding="utf-8") as f:
+            json.dump(params_list, f)
+        reply = run_script(["--batch", jobs_path], settings.BLENDER_JOB_TIMEOUT * len(params_list))
+    finally:
+        discard(jobs_path)
+    return reply["results"]
@@ -0,0 +1,194 @@
+import hashlib
+import json
+import struct
+
+from .glb_report import GLB_MAGIC, read_glb
+
+# Joins GLB files into one, each placed under its own node. Only what the
+# generators write is carried over: nodes, meshes (Draco-compressed or not),
+# materials, textures, samplers and images.
+
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+
+TEXTURE_SLOTS = ("baseColorTexture", "metallicRoughnessTexture")
+MATERIAL_TEXTURE_SLOTS = ("normalTexture", "occlusionTexture", "emissiveTexture")
+
+
+class GLBMerger:
+    def __init__(self):
+        self.gltf = {
+            "asset": {"version": "2.0", "generator": "civi site merge"},
+            "scene": 0, "scenes": [{"nodes": []}], "nodes": [], "meshes": [], "materials": [],
+            "textures": [], "images": [], "samplers": [], "accessors": [], "bufferViews": [],
+        }
+        self.binary = bytearray()
+        self.extensions_used = set()
+        self.extensions_required = set()
+        # Identical images, samplers, textures and materials from different files are stored once.
+        self._shared = {}
+        self._files = {}
+
+    def shared(self, kind, entry, key=None):
+        key = (kind, key or json.dumps(entry, sort_keys=True))
+        if key not in self._shared:
+            self.gltf[kind].append(entry)
+            self._shared[key] = len(self.gltf[kind]) - 1
+        return self._shared[key]
+
+    def copy_view(self, binary, view):
+        self.binary.extend(b"\0" * (-len(self.binary) % 4))
+        start = view.get("byteOffset", 0)
+        self.gltf["bufferViews"].append(dict(view, buffer=0, byteOffset=len(self.binary)))
+        self.binary.extend(binary[start:start + view["byteLength"]])
+        return len(self.gltf["bufferViews"]) - 1
+
+    def load(self, path):
+        """Copy a file's meshes and everything they use, once per path; returns (nodes, roots, triangles)."""
+        if path in self._files:
+            return self._files[path]
+        gltf, binary, _ = read_glb(path)
+        self.extensions_used.update(gltf.get("extensionsUsed", []))
+        self.extensions_required.update(gltf.get("extensionsRequired", []))
+
+        views = {}
+
+        def view(index):
+            if index not in views:
+                views[index] = self.copy_view(binary, gltf["bufferViews"][index])
+            return views[index]
+
+        images = []
+        for image in gltf.get("images", []):
+            entry = dict(image)
+            key = None
+            if "bufferView" in image:
+                source = gltf["bufferViews"][image["bufferView"]]
+                start = source.get("byteOffset", 0)
+                data = binary[start:start + source["byteLength"]]
+                key = (hashlib.sha256(data).hexdigest(), image.get("mimeType"))
+                if ("images", key) not in self._shared:
+                    entry["bufferView"] = view(image["bufferView"])
+            images.append(self.shared("images", entry, key))
+
+        samplers = [self.shared("samplers", sampler) for sampler in gltf.get("samplers", [])]
+
+        textures = []
+        for texture in gltf.get("textures", []):
+            entry = json.loads(json.dumps(texture))
+            if "source" in entry:
+                entry["source"] = images[entry["source"]]
+            if "sampler" in entry:
+                entry["sampler"] = samplers[entry["sampler"]]
+            for extension in entry.get("extensions", {}).values():
+                if "source" in extension:
+                    extension["source"] = images[extension["source"]]
+            textures.append(self.shared("textures", entry))
+
+        materials = []
+        for material in gltf.get("materials", []):
+            entry = json.loads(json.dumps(material))
+            pbr = entry.get("pbrMetallicRoughness", {})
+            for info in [pbr.get(slot) for slot in TEXTURE_SLOTS] + [entry.get(slot) for slot in MATERIAL_TEXTURE_SLOTS]:
+                if info is not None:
+                    info["index"] = textures[info["index"]]
+            materials.append(self.shared("materials", entry))
+
+        accessors = []
+        for accessor in gltf.get("accessors", []):
+            entry = json.loads(json.dumps(accessor))
+            if "bufferView" in entry:
+                entry["bufferView"] = view(entry["bufferView"])
+            for part in ("indices", "values"):
+                if part in entry.get("sparse", {}):
+                    entry["sparse"][part]["bufferView"] = view(entry["sparse"][part]["bufferView"])
+            self.gltf["accessors"].append(entry)
+            accessors.append(len(self.gltf["accessors"]) - 1)
+
+        meshes, mesh_triangles = [], []
+        for mesh in gltf.get("meshes", []):
+            entry = json.loads(json.dumps(mesh))
+            triangles = 0
+            for primitive in entry["primitives"]:
+                primitive["attributes"] = {name: accessors[index] for name, index in primitive["attributes"].items()}
+                primitive["targets"] = [{name: accessors[index] for name, index in target.items()}
+                                        for target in primitive.get("targets", [])] or None
+                if primitive["targets"] is None:
+                    del primitive["targets"]
+                if "indices" in primitive:
+                    primitive["indices"] = accessors[primitive["indices"]]
+                    triangles += self.gltf["accessors"][primitive["indices"]]["count"] // 3
+                else:
+                    triangles += self.gltf["accessors"][primitive["attributes"]["POSITION"]]["count"] // 3
+                if "material" in primitive:
+                    primitive["material"] = materials[primitive["material"]]
+                draco = primitive.get("extensions", {}).get("KHR_draco_mesh_compression")
+                if draco is not None:
+                    draco["bufferView"] = view(draco["bufferView"])
+            self.gltf["meshes"].append(entry)
+            meshes.append(len(self.gltf["meshes"]) - 1)
+            mesh_triangles.append(triangles)
+
+        nodes = []
+        for node in gltf.get("nodes", []):
+            entry = dict(node)
+            if "mesh" in entry:
+                entry["mesh"] = meshes[entry["mesh"]]
+            nodes.append(entry)
+        triangles = sum(mesh_triangles[node["mesh"]] for node in gltf.get("nodes", []) if "mesh" in node)
+        roots = gltf["scenes"][gltf.get("scene", 0)]["nodes"] if gltf.get("scenes") else []
+
+        self._files[path] = (nodes, roots, triangles)
+        return self._files[path]
+
+    def place(self, path, name, translation):
+        """Add the file's node tree under a node `name` moved by `translation` (Blender's Z-up); returns its triangles."""
+        nodes, roots, triangles = self.load(path)
+        # Nodes have one parent each, so every placement gets its own copies; the meshes are shared.
+        base = len(self.gltf["nodes"])
+        for node in nodes:
+            entry = dict(node)
+            if "children" in entry:
+                entry["children"] = [base + child for child in entry["children"]]
+            self.gltf["nodes"].append(entry)
+
+        x, y, z = translation
+        parent = {"name": name, "children": [base + root for root in roots]}
+        if any(translation):
+            # Blender is Z-up, glTF is Y-up: (x, y, z) -> (x, z, -y).
+            parent["translation"] = [float(x), float(z), float(-y)]
+        self.gltf["nodes"].append(parent)
+        self.gltf["scenes"][0]["nodes"].append(len(self.gltf["nodes"]) - 1)
+        return triangles
+
+    def to_bytes(self):
+        gltf = {key: value for key, value in self.gltf.items() if value != []}
+        if self.extensions_used:
+            gltf["extensionsUsed"] = sorted(self.extensions_used)
+        if self.extensions_required:
+            gltf["extensionsRequired"] = sorted(self.extensions_required)
+        if self.binary:
+            self.binary.extend(b"\0" * (-len(self.binary) % 4))
+            gltf["buffers"] = [{"byteLength": len(self.binary)}]
+
+        content = json.dumps(gltf, separators=(",", ":")).encode("utf-8")
+        content += b" " * (-len(content) % 4)
+        chunks = struct.pack("<II", len(content), CHUNK_JSON) + content
+        if self.binary:
+            chunks += struct.pack("<II", len(self.binary), CHUNK_BIN) + bytes(self.binary)
+        return struct.pack("<III", GLB_MAGIC, 2, 12 + len(chunks)) + chunks
+
+
+def merge_glbs(parts, output_path):
+    """Write one GLB of every (path, name, translation) in `parts`; returns counts of what was written.
+
+    A path listed more than once is read once and its meshes are shared by
+    every placement.
+    """
+    merger = GLBMerger()
+    triangles = sum(merger.place(path, name, translation) for path, name, translation in parts)
+    data = merger.to_bytes()
+    with open(output_path, "wb") as f:
+        f.write(data)
+    return {"nodes": len(merger.gltf["nodes"]), "meshes": len(merger.gltf["meshes"]),
+            "materials": len(merger.gltf["materials"]), "triangles": triangles, "bytes": len(data)}
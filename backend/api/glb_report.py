@@ -0,0 +1,80 @@
+import json
+import struct
+import time
+
+GLB_MAGIC = 0x46546C67
+
+COMPONENT_DTYPES = {5120: "<i1", 5121: "<u1", 5122: "<i2", 5123: "<u2", 5125: "<u4", 5126: "<f4"}
+TYPE_SIZES = {"SCALAR": 1, "VEC2": 2, "VEC3": 3, "VEC4": 4, "MAT4": 16}
+
+
+def read_glb(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < 20:
+        raise ValueError(f"{path} is not a GLB file")
+    magic, version, length = struct.unpack_from("<III", data)
+    if magic != GLB_MAGIC or length != len(data):
+        raise ValueError(f"{path} is not a GLB file")
+
+    json_length, _ = struct.unpack_from("<II", data, 12)
+    gltf = json.loads(data[20:20 + json_length])
+    binary = b""
+    if 20 + json_length < len(data):
+        binary_length, _ = struct.unpack_from("<II", data, 20 + json_length)
+        binary = data[28 + json_length:28 + json_length + binary_length]
+    return gltf, binary, len(data)
+
+
+def decode_accessors(gltf, binary):
+    # What a viewer does before upload: read every accessor and expand normalized integers to floats.
+    import numpy as np
+
+    arrays = []
+    for accessor in gltf.get("accessors", []):
+        if "bufferView" not in accessor:
+            continue
+        view = gltf["bufferViews"][accessor["bufferView"]]
+        dtype = np.dtype(COMPONENT_DTYPES[accessor["componentType"]])
+        width = TYPE_SIZES[accessor["type"]]
+        stride = view.get("byteStride", dtype.itemsize * width) // dtype.itemsize
+        offset = view.get("byteOffset", 0) + accessor.get("byteOffset", 0)
+        array = np.frombuffer(binary, dtype, accessor["count"] * stride, offset).reshape(-1, stride)[:, :width]
+        if accessor.get("normalized"):
+            array = np.maximum(array / np.iinfo(dtype).max, -1.0).astype(np.float32)
+        arrays.append(np.ascontiguousarray(array))
+    return arrays
+
+
+def glb_report(path):
+    """Sizes and decode cost of the GLB at `path`, to compare export options."""
+    gltf, binary, size = read_glb(path)
+
+    image_views = {image["bufferView"] for image in gltf.get("images", []) if "bufferView" in image}
+    image_bytes = sum(gltf["bufferViews"][view]["byteLength"] for view in image_views)
+    extensions = gltf.get("extensionsUsed", [])
+
+    vertices = triangles = 0
+    for mesh in gltf.get("meshes", []):
+        for primitive in mesh["primitives"]:
+            vertices += gltf["accessors"][primitive["attributes"]["POSITION"]]["count"]
+            if "indices" in primitive:
+                triangles += gltf["accessors"][primitive["indices"]]["count"] // 3
+
+    decode_ms = None
+    if "KHR_draco_mesh_compression" not in extensions:
+        started = time.perf_counter()
+        decode_accessors(gltf, binary)
+        decode_ms = round((time.perf_counter() - started) * 1000, 2)
+
+    return {
+        "bytes": size,
+        "geometry_bytes": len(binary) - image_bytes,
+        "image_bytes": image_bytes,
+        "json_bytes": size - len(binary) - (28 if binary else 20),
+        "vertices": vertices,
+        "triangles": triangles,
+        "extensions": extensions,
+        # Draco has to be decoded by its own (WASM) decoder, which the server does not have.
+        "decode_ms": decode_ms,
+    }
@@ -0,0 +1,168 @@
+import collections
+import queue
+import subprocess
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+from .blender_pool import WorkerError
+from .generation import build_model
+from .model_cache import cache_key, get_cache
+from .warming import is_cached, record_request
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, key, params):
+        self.id = uuid.uuid4()
+        self.key = key
+        self.params = params
+        self.status = QUEUED
+        self.error = None
+        self.model_path = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        # Progress events as (sequence number, event), the latest few only, for streaming to clients.
+        self.events = collections.deque(maxlen=settings.GENERATION_PROGRESS_EVENTS)
+        self._sequence = 0
+        self._changed = threading.Condition()
+
+    def add_event(self, event):
+        with self._changed:
+            self._sequence += 1
+            self.events.append((self._sequence, dict(event, at=time.time())))
+            self._changed.notify_all()
+
+    def finished(self):
+        return self.status in (DONE, FAILED)
+
+    def wait_events(self, after, timeout):
+        """Events numbered above `after`, waiting up to `timeout` seconds for one unless the job is finished."""
+        with self._changed:
+            if not self.finished() and (not self.events or self.events[-1][0] <= after):
+                self._changed.wait(timeout)
+            return [(sequence, event) for sequence, event in self.events if sequence > after]
+
+    def to_dict(self):
+        return {
+            "job_id": str(self.id),
+            "status": self.status,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobQueue:
+    """Bounded in-process queue of generation jobs drained by background threads."""
+
+    def __init__(self, max_queued, num_workers, max_finished):
+        self.pending = queue.Queue(maxsize=max_queued)
+        self.max_finished = max_finished
+        self._jobs = {}
+        # Queued or running job per cache key, so repeated submissions share one generation.
+        self._active = {}
+        self._finished = collections.deque()
+        self._lock = threading.Lock()
+
+        for i in range(num_workers):
+            threading.Thread(target=self._drain, name=f"generation-worker-{i}", daemon=True).start()
+
+    def submit(self, params, key=None):
+        # Raises ValueError for parameters that cannot be normalized.
+        job = Job(key or cache_key(params), params)
+        record_request(job.key, params, hit=is_cached(job.key))
+        # Looked up first, outside the lock: a hit needs no queueing, and the lookup touches the disk.
+        model_path = get_cache().get(job.key)
+
+        with self._lock:
+            active = self._active.get(job.key)
+            if active is not None:
+                return active
+            self._jobs[job.id] = job
+            if not model_path:
+                # Registered in the same critical section as the check above, so concurrent
+                # submissions for one key always share a single generation.
+                self._active[job.key] = job
+
+        if model_path:
+            self._finish(job, model_path)
+            return job
+
+        try:
+            self.pending.put_nowait(job)
+        except queue.Full:
+            error = f"Generation queue is full ({self.pending.maxsize} jobs waiting)"
+            # Whoever joined the job meanwhile sees it fail; _finish clears the active entry only if it is this job.
+            self._finish(job, error=error)
+            raise QueueFull(error)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def depth(self):
+        return self.pending.qsize()
+
+    def _drain(self):
+        while True:
+            job = self.pending.get()
+            job.status = RUNNING
+            job.started_at = time.time()
+            try:
+                model_path = build_model(job.key, job.params, progress=job.add_event)
+                if model_path is None:
+                    raise WorkerError(f"Model not found at: {get_cache().path_for(job.key)}")
+                self._finish(job, model_path)
+            except (subprocess.SubprocessError, WorkerError) as e:
+                print("Generation job failed:", str(e))
+                self._finish(job, error=f"Blender execution failed: {str(e)}")
+            except Exception as e:
+                print("Generation job crashed:", repr(e))
+                self._finish(job, error=str(e))
+            finally:
+                self.pending.task_done()
+
+    def _finish(self, job, model_path=None, error=None):
+        job.model_path = model_path
+        job.error = error
+        job.finished_at = time.time()
+        with job._changed:
+            job.status = FAILED if error else DONE
+            job._changed.notify_all()
+
+        with self._lock:
+            if self._active.get(job.key) is job:
+                del self._active[job.key]
+            self._finished.append(job.id)
+            while len(self._finished) > self.max_finished:
+                self._jobs.pop(self._finished.popleft(), None)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_queue():
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue(
+                settings.GENERATION_QUEUE_SIZE,
+                settings.GENERATION_WORKERS,
+                settings.GENERATION_JOBS_KEPT,
+            )
+        return _queue
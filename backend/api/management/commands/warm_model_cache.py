@@ -0,0 +1,65 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.warming import warm, warm_report
+
+
+class Command(BaseCommand):
+    help = "Pre-generate the most requested model configurations that are not cached, then report warm hit rates."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=settings.MODEL_WARM_TOP,
+                            help="Number of most requested configurations to keep cached")
+        parser.add_argument("--days", type=float, default=settings.MODEL_WARM_DAYS,
+                            help="Rank only configurations requested within this many days")
+        parser.add_argument("--cpu-seconds", type=float, default=settings.MODEL_WARM_CPU_SECONDS,
+                            help="Generation time one run may spend; remaining configurations wait for the next run")
+        parser.add_argument("--every", type=float, default=None,
+                            help="Keep running, warming every this many seconds when the machine is idle")
+        parser.add_argument("--max-load", type=float, default=settings.MODEL_WARM_MAX_LOAD,
+                            help="Idle means a 1-minute load average per core at or below this (with --every)")
+        parser.add_argument("--report", action="store_true", help="Only print the report, build nothing")
+
+    def handle(self, *args, **options):
+        if options["report"]:
+            self.report(options)
+            return
+
+        # Warming should never compete with requests; Blender processes started from here inherit this.
+        # Windows has no os.nice, so there the command runs at normal priority.
+        if hasattr(os, "nice"):
+            os.nice(10)
+        while True:
+            if options["every"] is None or self.is_idle(options["max_load"]):
+                # Rates since the previous run first, because warming restarts them.
+                self.report(options)
+                result = warm(options["top"], options["cpu_seconds"], options["days"], log=self.stderr.write)
+                self.stdout.write(
+                    f"Warmed {result['built']} models in {result['seconds']:.1f}s "
+                    f"({result['cached']} already cached, {result['failed']} failed, "
+                    f"{result['skipped']} left for the next run)")
+                self.report(options)
+            else:
+                self.stdout.write("Machine busy, not warming this time")
+
+            if options["every"] is None:
+                return
+            time.sleep(options["every"])
+
+    @staticmethod
+    def is_idle(max_load):
+        if not hasattr(os, "getloadavg"):
+            # Windows has no load average; warm on every round rather than never.
+            return True
+        return os.getloadavg()[0] / (os.cpu_count() or 1) <= max_load
+
+    def report(self, options):
+        report = warm_report(options["top"], options["days"])
+        rate = report["warm_hits"] / report["warm_requests"] if report["warm_requests"] else 0.0
+        self.stdout.write(
+            f"Warm hit rate: {rate:.0%} ({report['warm_hits']} of {report['warm_requests']} requests "
+            f"for warmed configurations); top {report['top_count']}: {report['top_cached']} cached, "
+            f"covering {report['coverage']:.0%} of requests in the last {options['days']:g} days")
@@ -0,0 +1,113 @@
+import bisect
+import threading
+
+from django.http import HttpResponse
+
+from .model_cache import get_cache
+
+# Prometheus text exposition of generation timings and counts (as reported by
+# generate_model.py or the native writer), queue depth and cache hit rate.
+# Values live in this process; with several server processes each one is
+# scraped on its own.
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+OBJECT_BUCKETS = (10, 25, 50, 100, 250, 500, 1000, 2500)
+TRIANGLE_BUCKETS = (1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000, 1000000)
+
+
+class Histogram:
+    def __init__(self, name, help, buckets):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.series = {}  # label values -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        series = self.series.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0])
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{format_labels(key + (('le', str(bound)),))} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(key)} {series[-1]}")
+            lines.append(f"{self.name}_count{format_labels(key)} {cumulative}")
+        return lines
+
+
+def format_labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in pairs) + "}"
+
+
+def sample(name, help, kind, value):
+    return [f"# HELP {name} {help}", f"# TYPE {name} {kind}", f"{name} {value}"]
+
+
+_lock = threading.Lock()
+_generation_seconds = Histogram("civi_generation_seconds", "Wall time of one model generation.", SECONDS_BUCKETS)
+_stage_seconds = Histogram("civi_generation_stage_seconds",
+                           "Time per generation stage, excluding the stages nested in it.", SECONDS_BUCKETS)
+_objects = Histogram("civi_model_objects", "Scene objects (nodes) per generated model.", OBJECT_BUCKETS)
+_triangles = Histogram("civi_model_triangles", "Triangles per generated model.", TRIANGLE_BUCKETS)
+_failures = {}
+
+
+def observe_generation(engine, seconds, stats):
+    """Record one finished generation; `stats` is the {"stages", "counts"} record, possibly empty."""
+    with _lock:
+        _generation_seconds.observe(seconds, engine=engine)
+        for stage, stage_seconds in (stats or {}).get("stages", {}).items():
+            _stage_seconds.observe(stage_seconds, engine=engine, stage=stage)
+        counts = (stats or {}).get("counts", {})
+        if "objects" in counts:
+            _objects.observe(counts["objects"], engine=engine)
+        if "triangles" in counts:
+            _triangles.observe(counts["triangles"], engine=engine)
+
+
+def observe_failure(engine):
+    with _lock:
+        _failures[engine] = _failures.get(engine, 0) + 1
+
+
+def render():
+    # Imported here: generation, which records into this module, is imported by jobs.
+    from . import blender_pool, jobs
+
+    cache = get_cache()
+    lookups = cache.hits + cache.misses
+    # Only report on the queue and pool if this process has started them.
+    queue = jobs._queue
+    pool = blender_pool._pool
+
+    with _lock:
+        lines = []
+        for histogram in (_generation_seconds, _stage_seconds, _objects, _triangles):
+            lines += histogram.render()
+        lines += ["# HELP civi_generation_failures_total Generations that raised or produced no model.",
+                  "# TYPE civi_generation_failures_total counter"]
+        lines += [f"civi_generation_failures_total{format_labels((('engine', engine),))} {count}"
+                  for engine, count in sorted(_failures.items())]
+
+    lines += sample("civi_cache_hits_total", "Model cache lookups that found a model.", "counter", cache.hits)
+    lines += sample("civi_cache_misses_total", "Model cache lookups that had to generate.", "counter", cache.misses)
+    lines += sample("civi_cache_hit_ratio", "Share of model cache lookups that were hits.", "gauge",
+                    cache.hits / lookups if lookups else 0)
+    lines += sample("civi_generation_queue_depth", "Generation jobs waiting to run.", "gauge",
+                    queue.depth() if queue is not None else 0)
+    lines += sample("civi_blender_workers_idle", "Running Blender workers waiting for a job.", "gauge",
+                    pool.live_idle() if pool is not None else 0)
+    return "\n".join(lines) + "\n"
+
+
+def metrics(request):
+    return HttpResponse(render(), content_type=CONTENT_TYPE)
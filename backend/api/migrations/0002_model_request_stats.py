@@ -0,0 +1,27 @@
+# Generated by Django 5.1.6 on 2026-10-17 18:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModelRequestStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=32, unique=True)),
+                ('params', models.JSONField()),
+                ('requests', models.PositiveIntegerField(default=0)),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('last_requested', models.DateTimeField()),
+                ('warmed_at', models.DateTimeField(blank=True, null=True)),
+                ('warm_requests', models.PositiveIntegerField(default=0)),
+                ('warm_hits', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,220 @@
+import contextlib
+import hashlib
+import json
+import math
+import os
+import threading
+
+from django.conf import settings
+
+from blender_scripts.scene.layout import TEXTURES, budget_tier
+from blender_scripts.scene.lod import LEVELS as LOD_LEVELS
+
+# Bump whenever generate_model.py changes what a given set of parameters produces.
+GENERATOR_VERSION = 10
+
+CACHE_DIR = "models/cache"
+
+# Precompressed copies kept next to each model (brotli, gzip); they go when the model is evicted.
+COMPRESSED_SUFFIXES = (".br", ".gz")
+
+# "named" (the default) keeps one node per part, identical furniture sharing one mesh; "merged" joins
+# static parts per material for fewer draw calls, at the cost of turning shared meshes into unique geometry.
+NODE_MODES = ("named", "merged")
+
+# "native" writes the GLB in-process with NumPy; "blender" runs generate_model.py in Blender.
+ENGINES = ("blender", "native")
+
+# Encodings for embedded textures: "jpeg" works in every glTF viewer, "webp" is smaller but needs EXT_texture_webp.
+TEXTURE_FORMATS = ("jpeg", "webp")
+
+# "quantize" stores attributes as small integers (KHR_mesh_quantization); "draco" compresses
+# meshes with Draco, which only the Blender exporter can encode.
+COMPRESSION_MODES = ("none", "quantize", "draco")
+
+
+def bounded(params, name, maximum, digits=3, default=None):
+    """params[name] rounded to `digits`, which must be finite, above 0 and at most `maximum`."""
+    value = float(params[name] if default is None else params.get(name, default))
+    value = round(value, digits) if math.isfinite(value) else value
+    if not math.isfinite(value) or not 0 < value <= maximum:
+        raise ValueError(f"{name} must be a number above 0 and at most {maximum:g}")
+    return value
+
+
+def counted(params, name, maximum):
+    """params[name] as a whole number from 1 to `maximum` (1 if absent); fractions are refused, not truncated."""
+    value = float(params.get(name, 1))
+    if not math.isfinite(value) or value != int(value) or not 1 <= value <= maximum:
+        raise ValueError(f"{name} must be a whole number between 1 and {maximum}")
+    return int(value)
+
+
+def normalize_params(params):
+    nodes = params.get("nodes", "named")
+    if nodes not in NODE_MODES:
+        raise ValueError(f"nodes must be one of {', '.join(NODE_MODES)}")
+    engine = params.get("engine", "blender")
+    if engine not in ENGINES:
+        raise ValueError(f"engine must be one of {', '.join(ENGINES)}")
+    texture_format = params.get("texture_format", "jpeg")
+    if texture_format not in TEXTURE_FORMATS:
+        raise ValueError(f"texture_format must be one of {', '.join(TEXTURE_FORMATS)}")
+    compress = params.get("compress", "none")
+    if compress not in COMPRESSION_MODES:
+        raise ValueError(f"compress must be one of {', '.join(COMPRESSION_MODES)}")
+    lod = params.get("lod", "full")
+    if lod not in LOD_LEVELS:
+        raise ValueError(f"lod must be one of {', '.join(LOD_LEVELS)}")
+    storeys = counted(params, "storeys", settings.SITE_MAX_STOREYS)
+    buildings = counted(params, "buildings", settings.SITE_MAX_BUILDINGS)
+
+    location_size = bounded(params, "location_size", settings.MODEL_MAX_LOCATION_SIZE, default=50)
+
+    normalized = {
+        "width": bounded(params, "width", settings.MODEL_MAX_SIDE),
+        "depth": bounded(params, "depth", settings.MODEL_MAX_SIDE),
+        "height": bounded(params, "height", settings.MODEL_MAX_HEIGHT),
+        "budget": bounded(params, "budget", settings.MODEL_MAX_BUDGET, digits=2),
+        "seed": int(params["seed"]),
+        "nodes": nodes,
+        "engine": engine,
+        "texture_format": texture_format,
+        "compress": compress,
+        "lod": lod,
+        "storeys": storeys,
+        "buildings": buildings,
+        # False for the upper storeys of a site, which are built without a front door.
+        "entrance": bool(params.get("entrance", True)),
+    }
+    if buildings > 1:
+        # Only a site's buildings are spread over the lot; a single house ignores its size.
+        normalized["location_size"] = location_size
+    return normalized
+
+
+def texture_key(texture_format):
+    """What decides the embedded image bytes: the texture sources and settings. Models made under others are stale."""
+    # Imported here: textures needs storage, which needs this module.
+    from .textures import source_hashes
+    return {
+        "textures": source_hashes(TEXTURES),
+        "texture_size": settings.TEXTURE_MAX_SIZE,
+        "texture_quality": settings.TEXTURE_QUALITY[texture_format],
+    }
+
+
+def cache_key(params):
+    canonical = normalize_params(params)
+    # Budgets within one tier give the same house, so they share a model (and warm the cache for each other).
+    canonical["budget"] = f"tier{budget_tier(canonical['budget'])}"
+    canonical.update(version=GENERATOR_VERSION, **texture_key(canonical["texture_format"]))
+    payload = json.dumps(canonical, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+class ModelCache:
+    """GLB files on disk, named by cache key, evicted least-recently-used first."""
+
+    def __init__(self, root, max_bytes, max_entries):
+        self.root = str(root)
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def path_for(self, key):
+        return os.path.join(self.root, f"{key}.glb")
+
+    def url_for(self, key):
+        return settings.MEDIA_URL + f"{CACHE_DIR}/{key}.glb"
+
+    def get(self, key):
+        path = self.path_for(key)
+        with self._lock:
+            if not os.path.exists(path):
+                self.misses += 1
+                return None
+            self.hits += 1
+        # mtime doubles as the LRU timestamp
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # Evicted since the check above.
+            with self._lock:
+                self.hits -= 1
+                self.misses += 1
+            return None
+        return path
+
+    @contextlib.contextmanager
+    def lock_for(self, key):
+        """Hold the lock for generating `key` for the duration of the with block."""
+        # Concurrent misses on the same key wait for one generation instead of each running Blender.
+        # The lock is dropped once nobody holds or waits for it, so a later caller never gets a second one.
+        with self._lock:
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._key_locks[key]
+
+    def evict(self):
+        with self._lock:
+            try:
+                names = [name for name in os.listdir(self.root) if name.endswith(".glb")]
+            except FileNotFoundError:
+                return 0
+
+            entries = []
+            for name in names:
+                path = os.path.join(self.root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                size = stat.st_size
+                for suffix in COMPRESSED_SUFFIXES:
+                    try:
+                        size += os.path.getsize(path + suffix)
+                    except FileNotFoundError:
+                        pass
+                entries.append((stat.st_mtime, size, path))
+            entries.sort()
+
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            for _, size, path in entries:
+                if total <= self.max_bytes and len(entries) - removed <= self.max_entries:
+                    break
+                for victim in (path,) + tuple(path + suffix for suffix in COMPRESSED_SUFFIXES):
+                    try:
+                        os.remove(victim)
+                    except FileNotFoundError:
+                        pass
+                total -= size
+                removed += 1
+            return removed
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ModelCache(
+                os.path.join(settings.MEDIA_ROOT, CACHE_DIR),
+                settings.MODEL_CACHE_MAX_BYTES,
+                settings.MODEL_CACHE_MAX_ENTRIES,
+            )
+        return _cache
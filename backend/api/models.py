@@ -10,3 +10,18 @@ class Project(models.Model):
     def __str__(self):
         return f"Project - Budget: ${self.budget}, Location: {self.location_size} sqft"
 
+
+class ModelRequestStat(models.Model):
+    """How often one generated-model configuration (cache key) is asked for; read by warm_model_cache."""
+    key = models.CharField(max_length=32, unique=True)
+    params = models.JSONField()
+    requests = models.PositiveIntegerField(default=0)
+    hits = models.PositiveIntegerField(default=0)
+    last_requested = models.DateTimeField()
+    # Set while the configuration is in the warmed set; the warm_ counters start from zero at each warm run.
+    warmed_at = models.DateTimeField(null=True, blank=True)
+    warm_requests = models.PositiveIntegerField(default=0)
+    warm_hits = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key}: {self.requests} requests, {self.hits} cache hits"
@@ -0,0 +1,171 @@
+import gzip
+import hashlib
+import os
+import re
+import threading
+
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.views.decorators.http import require_safe
+
+from .model_cache import COMPRESSED_SUFFIXES, get_cache
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip variants are written
+    brotli = None
+
+CONTENT_TYPE = "model/gltf-binary"
+
+# Every cached model's name is derived from everything that decides its bytes
+# (parameters or chunk contents, generator version, export settings and the
+# hashes of the texture sources), so a URL never starts pointing at different
+# content and browsers need not revalidate.
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Content-Encoding -> suffix of the precompressed copy next to the model, most preferred first.
+ENCODINGS = tuple(zip(("br", "gzip"), COMPRESSED_SUFFIXES))
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+MODEL_NAME_PATTERN = re.compile(r"^[0-9a-f]{32}\.glb$")
+
+_etags = {}
+_etags_lock = threading.Lock()
+MAX_ETAGS = 4096
+
+
+def precompress(path):
+    """Write gzip (and, with the brotli package, brotli) copies of `path` for serve_model to send."""
+    with open(path, "rb") as f:
+        data = f.read()
+
+    variants = [(".gz", lambda: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append((".br", lambda: brotli.compress(data, quality=11)))
+
+    for suffix, compress in variants:
+        # Same publish-by-rename as the model itself, so a half-written copy is never served.
+        temp_path = f"{path}{suffix}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(compress())
+        os.replace(temp_path, path + suffix)
+
+
+def etag_for(path, stat):
+    # A published file is never rewritten in place, only replaced (new inode), so
+    # (inode, size) identifies its content even though cache hits touch its mtime.
+    identity = (path, stat.st_ino, stat.st_size)
+    with _etags_lock:
+        etag = _etags.get(identity)
+    if etag is None:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 16), b""):
+                digest.update(block)
+        etag = digest.hexdigest()[:32]
+        with _etags_lock:
+            if len(_etags) >= MAX_ETAGS:
+                _etags.clear()
+            _etags[identity] = etag
+    return etag
+
+
+def etag_matches(header, etag):
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison: W/ prefixes are ignored.
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def parse_range(header, size):
+    """(start, end) inclusive for a single "bytes=" range, None to send the whole file, or False if unsatisfiable."""
+    match = RANGE_PATTERN.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        # Malformed or multi-range requests are answered with the full body, which RFC 9110 allows.
+        return None
+    first, last = match.groups()
+    if first == "":
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def choose_encoding(request, path):
+    accepted = {}
+    for item in request.headers.get("Accept-Encoding", "").split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    for encoding, suffix in ENCODINGS:
+        if accepted.get(encoding, accepted.get("*", 0)) > 0 and os.path.exists(path + suffix):
+            return encoding, suffix
+    return None, ""
+
+
+@require_safe
+def serve_model(request, filename):
+    if not MODEL_NAME_PATTERN.match(filename):
+        raise Http404("Unknown model")
+
+    path = get_cache().path_for(filename[:-len(".glb")])
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise Http404("Unknown model")
+
+    etag = etag_for(path, stat)
+    byte_range = None
+    range_header = request.headers.get("Range")
+    if range_header and etag_matches(request.headers.get("If-Range", f'"{etag}"'), f'"{etag}"'):
+        byte_range = parse_range(range_header, stat.st_size)
+
+    # Ranges always refer to the uncompressed file, so a range request is never served an encoded copy.
+    encoding, suffix = choose_encoding(request, path) if byte_range is None else (None, "")
+    quoted = f'"{etag}-{encoding}"' if encoding else f'"{etag}"'
+    headers = {
+        "ETag": quoted,
+        "Cache-Control": CACHE_CONTROL,
+        "Vary": "Accept-Encoding",
+        "Accept-Ranges": "bytes",
+    }
+
+    if etag_matches(request.headers.get("If-None-Match", ""), quoted):
+        response = HttpResponseNotModified()
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    if byte_range is False:
+        headers["Content-Range"] = f"bytes */{stat.st_size}"
+        return HttpResponse(status=416, headers=headers)
+
+    if byte_range is not None:
+        start, end = byte_range
+        with open(path, "rb") as f:
+            f.seek(start)
+            body = f.read(end - start + 1) if request.method == "GET" else b""
+        headers["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+        response = HttpResponse(body, status=206, content_type=CONTENT_TYPE, headers=headers)
+        response["Content-Length"] = str(end - start + 1)
+        return response
+
+    served = path + suffix
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    if request.method == "HEAD":
+        response = HttpResponse(content_type=CONTENT_TYPE, headers=headers)
+        response["Content-Length"] = str(os.path.getsize(served))
+        return response
+    return FileResponse(open(served, "rb"), content_type=CONTENT_TYPE, filename=filename, headers=headers)
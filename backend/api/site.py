@@ -0,0 +1,225 @@
+import collections
+import concurrent.futures
+import math
+import os
+import threading
+import time
+
+from django.conf import settings
+
+from blender_scripts.scene import native
+
+from .blender_pool import WorkerError
+from .generation import build_model, job_params, observe, publish_model
+from .glb_merge import merge_glbs
+from .metrics import observe_failure
+from .model_cache import bounded, cache_key, get_cache, normalize_params
+from .storage import discard, ensure_sweeper, publish, temp_output_path
+
+# Sites: apartment blocks (storeys=) and several houses on one lot
+# (buildings=). Each storey of each building is a part, generated like any
+# single house and cached under its own key; the parts are generated side by
+# side, then merged into one GLB with every part moved into place. Upper
+# storeys differ from the ground floor only in having no front door, so all
+# of a building's upper storeys are one part, generated once.
+
+STOREY_CLEARANCE = 0.3  # between one storey's walls and the next: the top trim and the floor slab
+BUILDING_GAP = 4.0  # metres at least between neighbouring buildings
+REPORTS_KEPT = 100  # latest site reports (per-part timings) kept for ?report= responses
+
+_reports = collections.OrderedDict()
+_reports_lock = threading.Lock()
+
+
+def plan_site(params):
+    """One entry per storey of every building: its name, offset in the site, and the params of its part."""
+    cols = math.ceil(math.sqrt(params["buildings"]))
+    rows = math.ceil(params["buildings"] / cols)
+    lot = params["location_size"]
+    # Buildings are spread evenly over the lot, or packed BUILDING_GAP apart if it is too small for that.
+    cell_x = max(params["width"] + BUILDING_GAP, lot / cols)
+    cell_y = max(params["depth"] + BUILDING_GAP, lot / rows)
+
+    parts = []
+    for building in range(params["buildings"]):
+        row, col = divmod(building, cols)
+        x = (col - (cols - 1) / 2) * cell_x
+        y = ((rows - 1) / 2 - row) * cell_y
+        for storey in range(params["storeys"]):
+            part_params = dict(params, storeys=1, buildings=1, seed=params["seed"] + 7919 * building,
+                               entrance=storey == 0)
+            parts.append({
+                "name": f"Building {building + 1} Storey {storey + 1}",
+                "offset": (x, y, storey * (params["height"] + STOREY_CLEARANCE)),
+                "params": part_params,
+                "key": cache_key(part_params),
+            })
+    return parts
+
+
+def build_site(key, params, progress=None):
+    """The cached model for the site `params` describe, generating its parts in parallel first if needed."""
+    ensure_sweeper()
+    cache = get_cache()
+    model_path = cache.get(key)
+    if model_path:
+        return model_path
+
+    with cache.lock_for(key):
+        if os.path.exists(cache.path_for(key)):
+            return cache.path_for(key)
+
+        temp_path = temp_output_path()
+        try:
+            site = dict(normalize_params(params),
+                        location_size=bounded(params, "location_size", settings.MODEL_MAX_LOCATION_SIZE, default=50))
+            parts = plan_site(site)
+            start = time.monotonic()
+            built = build_parts(parts, site["engine"], progress)
+            parts_seconds = time.monotonic() - start
+
+            start = time.monotonic()
+            try:
+                counts = merge_glbs([(built[part["key"]]["path"], part["name"], part["offset"]) for part in parts],
+                                    temp_path)
+            except ValueError as e:
+                observe_failure(site["engine"])
+                raise WorkerError(f"Could not merge the site's parts: {e}")
+            merge_seconds = time.monotonic() - start
+            model_path = publish_model(key, temp_path)
+
+            stats = site_stats(parts, built, parts_seconds, merge_seconds, counts)
+            print(f"Site: {len(parts)} parts, {len(built)} distinct, {stats['generated']} generated in "
+                  f"{parts_seconds:.2f}s on {stats['workers']} workers (x{stats['speedup']:.1f}), "
+                  f"merged in {merge_seconds:.2f}s")
+            for part in stats["parts"]:
+                print(f"  {part['name']}: {part['seconds']:.2f}s ({part['engine']})")
+            observe(site["engine"], parts_seconds + merge_seconds, stats, model_path)
+            if model_path is not None:
+                report = site_report(stats)
+                remember_report(key, report)
+                if progress is not None:
+                    progress(dict(report, event="site"))
+        finally:
+            discard(temp_path)
+
+    cache.evict()
+    return model_path
+
+
+def build_parts(parts, engine, progress=None):
+    """Build every distinct part; returns {part key: {"path", "seconds", "engine"}}.
+
+    Native parts run on worker processes (see native.generate_many). A
+    Blender part runs on a Blender worker anyway, so threads are enough to
+    keep BLENDER_POOL_SIZE of them busy at once.
+    """
+    cache = get_cache()
+    built, missing = {}, {}
+    for part in parts:
+        if part["key"] in built or part["key"] in missing:
+            continue
+        path = cache.get(part["key"])
+        if path:
+            built[part["key"]] = {"path": path, "seconds": 0.0, "engine": "cached"}
+        else:
+            missing[part["key"]] = part
+
+    count = len(built) + len(missing)
+
+    def finished(part, result):
+        built[part["key"]] = result
+        if progress is not None:
+            progress({"event": "part", "part": part["name"], "seconds": result["seconds"], "index": len(built) - 1,
+                      "count": count})
+
+    workers = max(1, min(len(missing), settings.SITE_WORKERS))
+    fallback = []
+    if engine == "native" and missing:
+        # Always SITE_WORKERS: the process pool is kept between sites, so its size must not vary.
+        fallback = build_native_parts(list(missing.values()), settings.SITE_WORKERS, finished)
+    blender_parts = fallback if engine == "native" else list(missing.values())
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(build_blender_part, part): part for part in blender_parts}
+        for future in concurrent.futures.as_completed(futures):
+            finished(futures[future], future.result())
+    return built
+
+
+def build_native_parts(parts, workers, finished):
+    """Generate the parts natively on worker processes; returns the parts Blender has to build instead."""
+    cache = get_cache()
+    jobs = [job_params(part["params"], temp_output_path()) for part in parts]
+    fallback = []
+    try:
+        for index, result in native.generate_many(jobs, workers):
+            part, job = parts[index], jobs[index]
+            if isinstance(result, (ImportError, ValueError)):
+                # As for a single house: Blender builds what the native writer cannot.
+                print("Native export failed, falling back to Blender:", str(result))
+                fallback.append(part)
+                continue
+            if isinstance(result, Exception):
+                # Whatever the worker process hit (a crash, a full disk), the caller sees a failed generation.
+                observe_failure("native")
+                raise WorkerError(f"{part['name']} failed: {result!r}") from result
+            seconds = sum(result["stages"].values())
+            # Parts are read by the merge rather than served, so they skip publish_model's compressed copies.
+            path = publish(job["output_path"], cache.path_for(part["key"]))
+            observe("native", seconds, result, path)
+            if path is None:
+                raise WorkerError(f"Model not found at: {cache.path_for(part['key'])}")
+            finished(part, {"path": path, "seconds": seconds, "engine": "native"})
+    finally:
+        for job in jobs:
+            discard(job["output_path"])
+    return fallback
+
+
+def build_blender_part(part):
+    start = time.monotonic()
+    path = build_model(part["key"], dict(part["params"], engine="blender"))
+    if path is None:
+        raise WorkerError(f"Model not found at: {get_cache().path_for(part['key'])}")
+    return {"path": path, "seconds": time.monotonic() - start, "engine": "blender"}
+
+
+def site_stats(parts, built, parts_seconds, merge_seconds, counts):
+    generated = [result for result in built.values() if result["engine"] != "cached"]
+    part_seconds = sum(result["seconds"] for result in generated)
+    return {
+        "stages": {"site_parts": parts_seconds, "site_merge": merge_seconds},
+        "counts": {"objects": counts["nodes"], "triangles": counts["triangles"], "materials": counts["materials"]},
+        "parts": [dict(name=part["name"], key=part["key"], **{k: built[part["key"]][k] for k in ("seconds", "engine")})
+                  for part in parts],
+        "generated": len(generated),
+        "workers": min(len(generated), settings.SITE_WORKERS) if generated else 0,
+        # Time the parts took one after another over the time they took side by side.
+        "speedup": part_seconds / parts_seconds if generated and parts_seconds > 0 else 1.0,
+    }
+
+
+def site_report(stats):
+    """The part of site_stats() a client is shown: what each part took and how much running them side by side saved."""
+    return {
+        "parts": stats["parts"],
+        "parts_seconds": stats["stages"]["site_parts"],
+        "merge_seconds": stats["stages"]["site_merge"],
+        "generated": stats["generated"],
+        "workers": stats["workers"],
+        "speedup": stats["speedup"],
+    }
+
+
+def remember_report(key, report):
+    with _reports_lock:
+        _reports[key] = report
+        _reports.move_to_end(key)
+        while len(_reports) > REPORTS_KEPT:
+            _reports.popitem(last=False)
+
+
+def get_report(key):
+    """The site_report() of the last time this process built the site `key`, or None."""
+    with _reports_lock:
+        return _reports.get(key)
@@ -0,0 +1,95 @@
+import os
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+from .model_cache import get_cache
+
+# Blender writes here first; nothing under this directory is ever served.
+TEMP_DIR = "models/tmp"
+
+
+# Temp paths handed out and not yet published or discarded; the sweeper leaves them alone however old they get.
+_in_use = set()
+_in_use_lock = threading.Lock()
+
+
+def temp_output_path(suffix=".glb"):
+    temp_dir = os.path.join(settings.MEDIA_ROOT, TEMP_DIR)
+    os.makedirs(temp_dir, exist_ok=True)
+    path = os.path.join(temp_dir, f"{uuid.uuid4().hex}{suffix}")
+    with _in_use_lock:
+        _in_use.add(path)
+    return path
+
+
+def publish(temp_path, final_path):
+    # os.replace is atomic on one filesystem, so clients see either no file or the complete one.
+    if not os.path.exists(temp_path) or os.path.getsize(temp_path) == 0:
+        discard(temp_path)
+        return None
+    os.makedirs(os.path.dirname(final_path), exist_ok=True)
+    os.replace(temp_path, final_path)
+    with _in_use_lock:
+        _in_use.discard(temp_path)
+    return final_path
+
+
+def discard(temp_path):
+    try:
+        os.remove(temp_path)
+    except FileNotFoundError:
+        pass
+    with _in_use_lock:
+        _in_use.discard(temp_path)
+
+
+def sweep():
+    # Temp files older than any job could run belong to crashed or killed generations. A long
+    # batch in this process may still own an old one, so its paths are skipped.
+    temp_dir = os.path.join(settings.MEDIA_ROOT, TEMP_DIR)
+    cutoff = time.time() - settings.MODEL_TEMP_MAX_AGE
+    removed = 0
+    try:
+        names = os.listdir(temp_dir)
+    except FileNotFoundError:
+        names = []
+    with _in_use_lock:
+        in_use = set(_in_use)
+    for name in names:
+        path = os.path.join(temp_dir, name)
+        if path in in_use:
+            continue
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except FileNotFoundError:
+            pass
+
+    return removed + get_cache().evict()
+
+
+_sweeper = None
+_sweeper_lock = threading.Lock()
+
+
+def _sweep_loop():
+    while True:
+        time.sleep(settings.MODEL_SWEEP_INTERVAL)
+        try:
+            removed = sweep()
+            if removed:
+                print(f"Model sweeper removed {removed} files")
+        except OSError as e:
+            print("Model sweeper failed:", str(e))
+
+
+def ensure_sweeper():
+    global _sweeper
+    with _sweeper_lock:
+        if _sweeper is None:
+            _sweeper = threading.Thread(target=_sweep_loop, name="model-sweeper", daemon=True)
+            _sweeper.start()
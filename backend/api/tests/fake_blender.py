@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+# Stands in for `blender --background --python <script> -- <args>` in tests:
+# runs the script with the stub bpy from benchmarks/, so the server's Blender
+# paths (worker pool, one-shot and batch runs) can be tested without Blender.
+import os
+import runpy
+import sys
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+sys.path[:0] = [os.path.join(BACKEND, "benchmarks", "stub"), BACKEND]
+script = sys.argv[sys.argv.index("--python") + 1]
+sys.argv = [script] + sys.argv[sys.argv.index("--") + 1:]
+runpy.run_path(script, run_name="__main__")
@@ -0,0 +1,35 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import override_settings
+
+from api.model_cache import CACHE_DIR, ModelCache
+
+# An executable that runs generate_model.py the way Blender would, with the benchmarks' stub bpy.
+FAKE_BLENDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_blender.py")
+
+
+class TempMediaMixin:
+    """Gives each test its own MEDIA_ROOT and an empty model cache inside it (self.cache)."""
+
+    def setUp(self):
+        super().setUp()
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.cache = ModelCache(os.path.join(self.media, CACHE_DIR), 10 ** 9, 1000)
+        os.makedirs(self.cache.root)
+        cache = mock.patch("api.model_cache._cache", self.cache)
+        cache.start()
+        self.addCleanup(cache.stop)
+
+    def add_model(self, key, data=b"glTF"):
+        with open(self.cache.path_for(key), "wb") as f:
+            f.write(data)
+        return self.cache.path_for(key)
+
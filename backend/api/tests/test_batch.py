@@ -0,0 +1,61 @@
+import os
+from unittest import mock, skipIf
+
+from django.test import TestCase, override_settings
+
+from api import generation, storage
+
+from .helpers import FAKE_BLENDER, TempMediaMixin
+
+URL = "/api/generate-model/batch/"
+VARIANT = {"width": 8, "length": 6, "height": 3, "budget": 900, "seed": 0}
+
+
+class BatchTests(TempMediaMixin, TestCase):
+    def post(self, variants):
+        return self.client.post(URL, {"variants": variants}, content_type="application/json")
+
+    def test_bad_batches(self):
+        self.assertEqual(self.post([]).status_code, 400)
+        self.assertEqual(self.post([VARIANT, "seed=1"]).status_code, 400)
+        with self.settings(GENERATION_BATCH_MAX=2):
+            self.assertEqual(self.post([VARIANT] * 3).status_code, 400)
+        response = self.post([VARIANT, dict(VARIANT, height=-3)])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("variant 1", response.json()["error"])
+
+    @skipIf(os.name == "nt", "the fake Blender is run as a script with a shebang")
+    @override_settings(BLENDER_BINARY=FAKE_BLENDER, BLENDER_POOL_SIZE=0)
+    def test_variants_are_built_in_one_blender_session(self):
+        variants = [VARIANT, dict(VARIANT, seed=1), VARIANT, dict(VARIANT, engine="native", seed=2)]
+        with mock.patch.object(generation, "run_script", wraps=generation.run_script) as run_script:
+            response = self.post(variants)
+            self.assertEqual(response.status_code, 200)
+            models = response.json()["models"]
+            self.assertEqual(len(models), 4)
+            self.assertTrue(all(model["model_url"] and model["error"] is None for model in models))
+            self.assertEqual(models[0], models[2])
+            # The two distinct Blender variants share one run; the native one needs none.
+            self.assertEqual(run_script.call_count, 1)
+            self.assertEqual(len([name for name in os.listdir(self.cache.root) if name.endswith(".glb")]), 3)
+
+            # Built models come from the cache next time.
+            self.assertEqual(self.post(variants[:2]).json()["models"], models[:2])
+            self.assertEqual(run_script.call_count, 1)
+
+    def test_sweep_leaves_outputs_still_in_use(self):
+        in_use, orphan = storage.temp_output_path(), storage.temp_output_path()
+        for path in (in_use, orphan):
+            with open(path, "wb") as f:
+                f.write(b"glTF")
+            os.utime(path, (0, 0))
+        # Discarding it ends its use; the file left behind is then the sweeper's to remove.
+        storage.discard(orphan)
+        with open(orphan, "wb") as f:
+            f.write(b"glTF")
+        os.utime(orphan, (0, 0))
+
+        storage.sweep()
+        self.assertTrue(os.path.exists(in_use))
+        self.assertFalse(os.path.exists(orphan))
+        storage.discard(in_use)
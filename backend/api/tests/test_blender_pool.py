@@ -0,0 +1,81 @@
+import os
+from unittest import mock, skipIf
+
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+
+from api import blender_pool
+from api.blender_pool import BlenderPool, WorkerError
+from api.generation import job_params
+from api.metrics import render
+from api.storage import temp_output_path
+
+from .helpers import FAKE_BLENDER, TempMediaMixin
+
+PARAMS = {"width": 6, "depth": 5, "height": 3, "budget": 900, "seed": 0, "location_size": 50}
+
+
+def idle_metric():
+    return next(line for line in render().splitlines() if line.startswith("civi_blender_workers_idle "))
+
+
+@skipIf(os.name == "nt", "the fake Blender is run as a script with a shebang")
+@override_settings(BLENDER_BINARY=FAKE_BLENDER, BLENDER_STARTUP_TIMEOUT=30, BLENDER_JOB_TIMEOUT=30)
+class BlenderPoolTests(TempMediaMixin, SimpleTestCase):
+    def pool(self, size):
+        # The health check is run by the tests themselves rather than a monitor thread.
+        with mock.patch.object(BlenderPool, "_monitor_loop", lambda pool: None):
+            pool = BlenderPool(size, settings.BLENDER_SCRIPT)
+        for worker in pool.workers:
+            self.addCleanup(worker.stop)
+        installed = mock.patch.object(blender_pool, "_pool", pool)
+        installed.start()
+        self.addCleanup(installed.stop)
+        return pool
+
+    def job(self):
+        return job_params(PARAMS, temp_output_path())
+
+    def test_health_check_starts_the_workers_and_they_take_jobs(self):
+        pool = self.pool(2)
+        self.assertEqual(pool.live_idle(), 0)
+        pool.health_check()
+        self.assertEqual(pool.live_idle(), 2)
+        self.assertEqual(idle_metric(), "civi_blender_workers_idle 2")
+
+        params = self.job()
+        events = []
+        reply = pool.run(params, progress=events.append)
+        self.assertEqual(reply["output_path"], params["output_path"])
+        self.assertGreater(os.path.getsize(params["output_path"]), 0)
+        self.assertIn("stages", reply["stats"])
+        self.assertIn({"event": "stage", "stage": "clear"}, events)
+
+    def test_crashed_and_worn_out_workers_are_restarted(self):
+        pool = self.pool(1)
+        worker = pool.workers[0]
+        pool.health_check()
+        first = worker.process.pid
+
+        worker.process.kill()
+        worker.process.wait()
+        self.assertEqual(pool.live_idle(), 0)
+        pool.health_check()
+        self.assertTrue(worker.is_alive())
+        self.assertNotEqual(worker.process.pid, first)
+
+        second = worker.process.pid
+        with self.settings(BLENDER_WORKER_MAX_JOBS=1):
+            pool.run(self.job())
+            self.assertEqual(worker.process.pid, second)
+            pool.run(self.job())
+            self.assertNotEqual(worker.process.pid, second)
+
+    def test_workers_that_cannot_start_are_not_counted_idle(self):
+        pool = self.pool(2)
+        with self.settings(BLENDER_BINARY=os.path.join(self.media, "no-blender")):
+            self.assertEqual(pool.health_check(), 2)
+            self.assertEqual(pool.live_idle(), 0)
+            self.assertEqual(idle_metric(), "civi_blender_workers_idle 0")
+            with self.assertRaisesRegex(WorkerError, "Could not start Blender"):
+                pool.run(self.job())
@@ -0,0 +1,72 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+
+from blender_scripts.scene.ir import SHELL, room_tag
+from blender_scripts.scene.layout import generate_layout
+
+from api import jobs
+from api.chunks import plan_chunks
+from api.jobs import DONE, QUEUED, JobQueue
+
+from .helpers import TempMediaMixin
+
+PARAMS = {"width": 10, "depth": 8, "height": 3, "budget": 9000, "seed": 0, "location_size": 50}
+QUERY = {"width": 10, "length": 8, "height": 3, "budget": 9000, "seed": 0, "engine": "native"}
+URL = "/api/generate-model/chunks/"
+
+
+class PlanChunksTests(SimpleTestCase):
+    def test_shell_first_then_a_chunk_per_room(self):
+        rooms = generate_layout(10, 8, 3, 9000, 0).info["room_positions"]
+        chunks = plan_chunks(PARAMS)
+        self.assertEqual([tag for tag, _, _ in chunks], [SHELL] + [room_tag(room) for room in rooms])
+        self.assertEqual(chunks[0][2], (-5, -4, 5, 4))
+        for (tag, _, bounds), (x, y, width, depth) in zip(chunks[1:], rooms.values()):
+            self.assertEqual(bounds, (x - width / 2, y - depth / 2, x + width / 2, y + depth / 2))
+        self.assertEqual(len({key for _, key, _ in chunks}), len(chunks))
+
+    def test_keys_follow_the_content(self):
+        self.assertEqual(plan_chunks(PARAMS), plan_chunks(dict(PARAMS)))
+        # Budgets in one tier lay out the same house, so its chunks are the same ones.
+        self.assertEqual(plan_chunks(PARAMS), plan_chunks(dict(PARAMS, budget=8500)))
+        self.assertNotEqual(plan_chunks(dict(PARAMS, lod="proxy")), plan_chunks(PARAMS))
+
+    def test_sites_are_not_chunked(self):
+        with self.assertRaises(ValueError):
+            plan_chunks(dict(PARAMS, storeys=2))
+
+
+class ChunkEndpointTests(TempMediaMixin, TestCase):
+    def install_queue(self, workers):
+        job_queue = JobQueue(max_queued=20, num_workers=workers, max_finished=100)
+        installed = mock.patch.object(jobs, "_queue", job_queue)
+        installed.start()
+        self.addCleanup(installed.stop)
+        return job_queue
+
+    def test_shell_now_rooms_queued_once(self):
+        job_queue = self.install_queue(0)
+        manifest = self.client.get(URL, QUERY).json()
+        self.assertFalse(manifest["complete"])
+        shell, *rooms = manifest["chunks"]
+        self.assertEqual((shell["name"], shell["status"]), (SHELL, DONE))
+        self.assertEqual(self.client.get(shell["model_url"]).status_code, 200)
+        self.assertTrue(rooms)
+        self.assertTrue(all(room["status"] == QUEUED and room["status_url"] for room in rooms))
+
+        self.assertEqual(self.client.get(URL, QUERY).json()["chunks"][1:], rooms)
+        self.assertEqual(job_queue.depth(), len(rooms))
+
+    def test_manifest_completes_once_the_rooms_are_built(self):
+        job_queue = self.install_queue(1)
+        self.client.get(URL, QUERY)
+        job_queue.pending.join()
+        manifest = self.client.get(URL, QUERY).json()
+        self.assertTrue(manifest["complete"])
+        for chunk in manifest["chunks"]:
+            self.assertEqual(self.client.get(chunk["model_url"]).status_code, 200)
+
+    def test_bad_parameters(self):
+        self.assertEqual(self.client.get(URL, dict(QUERY, buildings=2)).status_code, 400)
+        self.assertEqual(self.client.get(URL, dict(QUERY, width="nan")).status_code, 400)
@@ -0,0 +1,28 @@
+import os
+
+from django.test import TestCase
+
+from api.glb_report import read_glb
+from api.model_cache import cache_key
+
+from .helpers import TempMediaMixin
+
+QUERY = {"width": 10, "length": 8, "height": 3, "budget": 9000, "seed": 0, "engine": "native"}
+
+
+class NodeModeTests(TempMediaMixin, TestCase):
+    def generate(self, **query):
+        response = self.client.get("/api/generate-model/", dict(QUERY, **query))
+        self.assertEqual(response.status_code, 200)
+        return read_glb(os.path.join(self.cache.root, os.path.basename(response.json()["model_url"])))[0]
+
+    def test_instanced_parts_share_meshes_unless_merging_is_asked_for(self):
+        named = self.generate()
+        self.assertLess(len(named["meshes"]), len(named["nodes"]) - 1)
+        merged = self.generate(nodes="merged")
+        self.assertLess(len(merged["nodes"]), len(named["nodes"]))
+
+    def test_default_is_the_named_mode(self):
+        params = {"width": 10, "depth": 8, "height": 3, "budget": 9000, "seed": 0, "location_size": 50}
+        self.assertEqual(cache_key(params), cache_key(dict(params, nodes="named")))
+        self.assertNotEqual(cache_key(params), cache_key(dict(params, nodes="merged")))
@@ -0,0 +1,47 @@
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase
+
+from blender_scripts.scene.gltf import write_glb
+from blender_scripts.scene.layout import generate_layout
+
+from api.glb_report import read_glb
+
+
+class GLBWriterTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_output_is_a_consistent_glb(self):
+        for options in ({}, {"merged": False}):
+            with self.subTest(**options):
+                path = os.path.join(self.directory, "house.glb")
+                stats = write_glb(generate_layout(8, 6, 3, 9000, 0), path, **options)
+                gltf, binary, _ = read_glb(path)
+                self.assertEqual(gltf["asset"]["version"], "2.0")
+                self.assertEqual(len(gltf["nodes"]), stats["nodes"])
+                self.assertEqual(len(gltf["meshes"]), stats["meshes"])
+                self.assertEqual(len(gltf["materials"]), stats["materials"])
+                self.assertEqual(os.path.getsize(path), stats["bytes"])
+                self.assertEqual(gltf["buffers"][0]["byteLength"], len(binary))
+                for view in gltf["bufferViews"]:
+                    self.assertLessEqual(view.get("byteOffset", 0) + view["byteLength"], len(binary))
+                for mesh in gltf["meshes"]:
+                    for primitive in mesh["primitives"]:
+                        position = gltf["accessors"][primitive["attributes"]["POSITION"]]
+                        self.assertEqual(position["type"], "VEC3")
+                        self.assertEqual(len(position["min"]), 3)
+                        self.assertEqual(gltf["accessors"][primitive["indices"]]["count"] % 3, 0)
+
+    def test_unmerged_output_keeps_a_node_per_part(self):
+        scene = generate_layout(8, 6, 3, 9000, 0)
+        merged = write_glb(scene, os.path.join(self.directory, "merged.glb"))
+        named = write_glb(scene, os.path.join(self.directory, "named.glb"), merged=False)
+        self.assertLess(merged["nodes"], named["nodes"])
+
+    def test_rejects_unknown_compression(self):
+        with self.assertRaises(ValueError):
+            write_glb(generate_layout(8, 6, 3, 9000, 0), os.path.join(self.directory, "house.glb"), compress="draco")
@@ -0,0 +1,153 @@
+import threading
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+
+from api import jobs
+from api.jobs import DONE, FAILED, QUEUED, JobQueue, QueueFull
+from api.model_cache import cache_key
+
+from .helpers import TempMediaMixin
+
+PARAMS = {"width": 10, "depth": 8, "height": 3, "budget": 9000, "seed": 0, "location_size": 50}
+QUERY = {"width": 10, "length": 8, "height": 3, "budget": 9000, "seed": 0}
+
+
+def slow_miss(key):
+    # Widens the window between the cache lookup and queueing that concurrent submissions race through.
+    time.sleep(0.01)
+
+
+class JobQueueTests(TempMediaMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        recording = mock.patch.object(jobs, "record_request")
+        recording.start()
+        self.addCleanup(recording.stop)
+
+    def test_concurrent_submissions_share_one_generation(self):
+        # No workers: every job stays queued, so the queue shows how many generations were asked for.
+        job_queue = JobQueue(max_queued=10, num_workers=0, max_finished=10)
+        submitted = []
+        with mock.patch.object(self.cache, "get", side_effect=slow_miss):
+            threads = [threading.Thread(target=lambda: submitted.append(job_queue.submit(PARAMS))) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len({job.id for job in submitted}), 1)
+        self.assertEqual(job_queue.depth(), 1)
+
+    def test_a_full_queue_leaves_the_active_job_alone(self):
+        job_queue = JobQueue(max_queued=1, num_workers=0, max_finished=10)
+        first = job_queue.submit(PARAMS)
+        with self.assertRaises(QueueFull):
+            job_queue.submit(dict(PARAMS, seed=1))
+        self.assertIs(job_queue.submit(PARAMS), first)
+        self.assertEqual(first.status, QUEUED)
+
+    def test_a_cached_model_needs_no_generation(self):
+        self.add_model(cache_key(PARAMS))
+        job_queue = JobQueue(max_queued=1, num_workers=0, max_finished=10)
+        job = job_queue.submit(PARAMS)
+        self.assertEqual(job.status, DONE)
+        self.assertEqual(job.model_path, self.cache.path_for(job.key))
+        self.assertEqual(job_queue.depth(), 0)
+
+    def test_workers_run_jobs_and_keep_their_events(self):
+        def build_model(key, params, progress=None):
+            progress({"event": "stage", "stage": "layout"})
+            if params["seed"] == 13:
+                raise ValueError("unlucky")
+            return self.add_model(key)
+
+        job_queue = JobQueue(max_queued=10, num_workers=1, max_finished=1)
+        with mock.patch.object(jobs, "build_model", build_model):
+            done, failed = job_queue.submit(PARAMS), job_queue.submit(dict(PARAMS, seed=13))
+            job_queue.pending.join()
+        self.assertEqual((done.status, failed.status), (DONE, FAILED))
+        self.assertEqual(failed.error, "unlucky")
+        self.assertEqual([event["stage"] for _, event in done.events], ["layout"])
+        # Only the latest finished job is remembered.
+        self.assertIsNone(job_queue.get(done.id))
+        self.assertIs(job_queue.get(failed.id), failed)
+
+
+class JobEndpointTests(TempMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.job_queue = JobQueue(max_queued=1, num_workers=0, max_finished=10)
+        installed = mock.patch.object(jobs, "_queue", self.job_queue)
+        installed.start()
+        self.addCleanup(installed.stop)
+
+    def test_submit_and_poll(self):
+        response = self.client.post("/api/generate-model/jobs/", QUERY)
+        self.assertEqual(response.status_code, 202)
+        job = response.json()
+        self.assertEqual(job["status"], QUEUED)
+        self.assertIsNone(job["model_url"])
+
+        polled = self.client.get(job["status_url"])
+        self.assertEqual(polled.json()["job_id"], job["job_id"])
+
+        self.job_queue._finish(self.job_queue.get(self.job_queue.pending.get().id), self.add_model(cache_key(PARAMS)))
+        self.assertTrue(self.client.get(job["status_url"]).json()["model_url"].endswith(f"{cache_key(PARAMS)}.glb"))
+
+    def test_bad_parameters_full_queue_and_unknown_jobs(self):
+        self.assertEqual(self.client.post("/api/generate-model/jobs/", dict(QUERY, width="wide")).status_code, 400)
+        self.client.post("/api/generate-model/jobs/", QUERY)
+        self.assertEqual(self.client.post("/api/generate-model/jobs/", dict(QUERY, seed=1)).status_code, 503)
+        self.assertEqual(self.client.get(f"/api/generate-model/jobs/{'0' * 32}/").status_code, 404)
+
+
+class JobEventStreamTests(TempMediaMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.job_queue = JobQueue(max_queued=10, num_workers=0, max_finished=10)
+        for patcher in (mock.patch.object(jobs, "_queue", self.job_queue), mock.patch.object(jobs, "record_request")):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.job = self.job_queue.submit(PARAMS)
+        self.url = f"/api/generate-model/jobs/{self.job.id}/events/"
+
+    def finish(self):
+        self.job_queue._finish(self.job, self.add_model(self.job.key))
+
+    def test_finished_job_replays_its_events_then_ends(self):
+        for room in ("Kitchen", "Bathroom", "Office"):
+            self.job.add_event({"event": "room", "room": room})
+        self.finish()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertEqual(response["Cache-Control"], "no-cache")
+        messages = b"".join(response.streaming_content).decode().split("\n\n")[:-1]
+        self.assertEqual(len(messages), 4)
+        self.assertTrue(messages[0].startswith("id: 1\nevent: progress\ndata: "))
+        self.assertIn('"room": "Office"', messages[2])
+        self.assertTrue(messages[3].startswith("event: done\ndata: "))
+        self.assertIn(self.job.key, messages[3])
+
+    def test_reconnecting_clients_resume_after_the_last_event_they_saw(self):
+        for room in ("Kitchen", "Bathroom", "Office"):
+            self.job.add_event({"event": "room", "room": room})
+        self.finish()
+        body = b"".join(self.client.get(self.url, HTTP_LAST_EVENT_ID="2").streaming_content).decode()
+        self.assertNotIn("Kitchen", body)
+        self.assertTrue(body.startswith("id: 3\n"))
+
+    def test_live_job_streams_keep_alives_and_events_as_they_come(self):
+        with self.settings(GENERATION_EVENTS_KEEPALIVE=0.01):
+            stream = iter(self.client.get(self.url).streaming_content)
+            self.assertEqual(next(stream), b": keep-alive\n\n")
+            self.job.add_event({"event": "stage", "stage": "layout"})
+            self.assertIn(b'"stage": "layout"', next(stream))
+            threading.Timer(0.05, self.finish).start()
+            rest = b"".join(stream)
+        self.assertIn(b"event: done", rest)
+        self.assertTrue(rest.endswith(b"\n\n"))
+
+    def test_unknown_job(self):
+        self.assertEqual(self.client.get(f"/api/generate-model/jobs/{'0' * 32}/events/").status_code, 404)
@@ -0,0 +1,160 @@
+import itertools
+import random
+import re
+import sys
+
+from django.test import SimpleTestCase
+
+from blender_scripts.scene.floorplan import pack_rooms, slice_rooms
+from blender_scripts.scene.ir import BOX, SHELL, WALL, room_tag
+from blender_scripts.scene.layout import BUDGET_TIERS, WALL_THICKNESS, door_footprint, generate_layout
+
+# Footprints and budgets the door tests sweep: small, square, large and long houses, every budget tier.
+FOOTPRINTS = ((6, 5), (10, 8), (16, 12), (20, 6))
+BUDGETS = tuple(bound for bound, _ in BUDGET_TIERS[:-1]) + (2 * BUDGET_TIERS[-2][0],)
+
+
+def layouts(seeds=range(10)):
+    for seed, (width, depth), budget in itertools.product(seeds, FOOTPRINTS, BUDGETS):
+        yield (width, depth, budget, seed), generate_layout(width, depth, 3, budget, seed)
+
+
+def overlap(a, b):
+    """Whether the rectangles (x0, y0, x1, y1) share some area."""
+    return min(a[2], b[2]) - max(a[0], b[0]) > 1e-9 and min(a[3], b[3]) - max(a[1], b[1]) > 1e-9
+
+
+def doors_of(scene):
+    """(part, footprint) of every door leaf in the scene, front door included."""
+    doors = []
+    for part in scene.parts:
+        if part.kind == BOX and re.fullmatch(r".* Door( \d+)?", part.name):
+            axis = 0 if part.dims[0] > part.dims[1] else 1
+            doors.append((part, door_footprint(part.location, axis)))
+    return doors
+
+
+class LayoutTests(SimpleTestCase):
+    def test_runs_without_blender(self):
+        generate_layout(10, 8, 3, 9000, 0)
+        self.assertNotIn("bpy", sys.modules)
+
+    def test_same_seed_gives_the_same_scene(self):
+        first, second = generate_layout(10, 8, 3, 9000, 4), generate_layout(10, 8, 3, 9000, 4)
+        self.assertEqual([part.record() for part in first.parts], [part.record() for part in second.parts])
+        other = generate_layout(10, 8, 3, 9000, 5)
+        self.assertNotEqual([part.record() for part in first.parts], [part.record() for part in other.parts])
+
+    def test_parts_are_tagged_with_the_shell_or_their_room(self):
+        scene = generate_layout(10, 8, 3, 9000, 0)
+        rooms = scene.info["room_positions"]
+        self.assertEqual(scene.tags()[0], SHELL)
+        self.assertEqual(set(scene.tags()), {SHELL} | {room_tag(room) for room in rooms})
+        # Chunks split the parts between them without losing or repeating any.
+        chunks = [scene.subset(tag) for tag in scene.tags()]
+        self.assertEqual(sum(len(chunk.parts) for chunk in chunks), len(scene.parts))
+        self.assertTrue(all(chunk.info["width"] == 10 for chunk in chunks))
+
+
+
+class FloorPlanTests(SimpleTestCase):
+    def test_rooms_tile_the_footprint(self):
+        rng = random.Random(1)
+        for count in (1, 2, 5, 13, 40):
+            areas = [rng.uniform(1, 6) for _ in range(count)]
+            bounds = (-7.0, -4.0, 7.0, 4.0)
+            plan = pack_rooms(areas, bounds, random.Random(count))
+
+            covered = sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in plan)
+            self.assertAlmostEqual(covered, 14 * 8)
+            for x0, y0, x1, y1 in plan:
+                self.assertTrue(bounds[0] - 1e-9 <= x0 < x1 <= bounds[2] + 1e-9)
+                self.assertTrue(bounds[1] - 1e-9 <= y0 < y1 <= bounds[3] + 1e-9)
+            for a, b in itertools.combinations(plan, 2):
+                self.assertFalse(overlap(a, b), f"{a} and {b} overlap")
+            # Areas come out in proportion to what was asked for.
+            for area, (x0, y0, x1, y1) in zip(areas, plan):
+                self.assertAlmostEqual((x1 - x0) * (y1 - y0) / covered, area / sum(areas))
+
+    def test_same_rng_state_gives_the_same_plan(self):
+        areas = [2.25, 1.0, 6.0, 2.25, 2.25]
+        bounds = (-5, -4, 5, 4)
+        self.assertEqual(pack_rooms(areas, bounds, random.Random(7)), pack_rooms(areas, bounds, random.Random(7)))
+
+    def test_one_cut_fewer_than_rooms_each_between_its_two_sides(self):
+        plan, cuts = slice_rooms([1.0, 2.25, 6.0, 2.25, 2.25, 2.25], (-8, -6, 8, 6), random.Random(3))
+        self.assertEqual(len(cuts), len(plan) - 1)
+        for cut in cuts:
+            spans = cut.spans(plan)
+            self.assertTrue(spans)
+            for a, b, low, high in spans:
+                self.assertTrue(cut.start - 1e-9 <= a < b <= cut.end + 1e-9)
+                self.assertIn(low, cut.low)
+                self.assertIn(high, cut.high)
+                self.assertAlmostEqual(plan[low][cut.axis + 2], cut.position)
+                self.assertAlmostEqual(plan[high][cut.axis], cut.position)
+
+    def test_rejects_non_positive_areas(self):
+        with self.assertRaises(ValueError):
+            pack_rooms([1.0, 0.0], (0, 0, 1, 1))
+
+
+class DoorTests(SimpleTestCase):
+    def test_no_two_doors_overlap(self):
+        for args, scene in layouts():
+            for (a, fa), (b, fb) in itertools.combinations(doors_of(scene), 2):
+                self.assertFalse(overlap(fa, fb), f"{a.name} and {b.name} overlap in {args}")
+
+    def test_room_doors_stay_off_the_exterior_walls(self):
+        for (width, depth, _, _), scene in layouts():
+            for part, _ in doors_of(scene):
+                if part.name == "Front Door":
+                    continue
+                x, y = part.location[:2]
+                self.assertGreater(width / 2 - abs(x), WALL_THICKNESS, part.name)
+                self.assertGreater(depth / 2 - abs(y), WALL_THICKNESS, part.name)
+
+    def test_doors_stay_clear_of_the_walls_meeting_theirs(self):
+        for args, scene in layouts():
+            walls = [part for part in scene.parts if part.kind == WALL]
+            for door, footprint in doors_of(scene):
+                axis = 0 if door.dims[0] > door.dims[1] else 1
+                for wall in walls:
+                    if (0 if wall.dims[0] >= wall.dims[1] else 1) == axis:
+                        continue
+                    bounds = (wall.location[0] - wall.dims[0] / 2, wall.location[1] - wall.dims[1] / 2,
+                              wall.location[0] + wall.dims[0] / 2, wall.location[1] + wall.dims[1] / 2)
+                    self.assertFalse(overlap(footprint, bounds), f"{door.name} runs into {wall.name} in {args}")
+
+    def test_every_room_can_be_reached_from_the_front_door(self):
+        for args, scene in layouts():
+            rooms = scene.info["room_positions"]
+
+            def room_at(x, y):
+                for name, (cx, cy, width, depth) in rooms.items():
+                    if abs(x - cx) < width / 2 and abs(y - cy) < depth / 2:
+                        return name
+                return "outside"
+
+            links = []
+            for door, _ in doors_of(scene):
+                step = (0, 0.3) if door.dims[0] > door.dims[1] else (0.3, 0)
+                x, y = door.location[:2]
+                links.append({room_at(x - step[0], y - step[1]), room_at(x + step[0], y + step[1])})
+            # Doors join the rooms on their two sides; spread out from outside until nothing changes.
+            reached = {"outside"}
+            while True:
+                grown = reached.union(*(link for link in links if link & reached))
+                if grown == reached:
+                    break
+                reached = grown
+            self.assertEqual(reached, set(rooms) | {"outside"}, f"unreachable rooms in {args}")
+
+    def test_one_door_per_cut(self):
+        for args, scene in layouts(range(3)):
+            room_doors = [part for part, _ in doors_of(scene) if part.name != "Front Door"]
+            self.assertEqual(len(room_doors) + scene.info["crowded_cuts"], scene.info["num_rooms"] - 1, args)
+
+    def test_upper_storeys_have_no_front_door(self):
+        scene = generate_layout(10, 8, 3, 9000, 0, entrance=False)
+        self.assertFalse([part for part, _ in doors_of(scene) if part.name == "Front Door"])
@@ -0,0 +1,61 @@
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase
+
+from blender_scripts.scene.gltf import write_glb
+from blender_scripts.scene.ir import BOX, CYLINDER, TORUS
+from blender_scripts.scene.layout import generate_layout
+from blender_scripts.scene.lod import FULL, LOW, LOW_CYLINDER_SEGMENTS, LOW_TORUS_SEGMENTS, PROXY, with_lod
+
+from api.model_cache import cache_key
+
+
+class LevelOfDetailTests(SimpleTestCase):
+    def setUp(self):
+        self.scene = generate_layout(10, 8, 3, 9000, 0)
+
+    def test_full_is_the_scene_as_laid_out(self):
+        self.assertIs(with_lod(self.scene, FULL), self.scene)
+
+    def test_only_instanced_curved_parts_change(self):
+        for level in (LOW, PROXY):
+            reduced = with_lod(self.scene, level)
+            self.assertEqual(len(reduced.parts), len(self.scene.parts))
+            self.assertEqual(reduced.info["lod"], level)
+            for before, after in zip(self.scene.parts, reduced.parts):
+                self.assertEqual((after.name, after.location, after.rotation, after.tag),
+                                 (before.name, before.location, before.rotation, before.tag))
+                if not before.instance or before.kind not in (CYLINDER, TORUS):
+                    self.assertIs(after, before)
+                elif level == LOW:
+                    limit = LOW_CYLINDER_SEGMENTS if before.kind == CYLINDER else LOW_TORUS_SEGMENTS
+                    self.assertEqual(after.segments, min(before.segments, limit))
+                else:
+                    self.assertEqual(after.kind, BOX)
+
+    def test_proxy_boxes_enclose_the_part(self):
+        cylinders = [part for part in self.scene.parts if part.instance and part.kind == CYLINDER]
+        self.assertTrue(cylinders)
+        proxies = {part.name: part for part in with_lod(self.scene, PROXY).parts}
+        for cylinder in cylinders:
+            radius, depth = cylinder.dims
+            self.assertEqual(proxies[cylinder.name].dims, (2 * radius, 2 * radius, depth))
+
+    def test_lower_levels_are_smaller_models(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        triangles = []
+        for level in (FULL, LOW, PROXY):
+            stats = write_glb(with_lod(self.scene, level), os.path.join(directory, f"{level}.glb"))
+            triangles.append(stats["triangles"])
+        self.assertGreater(triangles[0], triangles[1])
+        self.assertGreater(triangles[1], triangles[2])
+
+    def test_each_level_is_cached_on_its_own(self):
+        params = {"width": 10, "depth": 8, "height": 3, "budget": 9000, "seed": 0, "location_size": 50}
+        keys = {cache_key(dict(params, lod=level)) for level in (FULL, LOW, PROXY)}
+        self.assertEqual(len(keys), 3)
+        with self.assertRaises(ValueError):
+            cache_key(dict(params, lod="medium"))
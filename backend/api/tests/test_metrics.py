@@ -0,0 +1,97 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from api import blender_pool, jobs, metrics
+from api.jobs import JobQueue
+from api.metrics import Histogram
+
+from .helpers import TempMediaMixin
+
+PARAMS = {"width": 10, "depth": 8, "height": 3, "budget": 9000, "seed": 0, "location_size": 50}
+
+
+class HistogramTests(SimpleTestCase):
+    def test_buckets_are_cumulative_per_label_set(self):
+        histogram = Histogram("civi_test_seconds", "Test timings.", (1, 5))
+        histogram.observe(0.5, engine="native")
+        histogram.observe(1, engine="native")
+        histogram.observe(7, engine="native")
+        histogram.observe(2, engine="blender")
+        lines = histogram.render()
+        self.assertEqual(lines[:2], ["# HELP civi_test_seconds Test timings.", "# TYPE civi_test_seconds histogram"])
+        self.assertIn('civi_test_seconds_bucket{engine="native",le="1"} 2', lines)
+        self.assertIn('civi_test_seconds_bucket{engine="native",le="5"} 2', lines)
+        self.assertIn('civi_test_seconds_bucket{engine="native",le="+Inf"} 3', lines)
+        self.assertIn('civi_test_seconds_sum{engine="native"} 8.5', lines)
+        self.assertIn('civi_test_seconds_count{engine="native"} 3', lines)
+        self.assertIn('civi_test_seconds_bucket{engine="blender",le="1"} 0', lines)
+        self.assertIn('civi_test_seconds_count{engine="blender"} 1', lines)
+
+
+class MetricsTests(TempMediaMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        # Fresh series for every test: the module's own are shared by the whole process.
+        for name in ("_generation_seconds", "_stage_seconds", "_objects", "_triangles"):
+            original = getattr(metrics, name)
+            patcher = mock.patch.object(metrics, name, Histogram(original.name, original.help, original.buckets))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        failures = mock.patch.object(metrics, "_failures", {})
+        failures.start()
+        self.addCleanup(failures.stop)
+        # Neither the job queue nor the Blender pool has started in this process.
+        for patcher in (mock.patch.object(jobs, "_queue", None), mock.patch.object(blender_pool, "_pool", None)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_generations_and_failures(self):
+        stats = {"stages": {"layout": 0.02, "export": 0.3}, "counts": {"objects": 40, "triangles": 20000}}
+        metrics.observe_generation("native", 0.4, stats)
+        metrics.observe_generation("blender", 3.0, {})
+        metrics.observe_failure("blender")
+        lines = metrics.render().splitlines()
+        self.assertIn('civi_generation_seconds_count{engine="native"} 1', lines)
+        self.assertIn('civi_generation_seconds_count{engine="blender"} 1', lines)
+        self.assertIn('civi_generation_stage_seconds_bucket{engine="native",stage="layout",le="0.025"} 1', lines)
+        self.assertIn('civi_generation_stage_seconds_sum{engine="native",stage="export"} 0.3', lines)
+        self.assertIn('civi_model_objects_bucket{engine="native",le="50"} 1', lines)
+        self.assertIn('civi_model_triangles_bucket{engine="native",le="10000"} 0', lines)
+        self.assertIn('civi_model_triangles_bucket{engine="native",le="25000"} 1', lines)
+        # No counts were reported for the Blender run, so it adds no object or triangle series.
+        self.assertNotIn('civi_model_objects_count{engine="blender"} 1', lines)
+        self.assertIn('civi_generation_failures_total{engine="blender"} 1', lines)
+
+    def test_cache_lookups(self):
+        self.add_model("a")
+        self.cache.get("a")
+        self.cache.get("a")
+        self.cache.get("b")
+        lines = metrics.render().splitlines()
+        self.assertIn("civi_cache_hits_total 2", lines)
+        self.assertIn("civi_cache_misses_total 1", lines)
+        self.assertIn(f"civi_cache_hit_ratio {2 / 3}", lines)
+
+    def test_queue_and_pool_before_and_after_they_start(self):
+        lines = metrics.render().splitlines()
+        self.assertIn("civi_cache_hit_ratio 0", lines)
+        self.assertIn("civi_generation_queue_depth 0", lines)
+        self.assertIn("civi_blender_workers_idle 0", lines)
+
+        job_queue = JobQueue(max_queued=10, num_workers=0, max_finished=10)
+        pool = mock.Mock(**{"live_idle.return_value": 2})
+        with mock.patch.object(jobs, "record_request"):
+            job_queue.submit(PARAMS)
+            job_queue.submit(dict(PARAMS, seed=1))
+        with mock.patch.object(jobs, "_queue", job_queue), mock.patch.object(blender_pool, "_pool", pool):
+            lines = metrics.render().splitlines()
+        self.assertIn("civi_generation_queue_depth 2", lines)
+        self.assertIn("civi_blender_workers_idle 2", lines)
+
+    def test_endpoint(self):
+        metrics.observe_failure("native")
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], metrics.CONTENT_TYPE)
+        self.assertIn('civi_generation_failures_total{engine="native"} 1', response.content.decode())
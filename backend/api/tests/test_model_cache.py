@@ -0,0 +1,87 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from api.model_cache import ModelCache, cache_key, normalize_params
+
+PARAMS = {"width": 10, "depth": 8, "height": 3, "budget": 9000, "seed": 0, "location_size": 50}
+
+
+class ParameterTests(SimpleTestCase):
+    def test_rejects_non_finite_non_positive_and_oversized_values(self):
+        for name, value in (("width", "nan"), ("width", "inf"), ("depth", -1), ("height", 0), ("width", 1e5),
+                            ("budget", "-inf"), ("location_size", "nan")):
+            with self.subTest(name=name, value=value), self.assertRaises(ValueError):
+                normalize_params(dict(PARAMS, **{name: value}))
+
+    def test_rejects_fractional_and_out_of_range_counts(self):
+        for name, value in (("storeys", 2.9), ("storeys", "1.5"), ("buildings", 0), ("buildings", "nan"),
+                            ("storeys", 10 ** 6)):
+            with self.subTest(name=name, value=value), self.assertRaises(ValueError):
+                normalize_params(dict(PARAMS, **{name: value}))
+        self.assertEqual(normalize_params(dict(PARAMS, storeys="2", buildings=3.0))["storeys"], 2)
+
+    def test_budgets_in_one_tier_share_a_key(self):
+        self.assertEqual(cache_key(dict(PARAMS, budget=8500)), cache_key(dict(PARAMS, budget=9000)))
+        self.assertNotEqual(cache_key(dict(PARAMS, budget=600)), cache_key(dict(PARAMS, budget=9000)))
+        self.assertNotEqual(cache_key(PARAMS), cache_key(dict(PARAMS, seed=1)))
+
+    def test_lot_size_only_matters_for_sites(self):
+        self.assertEqual(cache_key(PARAMS), cache_key(dict(PARAMS, location_size=80)))
+        site = dict(PARAMS, buildings=2)
+        self.assertNotEqual(cache_key(site), cache_key(dict(site, location_size=80)))
+
+
+class ModelCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.cache = ModelCache(self.root, max_bytes=10, max_entries=2)
+
+    def test_one_generation_at_a_time_per_key_and_no_lock_left_behind(self):
+        inside, most = [0], [0]
+        lock = threading.Lock()
+
+        def generate():
+            with self.cache.lock_for("key"):
+                with lock:
+                    inside[0] += 1
+                    most[0] = max(most[0], inside[0])
+                time.sleep(0.01)
+                with lock:
+                    inside[0] -= 1
+
+        threads = [threading.Thread(target=generate) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(most[0], 1)
+        self.assertEqual(self.cache._key_locks, {})
+
+    def test_a_missing_file_is_a_miss(self):
+        self.assertIsNone(self.cache.get("absent"))
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 1))
+
+    def test_a_file_evicted_during_lookup_is_a_miss(self):
+        open(self.cache.path_for("gone"), "wb").close()
+        with self._vanishing_utime():
+            self.assertIsNone(self.cache.get("gone"))
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 1))
+
+    def test_evicts_least_recently_used_first(self):
+        for age, key in enumerate(("old", "new", "newest")):
+            with open(self.cache.path_for(key), "wb") as f:
+                f.write(b"1234")
+            os.utime(self.cache.path_for(key), (1000 + age, 1000 + age))
+        self.assertEqual(self.cache.evict(), 1)
+        self.assertEqual(sorted(os.listdir(self.root)), ["new.glb", "newest.glb"])
+
+    @staticmethod
+    def _vanishing_utime():
+        return mock.patch("api.model_cache.os.utime", side_effect=FileNotFoundError)
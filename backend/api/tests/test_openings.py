@@ -0,0 +1,79 @@
+import itertools
+import random
+
+from django.test import SimpleTestCase
+
+from blender_scripts.scene.layout import WINDOWS_PER_WALL, generate_layout
+from blender_scripts.scene.openings import NoRoomForOpenings, free_intervals, place_openings, wall_segments
+from blender_scripts.scene.walls import Wall
+
+
+def overlap(a, b):
+    """Whether the (u0, u1, z0, z1) rectangles share some area."""
+    return min(a[1], b[1]) - max(a[0], b[0]) > 1e-6 and min(a[3], b[3]) - max(a[2], b[2]) > 1e-6
+
+
+class WallSegmentTests(SimpleTestCase):
+    def test_segments_stay_inside_the_wall_and_out_of_the_openings(self):
+        rng = random.Random(5)
+        for _ in range(200):
+            length, height = rng.uniform(1, 12), rng.uniform(2, 4)
+            openings = []
+            for _ in range(rng.randint(0, 6)):
+                u, z = rng.uniform(-1, length + 1), rng.uniform(-1, height)
+                openings.append((u, u + rng.uniform(0.2, 2), z, z + rng.uniform(0.2, 2)))
+            segments = wall_segments(length, height, openings)
+
+            for segment in segments:
+                u0, u1, z0, z1 = segment
+                self.assertTrue(-1e-9 <= u0 < u1 <= length + 1e-9)
+                self.assertTrue(-1e-9 <= z0 < z1 <= height + 1e-9)
+                self.assertFalse(any(overlap(segment, opening) for opening in openings))
+            for a, b in itertools.combinations(segments, 2):
+                self.assertFalse(overlap(a, b))
+
+            # Segments and the openings' parts inside the wall add up to the whole wall.
+            clipped = [(max(o[0], 0), min(o[1], length), max(o[2], 0), min(o[3], height)) for o in openings]
+            clipped = [o for o in clipped if o[1] > o[0] and o[3] > o[2]]
+            holes = sum((u1 - u0) * (z1 - z0) for u0, u1, z0, z1 in clipped)
+            solid = sum((u1 - u0) * (z1 - z0) for u0, u1, z0, z1 in segments)
+            self.assertLessEqual(solid, length * height + 1e-6)
+            self.assertGreaterEqual(solid + holes, length * height - 1e-6)
+
+    def test_no_openings_leave_one_segment(self):
+        self.assertEqual(wall_segments(4, 3, []), [(0, 4, 0, 3)])
+
+
+class WallTests(SimpleTestCase):
+    def test_an_opening_cuts_only_the_walls_it_goes_through(self):
+        wall = Wall("Wall", (0, 0, 1.5), (6, 0.2, 3))
+        self.assertTrue(wall.cut((-0.45, -0.1, 0, 0.45, 0.1, 2)))
+        self.assertFalse(wall.cut((-0.45, 0.2, 0, 0.45, 0.4, 2)))
+        # Left of the door, right of it and above it.
+        self.assertEqual(len(wall.segment_boxes()), 3)
+
+
+class PlaceOpeningsTests(SimpleTestCase):
+    def test_openings_keep_their_gaps_inside_the_free_intervals(self):
+        free = free_intervals(0, 20, [(4, 5), (11, 12)], gap=0.5)
+        for seed in range(20):
+            centres = place_openings(free, 4, 1.5, 0.5, random.Random(seed))
+            self.assertEqual(len(centres), 4)
+            for centre in centres:
+                self.assertTrue(any(a - 1e-9 <= centre - 0.75 and centre + 0.75 <= b + 1e-9 for a, b in free))
+            for a, b in itertools.combinations(sorted(centres), 2):
+                self.assertGreaterEqual(b - a, 1.5 + 0.5 - 1e-9)
+
+    def test_refuses_more_openings_than_fit(self):
+        with self.assertRaises(NoRoomForOpenings):
+            place_openings([(0, 3)], 2, 1.5, 0.5)
+
+    def test_windows_that_do_not_fit_are_reported(self):
+        scene = generate_layout(2, 2, 3, 500, 0)
+        missing = scene.info["missing_windows"]
+        self.assertTrue(missing)
+        for wall, count in missing.items():
+            placed = sum(1 for part in scene.parts if part.name == f"{wall} Window_Glass")
+            self.assertGreater(count, 0)
+            self.assertLessEqual(placed + count, WINDOWS_PER_WALL)
+        self.assertEqual(generate_layout(20, 16, 3, 500, 0).info["missing_windows"], {})
@@ -0,0 +1,69 @@
+import gzip
+
+from django.test import SimpleTestCase
+
+from api.serving import etag_matches, parse_range, precompress
+
+from .helpers import TempMediaMixin
+
+KEY = "0123456789abcdef" * 2
+URL = f"/media/models/cache/{KEY}.glb"
+
+
+class RangeTests(SimpleTestCase):
+    def test_parse_range(self):
+        self.assertEqual(parse_range("bytes=0-9", 100), (0, 9))
+        self.assertEqual(parse_range("bytes=90-", 100), (90, 99))
+        self.assertEqual(parse_range("bytes=-10", 100), (90, 99))
+        self.assertEqual(parse_range("bytes=50-500", 100), (50, 99))
+        self.assertIs(parse_range("bytes=100-", 100), False)
+        self.assertIs(parse_range("bytes=-0", 100), False)
+        self.assertIsNone(parse_range("bytes=0-1,5-6", 100))
+        self.assertIsNone(parse_range("items=0-1", 100))
+
+    def test_etag_matches(self):
+        self.assertTrue(etag_matches('"a", W/"b"', '"b"'))
+        self.assertTrue(etag_matches("*", '"b"'))
+        self.assertFalse(etag_matches('"a"', '"b"'))
+
+
+class ServeModelTests(TempMediaMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.add_model(KEY, bytes(range(100)))
+
+    def test_full_body_is_immutable(self):
+        response = self.client.get(URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), bytes(range(100)))
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+
+    def test_range_revalidation_and_unsatisfiable_range(self):
+        etag = self.client.get(URL)["ETag"]
+
+        partial = self.client.get(URL, HTTP_RANGE="bytes=10-19")
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial.content, bytes(range(10, 20)))
+        self.assertEqual(partial["Content-Range"], "bytes 10-19/100")
+
+        self.assertEqual(self.client.get(URL, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # A range for another version of the file gets the whole current one.
+        self.assertEqual(self.client.get(URL, HTTP_RANGE="bytes=10-19", HTTP_IF_RANGE='"stale"').status_code, 200)
+
+        unsatisfiable = self.client.get(URL, HTTP_RANGE="bytes=200-")
+        self.assertEqual(unsatisfiable.status_code, 416)
+        self.assertEqual(unsatisfiable["Content-Range"], "bytes */100")
+
+    def test_precompressed_copy_for_clients_that_accept_it(self):
+        precompress(self.cache.path_for(KEY))
+        response = self.client.get(URL, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(b"".join(response.streaming_content)), bytes(range(100)))
+        self.assertNotEqual(response["ETag"], self.client.get(URL)["ETag"])
+        self.assertNotIn("Content-Encoding", self.client.get(URL, HTTP_ACCEPT_ENCODING="identity"))
+
+    def test_unknown_and_malformed_names_are_not_found(self):
+        self.assertEqual(self.client.get(f"/media/models/cache/{'f' * 32}.glb").status_code, 404)
+        self.assertEqual(self.client.get("/media/models/cache/..%2Fdb.sqlite3").status_code, 404)
+        self.assertEqual(self.client.post(URL).status_code, 405)
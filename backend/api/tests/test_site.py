@@ -0,0 +1,130 @@
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from blender_scripts.scene import native
+from blender_scripts.scene.gltf import write_glb
+from blender_scripts.scene.layout import generate_layout
+
+from api.blender_pool import WorkerError
+from api.generation import job_params
+from api.glb_merge import merge_glbs
+from api.glb_report import read_glb
+from api.model_cache import cache_key, normalize_params
+from api.site import BUILDING_GAP, build_site, plan_site
+from api.storage import TEMP_DIR
+
+from .helpers import TempMediaMixin
+
+SITE = {"width": 10, "length": 8, "height": 3, "budget": 9000, "seed": 0, "engine": "native", "buildings": 2,
+        "storeys": 3}
+real_generate = native.generate
+
+
+def failing_for(seed):
+    """A native.generate that fails with a full disk for the part with `seed`."""
+    def generate(params):
+        if params["seed"] == seed:
+            raise OSError(28, "No space left on device")
+        return real_generate(params)
+    return generate
+
+
+class PlanSiteTests(SimpleTestCase):
+    def test_upper_storeys_share_one_part_per_building(self):
+        params = {"width": 10, "depth": 8, "height": 3, "budget": 9000, "seed": 0, "storeys": 3, "buildings": 4,
+                  "location_size": 0.1}
+        parts = plan_site(dict(normalize_params(params), location_size=0.1))
+        self.assertEqual(len(parts), 12)
+        self.assertEqual(len({part["key"] for part in parts}), 8)
+        # The lot is far too small, so buildings are packed BUILDING_GAP apart instead.
+        ground = sorted({part["offset"][:2] for part in parts})
+        self.assertAlmostEqual(ground[2][0] - ground[0][0], 10 + BUILDING_GAP)
+        self.assertEqual([part["offset"][2] for part in parts[:3]], [0, 3.3, 6.6])
+
+
+class MergeTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def write(self, name, seed):
+        path = os.path.join(self.directory, name)
+        write_glb(generate_layout(8, 6, 3, 9000, seed), path)
+        return path
+
+    def test_merge_places_parts_and_shares_materials(self):
+        first, second = self.write("first.glb", 0), self.write("second.glb", 1)
+        output = os.path.join(self.directory, "site.glb")
+        counts = merge_glbs([(first, "A", (0, 0, 0)), (second, "B", (20, 0, 0)), (second, "C", (0, 10, 3))], output)
+
+        gltf, binary, _ = read_glb(output)
+        parts = {node["name"]: node for node in gltf["nodes"] if node.get("name") in ("A", "B", "C")}
+        self.assertNotIn("translation", parts["A"])
+        self.assertEqual(parts["B"]["translation"], [20.0, 0.0, -0.0])
+        # Blender's Z-up (0, 10, 3) is glTF's Y-up (0, 3, -10).
+        self.assertEqual(parts["C"]["translation"], [0.0, 3.0, -10.0])
+        self.assertEqual(len(gltf["scenes"][0]["nodes"]), 3)
+
+        first_gltf, second_gltf = read_glb(first)[0], read_glb(second)[0]
+        # The second file is read once, and identical materials are stored once.
+        self.assertEqual(len(gltf["meshes"]), len(first_gltf["meshes"]) + len(second_gltf["meshes"]))
+        distinct = {json.dumps(material, sort_keys=True)
+                    for material in first_gltf["materials"] + second_gltf["materials"]}
+        self.assertEqual(len(gltf["materials"]), len(distinct))
+        self.assertEqual(counts["materials"], len(gltf["materials"]))
+        for view in gltf["bufferViews"]:
+            self.assertLessEqual(view.get("byteOffset", 0) + view["byteLength"], len(binary))
+
+
+@override_settings(SITE_WORKERS=1)
+class SiteTests(TempMediaMixin, TestCase):
+    def test_native_generation_reports_instead_of_printing(self):
+        params = dict(SITE, depth=2, width=2, location_size=50, storeys=1, buildings=1)
+        job = job_params(params, os.path.join(self.media, "house.glb"))
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            stats = native.generate(job)
+        self.assertEqual(output.getvalue(), "")
+        self.assertTrue(stats["missing_windows"])
+
+    def test_site_report_has_a_timing_per_part(self):
+        response = self.client.get("/api/generate-model/", dict(SITE, report=1))
+        self.assertEqual(response.status_code, 200)
+        report = response.json()["report"]["site"]
+        self.assertEqual(len(report["parts"]), 6)
+        self.assertEqual(report["generated"], 4)
+        self.assertTrue(all(part["seconds"] >= 0 for part in report["parts"]))
+
+    def test_a_failed_part_is_a_worker_error_naming_it(self):
+        params = dict(SITE, depth=8, location_size=50)
+        with mock.patch.object(native, "generate", failing_for(7919)):
+            with self.assertRaisesRegex(WorkerError, "Building 2 Storey 1"):
+                build_site(cache_key(params), params)
+        self.assertEqual(os.listdir(os.path.join(self.media, TEMP_DIR)), [])
+        self.assertFalse(os.path.exists(self.cache.path_for(cache_key(params))))
+
+    def test_views_answer_a_failed_part_with_a_json_error(self):
+        with mock.patch.object(native, "generate", failing_for(0)):
+            response = self.client.get("/api/generate-model/", SITE)
+        self.assertEqual(response.status_code, 500)
+        self.assertIn("No space left on device", response.json()["error"])
+
+    def test_a_failed_native_variant_does_not_fail_the_batch(self):
+        variants = [dict(SITE, storeys=1, buildings=1, seed=seed) for seed in (0, 1)]
+        with mock.patch.object(native, "generate", failing_for(1)):
+            response = self.client.post("/api/generate-model/batch/", {"variants": variants},
+                                        content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        built, failed = response.json()["models"]
+        self.assertIsNotNone(built["model_url"])
+        self.assertIsNone(built["error"])
+        self.assertIsNone(failed["model_url"])
+        self.assertIn("No space left on device", failed["error"])
+        self.assertFalse(os.path.exists(self.cache.path_for(cache_key(dict(variants[1], depth=8)))))
@@ -0,0 +1,33 @@
+import random
+
+from django.test import SimpleTestCase
+
+from blender_scripts.scene.spatial import GridIndex
+
+
+class GridIndexTests(SimpleTestCase):
+    def test_query_matches_a_full_scan_in_insertion_order(self):
+        rng = random.Random(9)
+        index = GridIndex(cell_size=2.0)
+        boxes = []
+        for name in range(300):
+            x, y, z = rng.uniform(-30, 30), rng.uniform(-30, 30), rng.uniform(0, 3)
+            box = (x, y, z, x + rng.uniform(0.1, 8), y + rng.uniform(0.1, 8), z + 1)
+            boxes.append((f"item {name}", box))
+            index.insert(boxes[-1][0], box)
+        index.remove(boxes.pop(0)[0])
+
+        for _ in range(100):
+            x, y = rng.uniform(-30, 30), rng.uniform(-30, 30)
+            query = (x, y, 0, x + rng.uniform(0, 5), y + rng.uniform(0, 5), 3)
+            expected = [item for item, box in boxes
+                        if all(query[k] <= box[k + 3] and box[k] <= query[k + 3] for k in range(3))]
+            self.assertEqual(index.query(query), expected)
+
+    def test_reinserting_an_item_moves_it(self):
+        index = GridIndex()
+        item = object()
+        index.insert(item, (0, 0, 0, 1, 1, 1))
+        index.insert(item, (10, 10, 0, 11, 11, 1))
+        self.assertEqual(index.query((0, 0, 0, 1, 1, 1)), [])
+        self.assertEqual(index.query((10, 10, 0, 11, 11, 1)), [item])
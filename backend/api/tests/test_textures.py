@@ -0,0 +1,68 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+from PIL import Image
+
+from blender_scripts.scene.ir import SHELL
+from blender_scripts.scene.layout import FLOOR_TEXTURE, generate_layout
+
+from api.chunks import chunk_key
+from api.model_cache import cache_key, normalize_params
+from api.textures import prepare_texture, prepare_textures, variant_size
+
+from .helpers import TempMediaMixin
+
+PARAMS = {"width": 10, "depth": 8, "height": 3, "budget": 9000, "seed": 0, "location_size": 50}
+
+
+class TextureTests(TempMediaMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.sources = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.sources)
+        sources = override_settings(TEXTURE_DIR=self.sources)
+        sources.enable()
+        self.addCleanup(sources.disable)
+        self.write_source("red", 1)
+
+    def write_source(self, color, version):
+        path = os.path.join(self.sources, FLOOR_TEXTURE)
+        Image.new("RGB", (1000, 700), color).save(path, "JPEG")
+        # Hashes are reused while a source's mtime and size stay the same.
+        os.utime(path, ns=(version, version))
+
+    def test_sides_become_powers_of_two_within_the_limit(self):
+        self.assertEqual(variant_size(1000, 700, 1024), (1024, 512))
+        self.assertEqual(variant_size(4000, 3000, 1024), (1024, 1024))
+        self.assertEqual(variant_size(1, 3, 1024), (1, 4))
+
+    def test_variants_are_encoded_once(self):
+        for texture_format, image_format in (("jpeg", "JPEG"), ("webp", "WEBP")):
+            with self.subTest(texture_format):
+                path = prepare_texture(FLOOR_TEXTURE, texture_format)
+                with Image.open(path) as image:
+                    self.assertEqual((image.format, image.size), (image_format, (1024, 512)))
+                with mock.patch("api.textures.Image.open", side_effect=AssertionError("encoded again")):
+                    self.assertEqual(prepare_texture(FLOOR_TEXTURE, texture_format), path)
+
+    def test_missing_sources_are_left_out(self):
+        self.assertIsNone(prepare_texture("missing.png"))
+        self.assertEqual(list(prepare_textures(["missing.png", FLOOR_TEXTURE])), [FLOOR_TEXTURE])
+
+    def test_keys_change_with_the_texture_source(self):
+        scene = generate_layout(10, 8, 3, 9000, 0).subset(SHELL)
+        params = normalize_params(PARAMS)
+        before = cache_key(PARAMS), chunk_key(scene, params), prepare_texture(FLOOR_TEXTURE)
+        self.write_source("blue", 2)
+        after = cache_key(PARAMS), chunk_key(scene, params), prepare_texture(FLOOR_TEXTURE)
+        for old, new in zip(before, after):
+            self.assertNotEqual(old, new)
+
+    def test_keys_change_with_the_encoding_settings(self):
+        before = cache_key(PARAMS)
+        with self.settings(TEXTURE_MAX_SIZE=512):
+            self.assertNotEqual(cache_key(PARAMS), before)
+        self.assertNotEqual(cache_key(dict(PARAMS, texture_format="webp")), before)
@@ -0,0 +1,166 @@
+import io
+import os
+from datetime import timedelta
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from api import warming
+from api.blender_pool import WorkerError
+from api.management.commands import warm_model_cache
+from api.model_cache import cache_key
+from api.models import ModelRequestStat
+from api.warming import record_request, top_configurations, warm, warm_report
+
+from .helpers import TempMediaMixin
+
+PARAMS = {"width": 10, "depth": 8, "height": 3, "budget": 9000, "seed": 0, "location_size": 50, "engine": "native"}
+
+
+def configuration(seed):
+    params = dict(PARAMS, seed=seed)
+    return cache_key(params), params
+
+
+class RecordRequestTests(TempMediaMixin, TestCase):
+    def test_counts_requests_and_hits_per_key(self):
+        key, params = configuration(0)
+        record_request(key, params, hit=False)
+        record_request(key, params, hit=True)
+        record_request(key, params, hit=True)
+        stat = ModelRequestStat.objects.get(key=key)
+        self.assertEqual((stat.requests, stat.hits), (3, 2))
+        # Not warmed, so none of them count towards the warm hit rate.
+        self.assertEqual((stat.warm_requests, stat.warm_hits), (0, 0))
+        self.assertEqual(stat.params["seed"], 0)
+        self.assertNotIn("chunk", stat.params)
+
+    def test_warmed_configurations_count_warm_requests(self):
+        key, params = configuration(0)
+        record_request(key, params, hit=False)
+        ModelRequestStat.objects.filter(key=key).update(warmed_at=timezone.now())
+        record_request(key, params, hit=True)
+        record_request(key, params, hit=False)
+        stat = ModelRequestStat.objects.get(key=key)
+        self.assertEqual((stat.warm_requests, stat.warm_hits), (2, 1))
+
+    def test_chunks_are_stored_with_their_params(self):
+        params = dict(PARAMS, chunk="shell")
+        record_request(cache_key(params), params, hit=False)
+        self.assertEqual(ModelRequestStat.objects.get().params["chunk"], "shell")
+
+
+class WarmTests(TempMediaMixin, TestCase):
+    def request(self, seed, times, days_ago=0):
+        key, params = configuration(seed)
+        for _ in range(times):
+            record_request(key, params, hit=False)
+        if days_ago:
+            ModelRequestStat.objects.filter(key=key).update(
+                last_requested=timezone.now() - timedelta(days=days_ago))
+        return key
+
+    def test_top_configurations_are_the_most_requested_in_the_window(self):
+        popular = self.request(0, 3)
+        other = self.request(1, 1)
+        self.request(2, 5, days_ago=10)
+        self.assertEqual([stat.key for stat in top_configurations(5, days=7)], [popular, other])
+        self.assertEqual([stat.key for stat in top_configurations(1, days=7)], [popular])
+
+    def test_builds_the_uncached_top_configurations(self):
+        built = self.request(0, 3)
+        cached = self.request(1, 2)
+        self.add_model(cached)
+        result = warm(5, cpu_seconds=600, days=7)
+        self.assertEqual((result["built"], result["cached"], result["failed"], result["skipped"]), (1, 1, 0, 0))
+        self.assertTrue(os.path.exists(self.cache.path_for(built)))
+        self.assertEqual(ModelRequestStat.objects.filter(warmed_at__isnull=False).count(), 2)
+
+    def test_stops_building_once_the_budget_is_spent(self):
+        self.request(0, 3)
+        self.request(1, 2)
+        with mock.patch.object(warming, "build_model", return_value=None) as build_model:
+            result = warm(5, cpu_seconds=0, days=7)
+        build_model.assert_not_called()
+        self.assertEqual(result["skipped"], 2)
+
+    def test_failures_are_logged_and_counted(self):
+        key = self.request(0, 1)
+        log = mock.Mock()
+        with mock.patch.object(warming, "build_model", side_effect=WorkerError("crashed")):
+            result = warm(5, cpu_seconds=600, days=7, log=log)
+        self.assertEqual(result["failed"], 1)
+        self.assertIn(key, log.call_args[0][0])
+        self.assertFalse(ModelRequestStat.objects.filter(warmed_at__isnull=False).exists())
+
+    def test_report(self):
+        warmed = self.request(0, 3)
+        self.request(1, 1)
+        self.add_model(warmed)
+        warm(5, cpu_seconds=600, days=7)
+        self.add_model(configuration(1)[0])
+        key, params = configuration(0)
+        record_request(key, params, hit=True)
+        record_request(key, params, hit=False)
+
+        report = warm_report(1, days=7)
+        self.assertEqual((report["warm_requests"], report["warm_hits"]), (2, 1))
+        self.assertEqual((report["top_count"], report["top_cached"]), (1, 1))
+        self.assertAlmostEqual(report["coverage"], 5 / 6)
+
+
+class StopLoop(Exception):
+    pass
+
+
+class CommandTests(TempMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        key, params = configuration(0)
+        record_request(key, params, hit=False)
+        self.key = key
+
+    def run_command(self, *args):
+        stdout = io.StringIO()
+        try:
+            call_command("warm_model_cache", *args, stdout=stdout, stderr=io.StringIO())
+        except StopLoop:
+            pass
+        return stdout.getvalue()
+
+    def stop_after_one_round(self):
+        # Only the command's clock: the sweeper thread sleeps too.
+        clock = mock.patch.object(warm_model_cache, "time")
+        clock.start().sleep.side_effect = StopLoop
+        self.addCleanup(clock.stop)
+
+    def test_warms_at_lower_priority(self):
+        with mock.patch.object(os, "nice") as nice:
+            output = self.run_command()
+        nice.assert_called_once_with(10)
+        self.assertIn("Warmed 1 models", output)
+        self.assertTrue(os.path.exists(self.cache.path_for(self.key)))
+
+    def test_report_only_builds_nothing(self):
+        output = self.run_command("--report")
+        self.assertIn("Warm hit rate", output)
+        self.assertFalse(os.path.exists(self.cache.path_for(self.key)))
+
+    def test_waits_while_the_machine_is_busy(self):
+        self.stop_after_one_round()
+        with mock.patch.object(os, "nice"), mock.patch.object(os, "getloadavg", return_value=(1000.0, 0, 0)):
+            output = self.run_command("--every", "60")
+        self.assertIn("Machine busy", output)
+        self.assertFalse(os.path.exists(self.cache.path_for(self.key)))
+
+    def test_runs_without_nice_or_load_average(self):
+        # As on Windows: both are left out and every round counts as idle.
+        self.stop_after_one_round()
+        with mock.patch.dict(os.__dict__):
+            os.__dict__.pop("nice", None)
+            os.__dict__.pop("getloadavg", None)
+            output = self.run_command("--every", "60")
+        self.assertIn("Warmed 1 models", output)
+        self.assertTrue(hasattr(os, "getloadavg"))
@@ -0,0 +1,105 @@
+import hashlib
+import os
+import threading
+
+from django.conf import settings
+from PIL import Image
+
+from .storage import discard, temp_output_path
+
+VARIANT_DIR = "textures"
+
+EXTENSIONS = {"jpeg": ".jpg", "webp": ".webp"}
+
+_hashes = {}
+_lock = threading.Lock()
+
+
+def power_of_two(n):
+    # Nearest power of two: 1000 -> 1024, 700 -> 512.
+    lower = 1 << max(n.bit_length() - 1, 0)
+    return lower * 2 if n >= lower * 1.5 else lower
+
+
+def variant_size(width, height, max_size):
+    return tuple(min(power_of_two(side), max_size) for side in (width, height))
+
+
+def source_hash(path):
+    # Hashing the image on every request would cost about as much as re-encoding it.
+    stat = os.stat(path)
+    with _lock:
+        cached = _hashes.get(path)
+        if cached and cached[0] == (stat.st_mtime_ns, stat.st_size):
+            return cached[1]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    digest = digest.hexdigest()[:16]
+    with _lock:
+        _hashes[path] = ((stat.st_mtime_ns, stat.st_size), digest)
+    return digest
+
+
+def source_hashes(names):
+    """{name: hash of its source in TEXTURE_DIR, or None if it is missing}, for keying what embeds them."""
+    hashes = {}
+    for name in names:
+        source = os.path.join(settings.TEXTURE_DIR, name)
+        hashes[name] = source_hash(source) if os.path.exists(source) else None
+    return hashes
+
+
+def variant_settings(texture_format):
+    return {"format": texture_format, "max_size": settings.TEXTURE_MAX_SIZE,
+            "quality": settings.TEXTURE_QUALITY[texture_format]}
+
+
+def prepare_texture(name, texture_format="jpeg"):
+    """Path of `name` (a file in TEXTURE_DIR) resized and re-encoded for embedding, or None if it is missing.
+
+    Variants are kept in media/textures under the source's hash and the
+    encoding settings, so each is only ever encoded once.
+    """
+    source = os.path.join(settings.TEXTURE_DIR, name)
+    if not os.path.exists(source):
+        return None
+
+    options = variant_settings(texture_format)
+    stem = os.path.splitext(os.path.basename(name))[0]
+    filename = f"{stem}-{source_hash(source)}-{options['max_size']}-q{options['quality']}{EXTENSIONS[texture_format]}"
+    path = os.path.join(settings.MEDIA_ROOT, VARIANT_DIR, filename)
+    if os.path.exists(path):
+        return path
+
+    with Image.open(source) as image:
+        image = image.convert("RGB")
+        size = variant_size(image.width, image.height, options["max_size"])
+        if size != image.size:
+            image = image.resize(size, Image.Resampling.LANCZOS)
+
+        temp_path = temp_output_path(EXTENSIONS[texture_format])
+        try:
+            if texture_format == "webp":
+                image.save(temp_path, "WEBP", quality=options["quality"], method=6)
+            else:
+                image.save(temp_path, "JPEG", quality=options["quality"], optimize=True, progressive=True)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temp_path, path)
+        finally:
+            discard(temp_path)
+
+    print(f"Encoded texture variant {filename} ({os.path.getsize(source)} -> {os.path.getsize(path)} bytes)")
+    return path
+
+
+def prepare_textures(names, texture_format="jpeg"):
+    """{name: variant path} for each of `names` that exists."""
+    variants = {}
+    for name in names:
+        path = prepare_texture(name, texture_format)
+        if path:
+            variants[name] = path
+    return variants
@@ -1,7 +1,12 @@
 from django.urls import path
-from .views import get_projects, create_project
+from .views import get_projects, create_project, generate_model_batch, generate_model_chunks, submit_generation_job, generation_job_status, generation_job_events
 
 urlpatterns = [
     path('projects/', get_projects, name="get_projects"),
     path('projects/create/', create_project, name="create_project"),
+    path('generate-model/batch/', generate_model_batch, name="generate_model_batch"),
+    path('generate-model/chunks/', generate_model_chunks, name="generate_model_chunks"),
+    path('generate-model/jobs/', submit_generation_job, name="submit_generation_job"),
+    path('generate-model/jobs/<uuid:job_id>/', generation_job_status, name="generation_job_status"),
+    path('generate-model/jobs/<uuid:job_id>/events/', generation_job_events, name="generation_job_events"),
 ]
@@ -3,11 +3,20 @@ from rest_framework.decorators import api_view
 from rest_framework import status
 from .models import Project
 from .serializers import ProjectSerializer
+from .blender_pool import WorkerError
+from .chunks import build_chunks
+from .generation import build_model, build_models, is_site, params_from_query
+from .glb_report import glb_report
+from .jobs import DONE, QueueFull, get_queue
+from .model_cache import cache_key, get_cache
+from .site import get_report as site_report
+from .warming import is_cached, record_request
 
+import json
 import subprocess
-import os
-from django.http import JsonResponse
 from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.urls import reverse
 
 @api_view(['GET'])
 def get_projects(request):
@@ -23,44 +32,154 @@ def create_project(request):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-MODEL_OUTPUT_DIR = os.path.join(settings.MEDIA_ROOT, "models")
-
 def generate_3d_model(request):
-    width = request.GET.get("width", 5)
-    length = request.GET.get("length", 5)
-    height = request.GET.get("height", 3)
-    location_size = request.GET.get("location_size", 50)  
-    budget = request.GET.get("budget", 5000) 
+    params = params_from_query(request.GET)
+
+    try:
+        key = cache_key(params)
+    except ValueError as e:
+        return JsonResponse({"error": f"Invalid parameters: {str(e)}"}, status=400)
+
+    record_request(key, params, hit=is_cached(key))
+    try:
+        model_path = build_model(key, params)
+    except (subprocess.SubprocessError, WorkerError) as e:
+        print("Subprocess Error:", str(e))
+        return JsonResponse({"error": f"Blender execution failed: {str(e)}"}, status=500)
 
-    script_path = os.path.abspath("blender_scripts/generate_model.py")
-    output_path = os.path.abspath(os.path.join(settings.MEDIA_ROOT, "models/room_model.glb"))
+    if model_path is None:
+        return JsonResponse({"error": f"Model not found at: {get_cache().path_for(key)}"}, status=500)
 
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    model_url = request.build_absolute_uri(get_cache().url_for(key))
+    response = {"model_url": model_url}
+    if request.GET.get("report"):
+        # Size breakdown and decode time, for comparing compress/texture_format settings.
+        response["report"] = glb_report(model_path)
+        if is_site(params):
+            # Per-part timings and the parallel speedup, if this process built the site.
+            response["report"]["site"] = site_report(key)
+    return JsonResponse(response)
 
-    command = [
-        "blender", "--background", "--python", script_path,
-        "--", str(width), str(length), str(height), str(location_size), str(budget), output_path
-    ]
+def generate_model_chunks(request):
+    # Same parameters as generate_3d_model; poll this URL until "complete" to pick up rooms as they finish.
+    params = params_from_query(request.GET)
 
     try:
-        result = subprocess.run(
-            command,
-            capture_output=True,
-            text=True,
-            encoding="utf-8",  
-            errors="replace",  
-        )
-
-        print("Blender Output:", result.stdout)
-        print("Blender Errors:", result.stderr)
-        print("Expected Output Path:", output_path)
-
-        if os.path.exists(output_path):
-            model_url = request.build_absolute_uri(settings.MEDIA_URL + "models/room_model.glb")
-            return JsonResponse({"model_url": model_url})
-        else:
-            return JsonResponse({"error": f"Model not found at: {output_path}"}, status=500)
-
-    except subprocess.SubprocessError as e:
+        chunks = build_chunks(params)
+    except ValueError as e:
+        return JsonResponse({"error": f"Invalid parameters: {str(e)}"}, status=400)
+    except (subprocess.SubprocessError, WorkerError) as e:
         print("Subprocess Error:", str(e))
         return JsonResponse({"error": f"Blender execution failed: {str(e)}"}, status=500)
+
+    if chunks[0]["status"] != DONE:
+        return JsonResponse({"error": chunks[0]["error"]}, status=500)
+
+    manifest = []
+    for chunk in chunks:
+        entry = {
+            "name": chunk["tag"].split(":", 1)[-1],
+            "tag": chunk["tag"],
+            "bounds": chunk["bounds"],
+            "status": chunk["status"],
+            "error": chunk["error"],
+            "model_url": None,
+            "status_url": None,
+        }
+        if chunk["status"] == DONE:
+            entry["model_url"] = request.build_absolute_uri(get_cache().url_for(chunk["key"]))
+        if chunk["job"] is not None:
+            entry["status_url"] = request.build_absolute_uri(reverse("generation_job_status", args=[chunk["job"].id]))
+        manifest.append(entry)
+
+    return JsonResponse({
+        "manifest_url": request.build_absolute_uri(),
+        "complete": all(chunk["status"] == DONE for chunk in chunks),
+        "chunks": manifest,
+    })
+
+@api_view(['POST'])
+def submit_generation_job(request):
+    params = params_from_query(request.data or request.GET)
+
+    try:
+        job = get_queue().submit(params)
+    except ValueError as e:
+        return Response({"error": f"Invalid parameters: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+    except QueueFull as e:
+        return Response({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    return Response(job_response(request, job), status=status.HTTP_202_ACCEPTED)
+
+@api_view(['POST'])
+def generate_model_batch(request):
+    # {"variants": [{...same parameters as generate_3d_model...}, ...]}; answers once every variant is built.
+    variants = request.data.get("variants") if isinstance(request.data, dict) else None
+    if not isinstance(variants, list) or not variants or not all(isinstance(v, dict) for v in variants):
+        return Response({"error": "variants must be a non-empty list of parameter objects"},
+                        status=status.HTTP_400_BAD_REQUEST)
+    if len(variants) > settings.GENERATION_BATCH_MAX:
+        return Response({"error": f"At most {settings.GENERATION_BATCH_MAX} variants per batch"},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    items = []
+    for index, variant in enumerate(variants):
+        params = params_from_query(variant)
+        try:
+            items.append((cache_key(params), params))
+        except ValueError as e:
+            return Response({"error": f"Invalid parameters in variant {index}: {str(e)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+    paths, errors = build_models(items)
+    models = []
+    for key, _ in items:
+        model_url = request.build_absolute_uri(get_cache().url_for(key)) if paths[key] else None
+        models.append({"model_url": model_url, "error": errors.get(key)})
+    return Response({"models": models})
+
+@api_view(['GET'])
+def generation_job_status(request, job_id):
+    job = get_queue().get(job_id)
+    if job is None:
+        return Response({"error": "Unknown job"}, status=status.HTTP_404_NOT_FOUND)
+    return Response(job_response(request, job))
+
+def generation_job_events(request, job_id):
+    # Server-Sent Events: one "progress" event per stage started or room laid out, then a final
+    # "done" or "failed" event carrying the job status. Reconnecting clients resume after Last-Event-ID.
+    job = get_queue().get(job_id)
+    if job is None:
+        return JsonResponse({"error": "Unknown job"}, status=404)
+    try:
+        after = int(request.headers.get("Last-Event-ID") or 0)
+    except ValueError:
+        after = 0
+
+    response = StreamingHttpResponse(job_event_stream(request, job, after), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx would otherwise hold events back
+    return response
+
+def job_event_stream(request, job, after):
+    while True:
+        # Read before waiting, so the events of a job that just finished are all sent before the final one.
+        finished = job.finished()
+        events = job.wait_events(after, settings.GENERATION_EVENTS_KEEPALIVE)
+        for sequence, event in events:
+            after = sequence
+            yield f"id: {sequence}\nevent: progress\ndata: {json.dumps(event)}\n\n"
+        if finished:
+            yield f"event: {job.status}\ndata: {json.dumps(job_response(request, job))}\n\n"
+            return
+        if not events and not job.finished():
+            yield ": keep-alive\n\n"
+
+def job_response(request, job):
+    data = job.to_dict()
+    data["status_url"] = request.build_absolute_uri(reverse("generation_job_status", args=[job.id]))
+    data["events_url"] = request.build_absolute_uri(reverse("generation_job_events", args=[job.id]))
+    data["model_url"] = request.build_absolute_uri(get_cache().url_for(job.key)) if job.status == DONE else None
+    if job.status == DONE and is_site(job.params):
+        data["site"] = site_report(job.key)
+    return data
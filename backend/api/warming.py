@@ -0,0 +1,124 @@
+import os
+import subprocess
+import time
+from datetime import timedelta
+
+from django.db import DatabaseError, IntegrityError, transaction
+from django.db.models import Case, F, PositiveIntegerField, Sum, When
+from django.utils import timezone
+
+from .blender_pool import WorkerError
+from .generation import build_model
+from .model_cache import get_cache, normalize_params
+from .models import ModelRequestStat
+
+# Cache warming: every model request (blocking, job, batch or chunk) is counted
+# per cache key, and warm_model_cache builds the most requested configurations
+# that are not cached yet, so their next request is a hit. Counters are per key
+# rather than per request, so the table grows with the number of distinct
+# configurations.
+
+
+def record_request(key, params, hit):
+    """Count one request for `key`; never fails the request it is recording."""
+    now = timezone.now()
+    warmed = When(warmed_at__isnull=False, then=1)
+    changes = {
+        "requests": F("requests") + 1,
+        "hits": F("hits") + int(hit),
+        "last_requested": now,
+        "warm_requests": F("warm_requests") + Case(warmed, default=0, output_field=PositiveIntegerField()),
+        "warm_hits": F("warm_hits") + Case(warmed, default=0, output_field=PositiveIntegerField()) * int(hit),
+    }
+    try:
+        if ModelRequestStat.objects.filter(key=key).update(**changes):
+            return
+        try:
+            with transaction.atomic():
+                ModelRequestStat.objects.create(
+                    key=key,
+                    params=stored_params(params),
+                    requests=1,
+                    hits=int(hit),
+                    last_requested=now,
+                )
+        except IntegrityError:
+            # Another request created the row first.
+            ModelRequestStat.objects.filter(key=key).update(**changes)
+    except DatabaseError as e:
+        print("Could not record model request:", str(e))
+
+
+def top_configurations(count, days):
+    """The `count` most requested configurations among those requested in the last `days` days."""
+    since = timezone.now() - timedelta(days=days)
+    return list(ModelRequestStat.objects.filter(last_requested__gte=since)
+                .order_by("-requests", "-last_requested")[:count])
+
+
+def stored_params(params):
+    """What warm() needs to build the model again: the normalized parameters, the lot size and any chunk."""
+    stored = dict(normalize_params(params), location_size=params["location_size"])
+    if params.get("chunk"):
+        stored["chunk"] = params["chunk"]
+    return stored
+
+
+def is_cached(key):
+    # Not cache.get(): the warmer's own checks should not count as hits or refresh the LRU order.
+    return os.path.exists(get_cache().path_for(key))
+
+
+def warm(count, cpu_seconds, days, log=print):
+    """Build the uncached top configurations until `cpu_seconds` of generation time is spent.
+
+    Each build keeps about one core busy for as long as it runs, so its wall
+    time is what is charged to the budget. Returns counts for the run.
+    """
+    result = {"built": 0, "cached": 0, "failed": 0, "skipped": 0, "seconds": 0.0}
+    warmed = []
+    for stat in top_configurations(count, days):
+        if is_cached(stat.key):
+            result["cached"] += 1
+            warmed.append(stat.key)
+            continue
+        if result["seconds"] >= cpu_seconds:
+            result["skipped"] += 1
+            continue
+
+        start = time.monotonic()
+        try:
+            model_path = build_model(stat.key, stat.params)
+        except (subprocess.SubprocessError, WorkerError) as e:
+            model_path = None
+            log(f"Could not build {stat.key}: {e}")
+        result["seconds"] += time.monotonic() - start
+
+        if model_path is None:
+            result["failed"] += 1
+        else:
+            result["built"] += 1
+            warmed.append(stat.key)
+
+    # The warmed set is replaced, and its hit counters restart, on every run.
+    ModelRequestStat.objects.exclude(key__in=warmed).filter(warmed_at__isnull=False).update(warmed_at=None)
+    ModelRequestStat.objects.filter(key__in=warmed).update(warmed_at=timezone.now(), warm_requests=0, warm_hits=0)
+    return result
+
+
+def warm_report(count, days):
+    """Hit rates of the warmed set since the last run, and how much traffic the current top `count` covers."""
+    stats = ModelRequestStat.objects.filter(warmed_at__isnull=False).aggregate(
+        requests=Sum("warm_requests"), hits=Sum("warm_hits"))
+    top = top_configurations(count, days)
+    total = ModelRequestStat.objects.filter(last_requested__gte=timezone.now() - timedelta(days=days)).aggregate(
+        requests=Sum("requests"))["requests"] or 0
+    covered = sum(stat.requests for stat in top if is_cached(stat.key))
+    return {
+        "warm_requests": stats["requests"] or 0,
+        "warm_hits": stats["hits"] or 0,
+        "top_cached": sum(1 for stat in top if is_cached(stat.key)),
+        "top_count": len(top),
+        # Share of the window's requests that asked for a configuration now in the cache.
+        "coverage": covered / total if total else 0.0,
+    }
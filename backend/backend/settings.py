@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Base directory of the project
@@ -19,6 +20,54 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Blender settings (models are generated by a pool of warm background Blender workers)
+BLENDER_BINARY = 'blender'
+BLENDER_SCRIPT = BASE_DIR / 'blender_scripts' / 'generate_model.py'
+BLENDER_POOL_SIZE = 2  # 0 starts a fresh Blender process per request instead
+BLENDER_JOB_TIMEOUT = 300  # seconds
+BLENDER_STARTUP_TIMEOUT = 60  # seconds
+BLENDER_HEALTH_CHECK_INTERVAL = 30  # seconds
+BLENDER_WORKER_MAX_JOBS = 50  # recycle a worker after this many jobs
+BLENDER_OUTPUT_LINES = 200  # of Blender's output per job, kept to print if the job fails
+
+# Limits on the requested house; anything outside them is a 400 rather than a very long generation
+MODEL_MAX_SIDE = 100  # metres, for width and length
+MODEL_MAX_HEIGHT = 10  # metres
+MODEL_MAX_BUDGET = 100_000_000
+MODEL_MAX_LOCATION_SIZE = 1000  # metres
+
+# Generated model cache (media/models/cache), evicted least-recently-used first
+MODEL_CACHE_MAX_BYTES = 500 * 1024 * 1024
+MODEL_CACHE_MAX_ENTRIES = 1000
+MODEL_SWEEP_INTERVAL = 300  # seconds between sweeps of media/models
+
+# Asynchronous generation jobs (/api/generate-model/jobs/)
+GENERATION_QUEUE_SIZE = 32  # submissions beyond this get a 503
+GENERATION_WORKERS = BLENDER_POOL_SIZE or 1
+GENERATION_JOBS_KEPT = 1000  # finished jobs remembered for polling
+GENERATION_PROGRESS_EVENTS = 100  # latest progress events kept per job for /events/ streams
+GENERATION_EVENTS_KEEPALIVE = 15  # seconds between comments on an idle /events/ stream
+GENERATION_BATCH_MAX = 20  # variants per /api/generate-model/batch/ request, all built in one Blender session
+# Unpublished outputs older than the longest batch may run are orphans. Other server processes
+# cannot tell which temp files are still in use, so this has to cover a full batch.
+MODEL_TEMP_MAX_AGE = 2 * BLENDER_JOB_TIMEOUT * GENERATION_BATCH_MAX
+
+# Sites: several storeys and/or buildings (storeys=, buildings=) built as parts side by side and merged into one GLB
+SITE_MAX_STOREYS = 20
+SITE_MAX_BUILDINGS = 16
+SITE_WORKERS = os.cpu_count() or 1  # parts generated at once; Blender parts are also limited by BLENDER_POOL_SIZE
+
+# Cache warmer (manage.py warm_model_cache), fed by per-configuration request counts
+MODEL_WARM_TOP = 20  # most requested configurations kept cached
+MODEL_WARM_DAYS = 7  # only configurations requested this recently are ranked
+MODEL_WARM_CPU_SECONDS = 600  # generation time one warm run may spend
+MODEL_WARM_MAX_LOAD = 0.5  # scheduled runs wait while the 1-minute load per core is above this
+
+# Texture variants embedded in models (media/textures), encoded once per source image and settings
+TEXTURE_DIR = BASE_DIR / 'blender_scripts'  # where the generator's texture sources live
+TEXTURE_MAX_SIZE = 1024  # pixels; sides are also rounded to a power of two
+TEXTURE_QUALITY = {'jpeg': 85, 'webp': 80}
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
 
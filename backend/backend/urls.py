@@ -18,12 +18,17 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
+from api.metrics import metrics
+from api.serving import serve_model
 from api.views import generate_3d_model
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/generate-model/', generate_3d_model, name="generate_model"),
+    # Cached models are served by the app itself, with or without DEBUG; see api/serving.py.
+    path(f"{settings.MEDIA_URL.strip('/')}/models/cache/<str:filename>", serve_model, name="serve_model"),
     path('api/', include('api.urls')),
+    path('metrics', metrics, name="metrics"),
 ]
 
 if settings.DEBUG:
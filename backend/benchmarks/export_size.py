@@ -0,0 +1,51 @@
+# GLB size and decode cost of the native exporter per budget tier, with and
+# without attribute quantization. Runs without Blender, from the backend dir:
+#
+#   python benchmarks/export_size.py --budgets 500 3000 9000 --nodes merged
+#
+# Textures are embedded as found in blender_scripts/ (not resized), so image
+# bytes are the same in every row; compare geometry_bytes.
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from api.glb_report import glb_report
+from blender_scripts.scene.gltf import write_glb
+from blender_scripts.scene.layout import generate_layout
+
+TEXTURE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "blender_scripts")
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budgets", type=float, nargs="+", default=[500, 1000, 3000, 8000, 9000])
+    parser.add_argument("--nodes", choices=("merged", "named"), default="merged")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    print(f"{'budget':>7} {'compress':>9} {'bytes':>9} {'geometry':>9} {'images':>8} {'export ms':>10} {'decode ms':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for budget in args.budgets:
+            scene = generate_layout(10, 8, 2.5, budget, args.seed)
+            baseline = None
+            for compress in ("none", "quantize"):
+                path = os.path.join(tmp, f"{budget}-{compress}.glb")
+                start = time.perf_counter()
+                write_glb(scene, path, merged=args.nodes == "merged", texture_dir=TEXTURE_DIR, compress=compress)
+                export_ms = (time.perf_counter() - start) * 1000
+
+                report = glb_report(path)
+                baseline = baseline or report["geometry_bytes"]
+                print(f"{budget:7.0f} {compress:>9} {report['bytes']:9d} {report['geometry_bytes']:9d} "
+                      f"{report['image_bytes']:8d} {export_ms:10.1f} {report['decode_ms']:10.2f}"
+                      f"  geometry x{baseline / report['geometry_bytes']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# Floor-plan packing (blender_scripts/scene/floorplan.py) from 2 to 200 rooms:
+# the time of pack_rooms alone and of the whole layout around it, with the
+# footprint grown so rooms keep about the same size. Runs anywhere, no Blender
+# needed; from the backend dir:
+#
+#   python benchmarks/floorplan.py
+#   python benchmarks/floorplan.py --rooms 2 10 50 200 --repeat 20
+#
+# Every plan is checked to tile its footprint (no overlaps, nothing left over),
+# and the run fails if packing grows faster than n log n by more than --slack.
+import argparse
+import itertools
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from blender_scripts.scene.floorplan import pack_rooms
+from blender_scripts.scene.layout import DEFAULT_ROOM_AREA, ROOM_AREAS, generate_layout
+
+ROOM_TYPES = sorted(ROOM_AREAS)
+SQUARE_METRES_PER_AREA_UNIT = 5.0  # a bathroom
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rooms", type=int, nargs="+", default=[2, 5, 10, 20, 50, 100, 200])
+    parser.add_argument("--repeat", type=int, default=10, help="Runs per room count; the fastest one counts")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--slack", type=float, default=3.0,
+                        help="Allowed factor over n log n growth between the smallest and largest room count")
+    return parser.parse_args()
+
+
+def house_for(count, seed):
+    """`count` room types and a footprint (width, depth) roughly 4:3 that fits them."""
+    rng = random.Random(seed)
+    rooms = [rng.choice(ROOM_TYPES) for _ in range(count)]
+    area = sum(ROOM_AREAS.get(room, DEFAULT_ROOM_AREA) for room in rooms) * SQUARE_METRES_PER_AREA_UNIT
+    width = math.sqrt(area * 4 / 3)
+    return rooms, width, area / width
+
+
+def check_tiling(rectangles, bounds):
+    """A description of what is wrong with the plan, or None if it tiles `bounds` exactly."""
+    x0, y0, x1, y1 = bounds
+    covered = sum((r[2] - r[0]) * (r[3] - r[1]) for r in rectangles)
+    if not math.isclose(covered, (x1 - x0) * (y1 - y0), rel_tol=1e-9):
+        return f"rooms cover {covered:.3f} of {(x1 - x0) * (y1 - y0):.3f} m2"
+    for r in rectangles:
+        if r[0] < x0 - 1e-9 or r[1] < y0 - 1e-9 or r[2] > x1 + 1e-9 or r[3] > y1 + 1e-9:
+            return f"room {r} leaves the footprint"
+    for a, b in itertools.combinations(rectangles, 2):
+        if min(a[2], b[2]) - max(a[0], b[0]) > 1e-9 and min(a[3], b[3]) - max(a[1], b[1]) > 1e-9:
+            return f"rooms {a} and {b} overlap"
+    return None
+
+
+def best_of(repeat, function):
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    args = parse_arguments()
+    print(f"{'rooms':>6} {'footprint':>13} {'pack ms':>9} {'us/room':>8} {'layout ms':>10} {'worst aspect':>13}")
+    packing = {}
+    failures = []
+    for count in args.rooms:
+        rooms, width, depth = house_for(count, args.seed)
+        areas = [ROOM_AREAS.get(room, DEFAULT_ROOM_AREA) for room in rooms]
+        bounds = (-width / 2, -depth / 2, width / 2, depth / 2)
+
+        plan = pack_rooms(areas, bounds, random.Random(args.seed))
+        if plan != pack_rooms(areas, bounds, random.Random(args.seed)):
+            failures.append(f"{count} rooms: the same seed gave two different plans")
+        problem = check_tiling(plan, bounds)
+        if problem:
+            failures.append(f"{count} rooms: {problem}")
+        aspect = max(max(r[2] - r[0], r[3] - r[1]) / min(r[2] - r[0], r[3] - r[1]) for r in plan)
+
+        packing[count] = best_of(args.repeat, lambda: pack_rooms(areas, bounds, random.Random(args.seed)))
+        layout = best_of(max(1, args.repeat // 5),
+                         lambda: generate_layout(width, depth, 2.5, 0, args.seed, rooms=rooms))
+        print(f"{count:>6} {width:>6.1f}x{depth:<6.1f} {packing[count] * 1000:9.3f} "
+              f"{packing[count] / count * 1e6:8.2f} {layout * 1000:10.2f} {aspect:13.2f}")
+
+    smallest, largest = min(packing), max(packing)
+    if largest > smallest:
+        def n_log_n(n):
+            return n * math.log2(max(n, 2))
+        growth = packing[largest] / packing[smallest]
+        allowed = n_log_n(largest) / n_log_n(smallest) * args.slack
+        print(f"packing {smallest} -> {largest} rooms: x{growth:.1f} slower, n log n allows x{allowed:.1f}")
+        if growth > allowed:
+            failures.append(f"packing grows faster than n log n (x{growth:.1f} > x{allowed:.1f})")
+
+    for failure in failures:
+        print("FAILED:", failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+# Object-creation speed: bpy.ops primitives vs. the mesh-data builders in
+# blender_scripts/utilities/geometry.py. Run inside Blender:
+#
+#   blender --background --factory-startup --python benchmarks/object_creation.py -- --rooms 40
+#
+# A "room" is the part mix generate_house creates per room (walls with trims,
+# floor, door with frame and handle, and a bed), so --rooms 40 approximates a
+# very large house.
+import argparse
+import os
+import sys
+import time
+
+import bpy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from blender_scripts.utilities import geometry
+
+BOXES_PER_ROOM = 4 * 3 + 4 + 5
+CYLINDERS_PER_ROOM = 1 + 4
+PLANES_PER_ROOM = 1
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rooms", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    return parser.parse_args(args)
+
+
+def clear_scene():
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+    geometry.reset()
+
+
+def build_with_ops(rooms):
+    for r in range(rooms):
+        for i in range(BOXES_PER_ROOM):
+            bpy.ops.mesh.primitive_cube_add(size=1, location=(r, i * 0.1, 0))
+            obj = bpy.context.object
+            obj.name = f"Box_{r}_{i}"
+            obj.scale = (1.0, 0.2, 2.5)
+        for i in range(CYLINDERS_PER_ROOM):
+            bpy.ops.mesh.primitive_cylinder_add(radius=0.05, depth=0.4, location=(r, i * 0.1, 1))
+            bpy.context.object.name = f"Cylinder_{r}_{i}"
+        for i in range(PLANES_PER_ROOM):
+            bpy.ops.mesh.primitive_plane_add(size=1, location=(r, 0, -0.05))
+            bpy.context.object.scale = (4, 4, 1)
+            bpy.ops.object.mode_set(mode='EDIT')
+            bpy.ops.mesh.subdivide(number_cuts=2)
+            bpy.ops.object.mode_set(mode='OBJECT')
+
+
+def build_with_data_api(rooms):
+    for r in range(rooms):
+        for i in range(BOXES_PER_ROOM):
+            geometry.add_box(f"Box_{r}_{i}", (r, i * 0.1, 0), (1.0, 0.2, 2.5))
+        for i in range(CYLINDERS_PER_ROOM):
+            geometry.add_cylinder(f"Cylinder_{r}_{i}", (r, i * 0.1, 1), 0.05, 0.4)
+        for i in range(PLANES_PER_ROOM):
+            geometry.add_plane(f"Floor_{r}_{i}", (r, 0, -0.05), (4, 4), cuts=2)
+    geometry.flush()
+
+
+def best_time(build, rooms, repeat):
+    times = []
+    for _ in range(repeat):
+        clear_scene()
+        start = time.perf_counter()
+        build(rooms)
+        times.append(time.perf_counter() - start)
+    return min(times), len(bpy.context.scene.objects)
+
+
+def main():
+    args = parse_arguments()
+    ops_time, ops_objects = best_time(build_with_ops, args.rooms, args.repeat)
+    data_time, data_objects = best_time(build_with_data_api, args.rooms, args.repeat)
+
+    print(f"rooms={args.rooms} objects={ops_objects}/{data_objects}")
+    print(f"bpy.ops:   {ops_time * 1000:9.1f} ms  ({ops_time / ops_objects * 1e6:7.1f} us/object)")
+    print(f"mesh data: {data_time * 1000:9.1f} ms  ({data_time / data_objects * 1e6:7.1f} us/object)")
+    print(f"speedup:   {ops_time / data_time:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
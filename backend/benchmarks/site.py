@@ -0,0 +1,86 @@
+# Parallel speedup of site generation (api/site.py): the same set of parts
+# generated natively on 1 and on N worker processes, then merged into one GLB,
+# with the time of every part. Runs without Blender or Django; from the
+# backend dir:
+#
+#   python benchmarks/site.py                      # 4 buildings x 3 storeys, 1 vs all cores
+#   python benchmarks/site.py --parts 24 --workers 1 2 4 8
+#
+# Every part here is a distinct house, unlike a real site whose upper storeys
+# share one part, so the work grows with --parts. The server keeps its worker
+# processes between sites, so each worker count is timed once its processes are
+# up; the first run, which starts them, is shown as the cold start.
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+from api.glb_merge import merge_glbs
+from blender_scripts.scene import native
+
+TEXTURES = {"vinyl.jpg": os.path.join(BACKEND_DIR, "blender_scripts", "vinyl.jpg")}
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--parts", type=int, default=12)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--size", default="12x9", help="Footprint of every part, WIDTHxDEPTH")
+    parser.add_argument("--budget", type=float, default=9000)
+    return parser.parse_args()
+
+
+def part_params(index, width, depth, budget, output_dir):
+    return {"width": width, "depth": depth, "height": 2.5, "budget": budget, "seed": index, "nodes": "merged",
+            "lod": "full", "compress": "none", "textures": TEXTURES, "entrance": index % 3 == 0,
+            "output_path": os.path.join(output_dir, f"part-{index}.glb")}
+
+
+def run(count, workers, width, depth, budget, output_dir):
+    jobs = [part_params(index, width, depth, budget, output_dir) for index in range(count)]
+    start = time.perf_counter()
+    seconds = [0.0] * count
+    for index, stats in native.generate_many(jobs, workers):
+        if isinstance(stats, Exception):
+            raise stats
+        seconds[index] = sum(stats["stages"].values())
+    parts_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    placements = [(job["output_path"], f"Part {index + 1}", ((index % 4) * (width + 4), (index // 4) * (depth + 4), 0))
+                  for index, job in enumerate(jobs)]
+    counts = merge_glbs(placements, os.path.join(output_dir, "site.glb"))
+    merge_seconds = time.perf_counter() - start
+    return seconds, parts_seconds, merge_seconds, counts
+
+
+def main():
+    args = parse_arguments()
+    width, depth = (float(side) for side in args.size.split("x"))
+    print(f"{args.parts} parts of {args.size} on {os.cpu_count()} cores")
+
+    walls = {}
+    with tempfile.TemporaryDirectory() as output_dir:
+        for workers in args.workers:
+            cold = run(args.parts, workers, width, depth, args.budget, output_dir)[1]
+            seconds, parts_seconds, merge_seconds, counts = run(args.parts, workers, width, depth, args.budget,
+                                                                output_dir)
+            walls[workers] = parts_seconds
+            print(f"\n{workers} worker(s): parts {parts_seconds * 1000:.0f} ms wall ({cold * 1000:.0f} ms cold), "
+                  f"{sum(seconds) * 1000:.0f} ms summed (x{sum(seconds) / parts_seconds:.2f}); "
+                  f"merge {merge_seconds * 1000:.0f} ms, "
+                  f"{counts['triangles']} triangles, {counts['materials']} materials, {counts['bytes']} bytes")
+            print("  per part (ms):", " ".join(f"{s * 1000:.0f}" for s in seconds))
+
+    baseline = walls.get(1)
+    if baseline:
+        for workers, wall in sorted(walls.items()):
+            print(f"{workers:>3} worker(s): x{baseline / wall:.2f} vs 1 worker")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+# Where generate_model.py spends its time, per stage, across house sizes and
+# budget tiers, checked against a JSON baseline so that a slowdown fails the
+# run. Without Blender (e.g. on CI) bpy, mathutils and bmesh come from
+# benchmarks/stub; from the backend dir:
+#
+#   python benchmarks/stages.py            # compare with benchmarks/baselines/stages-stub.json
+#   python benchmarks/stages.py --save     # record a new baseline instead
+#   python benchmarks/stages.py --blender  # the same run inside Blender, if one is installed
+#
+# or directly: blender --background --factory-startup --python benchmarks/stages.py -- [options]
+#
+# Stages (see blender_scripts/scene/timing.py) exclude their nested stages:
+# clear, layout (windows and bookkeeping), rooms (floor plan and doors),
+# floors_walls, cuts, furniture, build (creating Blender objects),
+# materials, merge, pack and export. The stub's
+# export only writes a placeholder, so native_export also times the NumPy
+# GLB writer on the same layout. Thresholds are scaled by a fixed CPU
+# workload timed during both runs, so a baseline from one machine can still
+# be checked on another.
+import argparse
+import contextlib
+import gc
+import json
+import math
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARK_DIR = os.path.join(BACKEND_DIR, "benchmarks")
+
+try:
+    import bpy  # noqa: F401
+    ENGINE = "blender"
+except ImportError:
+    sys.path.insert(0, os.path.join(BENCHMARK_DIR, "stub"))
+    ENGINE = "stub"
+
+sys.path.insert(0, BACKEND_DIR)
+from blender_scripts import generate_model
+from blender_scripts.scene import timing
+from blender_scripts.scene.layout import BUDGET_TIERS, generate_layout
+
+# One budget per tier: each bound, and one past the last.
+TIER_BUDGETS = [bound for bound, _ in BUDGET_TIERS if bound is not None] + [BUDGET_TIERS[-2][0] + 1000]
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", nargs="+", default=["6x5", "10x8", "16x12"], help="House footprints, WIDTHxDEPTH")
+    parser.add_argument("--budgets", type=float, nargs="+", default=TIER_BUDGETS)
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per case; the fastest one counts")
+    parser.add_argument("--baseline", default=None,
+                        help=f"Defaults to benchmarks/baselines/stages-{ENGINE}.json")
+    parser.add_argument("--save", action="store_true", help="Write the results as the new baseline")
+    parser.add_argument("--output", default=None, help="Also write the results to this file")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="Allowed slowdown of a stage over all cases, as a fraction")
+    parser.add_argument("--noise-ms", type=float, default=1.0, help="Slowdowns smaller than this never fail")
+    parser.add_argument("--blender", action="store_true", help="Run this benchmark inside Blender instead")
+    args = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+    return parser.parse_args(args)
+
+
+def calibrate():
+    """Milliseconds for a fixed pure-Python workload, the fastest of three."""
+    best = math.inf
+    for _ in range(3):
+        start = time.perf_counter()
+        totals = {}
+        for i in range(200000):
+            totals[i % 997] = totals.get(i % 997, 0.0) + i * 0.5
+        sorted(totals.values())
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run_case(width, depth, budget, output_path):
+    params = {"width": width, "depth": depth, "height": 2.5, "budget": budget, "seed": 0, "nodes": "merged",
+              "output_path": output_path}
+    timing.reset()
+    with open(os.devnull, "w") as quiet, contextlib.redirect_stdout(quiet):
+        generate_model.run_job(params)
+    stages = timing.snapshot()
+
+    try:
+        from blender_scripts.scene.gltf import write_glb
+    except ImportError:
+        return stages  # NumPy is not installed in every Blender's Python
+    scene = generate_layout(width, depth, 2.5, budget, 0)
+    timing.reset()
+    write_glb(scene, output_path, texture_dir=generate_model.script_dir)
+    stages["native_export"] = timing.snapshot()["export"]
+    return stages
+
+
+def run_benchmarks(args):
+    """({case: {stage: ms}}, calibration ms); the workload is timed between sizes and the median kept."""
+    results = {}
+    calibrations = [calibrate()]
+    with tempfile.TemporaryDirectory() as tmp:
+        output_path = os.path.join(tmp, "model.glb")
+        for size in args.sizes:
+            width, depth = (float(side) for side in size.split("x"))
+            for budget in args.budgets:
+                best = {}
+                for _ in range(args.repeat):
+                    # A collection landing in one run but not another is most of the run-to-run noise.
+                    gc.collect()
+                    gc.disable()
+                    try:
+                        stages = run_case(width, depth, budget, output_path)
+                    finally:
+                        gc.enable()
+                    for name, seconds in stages.items():
+                        best[name] = min(best.get(name, math.inf), seconds * 1000)
+                best["total"] = sum(ms for name, ms in best.items() if name != "native_export")
+                results[f"{size}/{budget:g}"] = {name: round(ms, 3) for name, ms in sorted(best.items())}
+            calibrations.append(calibrate())
+    return results, statistics.median(calibrations)
+
+
+def compare(baseline, current, tolerance, noise_ms):
+    """Print every case's stages against the baseline; returns the stages that regressed.
+
+    A stage fails on its time summed over all cases, which a real slowdown
+    moves but one noisy case does not.
+    """
+    scale = current["calibration_ms"] / baseline["calibration_ms"]
+    print(f"machine speed vs baseline: x{1 / scale:.2f} (thresholds scaled by {scale:.2f})")
+    print(f"{'case':>14} {'stage':>14} {'baseline':>9} {'now':>9} {'ratio':>6}")
+
+    totals = {}
+    for case, stages in baseline["results"].items():
+        if case not in current["results"]:
+            continue
+        for name, base_ms in stages.items():
+            now_ms = current["results"][case].get(name)
+            if now_ms is None:
+                continue
+            expected = base_ms * scale
+            expected_total, now_total = totals.get(name, (0.0, 0.0))
+            totals[name] = (expected_total + expected, now_total + now_ms)
+            ratio = now_ms / expected if expected else 1.0
+            print(f"{case:>14} {name:>14} {expected:9.2f} {now_ms:9.2f} {ratio:6.2f}")
+
+    regressions = []
+    print(f"{'all cases':>14} {'stage':>14} {'baseline':>9} {'now':>9} {'ratio':>6}")
+    for name, (expected, now_ms) in sorted(totals.items()):
+        slower = now_ms > expected * (1 + tolerance) and now_ms - expected > noise_ms
+        if slower:
+            regressions.append((name, expected, now_ms))
+        ratio = now_ms / expected if expected else 1.0
+        print(f"{'':>14} {name:>14} {expected:9.2f} {now_ms:9.2f} {ratio:6.2f}{'  SLOWER' if slower else ''}")
+    return regressions
+
+
+def run_in_blender(args):
+    blender = os.environ.get("BLENDER", "blender")
+    if shutil.which(blender) is None:
+        print(f"Blender ({blender}) not found, skipping the Blender run")
+        return 0
+    forwarded = [arg for arg in sys.argv[1:] if arg != "--blender"]
+    command = [blender, "--background", "--factory-startup", "--python", os.path.abspath(__file__), "--"] + forwarded
+    return subprocess.run(command).returncode
+
+
+def main():
+    args = parse_arguments()
+    if args.blender and ENGINE == "stub":
+        return run_in_blender(args)
+
+    results, calibration_ms = run_benchmarks(args)
+    current = {"engine": ENGINE, "calibration_ms": round(calibration_ms, 3), "results": results}
+    baseline_path = args.baseline or os.path.join(BENCHMARK_DIR, "baselines", f"stages-{ENGINE}.json")
+    for path in filter(None, (args.output, baseline_path if args.save else None)):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+            f.write("\n")
+    if args.save:
+        print(f"Baseline written to {baseline_path}")
+        return 0
+
+    if not os.path.exists(baseline_path):
+        print(f"No baseline at {baseline_path}; run with --save to record one")
+        print(json.dumps(current, indent=2, sort_keys=True))
+        return 0
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    regressions = compare(baseline, current, args.tolerance, args.noise_ms)
+    if regressions:
+        print(f"{len(regressions)} stage(s) slower than the baseline allows:")
+        for name, expected, now_ms in regressions:
+            print(f"  {name}: {now_ms:.2f} ms over all cases, expected at most {expected * (1 + args.tolerance):.2f} ms")
+        return 1
+    print("No stage is slower than the baseline allows")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,23 @@
+# Stand-in for Blender's bmesh, enough for merge_by_material; see bpy.py in this directory.
+
+
+class BMesh:
+    def __init__(self):
+        self.vertices = []
+        self.polygons = []
+
+    def from_mesh(self, mesh):
+        # Face indices are not offset: like Mesh.transform, that work happens in C in Blender.
+        self.vertices.extend(mesh.vertices)
+        self.polygons.extend(mesh.polygons)
+
+    def to_mesh(self, mesh):
+        mesh.vertices = self.vertices
+        mesh.polygons = self.polygons
+
+    def free(self):
+        pass
+
+
+def new():
+    return BMesh()
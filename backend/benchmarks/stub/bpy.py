@@ -0,0 +1,222 @@
+# A small in-process stand-in for Blender's bpy, covering exactly what
+# generate_model.py and blender_scripts/utilities use, so the generator can be
+# run and timed without Blender (benchmarks/stages.py puts this directory
+# first on sys.path). Datablocks keep their mesh data as plain lists, so the
+# Python side of building, merging and material lookup costs about what it
+# does in Blender; nothing is evaluated or rendered, and the glTF "export"
+# only writes a small placeholder file.
+import json
+import os
+
+from mathutils import Matrix, Vector
+
+
+class Socket:
+    def __init__(self):
+        self.default_value = None
+
+
+class Sockets(dict):
+    def __missing__(self, name):
+        socket = self[name] = Socket()
+        return socket
+
+
+class Node:
+    def __init__(self, type):
+        self.type = type
+        self.inputs = Sockets()
+        self.outputs = Sockets()
+        self.image = None
+
+
+class Nodes(list):
+    def new(self, type):
+        node = Node(type)
+        self.append(node)
+        return node
+
+    def get(self, name):
+        return next((node for node in self if node.type == name), None)
+
+
+class Links(list):
+    def new(self, output, input):
+        self.append((output, input))
+
+
+class NodeTree:
+    def __init__(self):
+        self.nodes = Nodes()
+        self.links = Links()
+        self.nodes.new("Principled BSDF")
+
+
+class Material:
+    def __init__(self, name):
+        self.name = name
+        self.use_nodes = False
+        self.node_tree = NodeTree()
+        self.blend_method = 'OPAQUE'
+
+
+class Image:
+    def __init__(self, name, filepath=""):
+        self.name = name
+        self.filepath = filepath
+
+
+class UVLayer:
+    def __init__(self, name):
+        self.name = name
+        self.data = self
+        self.values = []
+
+    def foreach_set(self, attribute, values):
+        self.values = list(values)
+
+
+class UVLayers(list):
+    def new(self, name="UVMap"):
+        layer = UVLayer(name)
+        self.append(layer)
+        return layer
+
+
+class Polygon:
+    __slots__ = ("vertices",)
+
+    def __init__(self, vertices):
+        self.vertices = vertices
+
+
+class Mesh:
+    def __init__(self, name):
+        self.name = name
+        self.vertices = []
+        self.polygons = []
+        self.materials = []
+        self.uv_layers = UVLayers()
+        self.users = 0
+
+    def from_pydata(self, vertices, edges, faces):
+        self.vertices = [tuple(v) for v in vertices]
+        self.polygons = [Polygon(tuple(f)) for f in faces]
+
+    def update(self):
+        pass
+
+    def transform(self, matrix):
+        # Blender does this in C; transforming here would time the stub rather than the generator.
+        self.matrix = matrix
+
+    def copy(self):
+        mesh = data.meshes.new(self.name)
+        mesh.vertices = list(self.vertices)
+        mesh.polygons = list(self.polygons)
+        mesh.materials = list(self.materials)
+        return mesh
+
+
+class Object:
+    def __init__(self, name, mesh):
+        self.name = name
+        self.data = mesh
+        mesh.users += 1
+        self.type = 'MESH'
+        self.location = Vector((0, 0, 0))
+        self.rotation_euler = Vector((0, 0, 0))
+
+    @property
+    def matrix_basis(self):
+        return Matrix.Translation(self.location)
+
+
+class Datablocks(list):
+    def __init__(self, factory):
+        super().__init__()
+        self.factory = factory
+        self.names = {}
+
+    def new(self, name, *args):
+        # Names are unique per kind of datablock, as in Blender ("Wall", "Wall.001", ...).
+        unique = name
+        while unique in self.names:
+            self.names[name] += 1
+            unique = f"{name}.{self.names[name]:03d}"
+        self.names.setdefault(unique, 0)
+        block = self.factory(unique, *args)
+        self.append(block)
+        return block
+
+    def get(self, name):
+        return next((block for block in self if block.name == name), None)
+
+    def remove(self, block, do_unlink=True):
+        list.remove(self, block)
+        self.names.pop(block.name, None)
+        if isinstance(block, Object):
+            block.data.users -= 1
+        if block in scene.collection.objects:
+            scene.collection.objects.remove(block)
+
+
+class Images(Datablocks):
+    def load(self, filepath, check_existing=False):
+        if not os.path.exists(filepath):
+            raise RuntimeError(f"Error: Cannot read file '{filepath}'")
+        if check_existing:
+            for image in self:
+                if image.filepath == filepath:
+                    return image
+        return self.new(os.path.basename(filepath), filepath)
+
+
+class SceneObjects(list):
+    def link(self, obj):
+        self.append(obj)
+
+
+class Namespace:
+    def __init__(self, **attributes):
+        self.__dict__.update(attributes)
+
+
+data = Namespace(meshes=Datablocks(Mesh), objects=Datablocks(Object), materials=Datablocks(Material),
+                 images=Images(Image))
+scene = Namespace(collection=Namespace(objects=SceneObjects()))
+context = Namespace(scene=scene)
+
+
+def _finished(*args, **kwargs):
+    return {'FINISHED'}
+
+
+def _delete(**kwargs):
+    for obj in list(scene.collection.objects):
+        data.objects.remove(obj)
+    return {'FINISHED'}
+
+
+def _read_factory_settings(**kwargs):
+    for blocks in (data.meshes, data.objects, data.materials, data.images):
+        blocks.clear()
+        blocks.names.clear()
+    scene.collection.objects.clear()
+    return {'FINISHED'}
+
+
+def _export_gltf(filepath, **options):
+    summary = {"objects": len(scene.collection.objects), "meshes": len(data.meshes),
+               "materials": len(data.materials), "options": sorted(options)}
+    with open(filepath, "wb") as f:
+        f.write(b"glTF" + json.dumps(summary).encode("utf-8"))
+    return {'FINISHED'}
+
+
+ops = Namespace(
+    object=Namespace(select_all=_finished, delete=_delete),
+    file=Namespace(make_paths_absolute=_finished, pack_all=_finished),
+    export_scene=Namespace(gltf=_export_gltf),
+    wm=Namespace(read_factory_settings=_read_factory_settings),
+)
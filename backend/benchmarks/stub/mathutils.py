@@ -0,0 +1,30 @@
+# Stand-in for Blender's mathutils; see bpy.py in this directory.
+
+
+class Vector(tuple):
+    def __new__(cls, values):
+        return super().__new__(cls, values)
+
+    x = property(lambda self: self[0])
+    y = property(lambda self: self[1])
+    z = property(lambda self: self[2])
+
+
+class Matrix:
+    def __init__(self, rows):
+        self.rows = [list(row) for row in rows]
+
+    @classmethod
+    def Identity(cls, size):
+        return cls([[1.0 if i == j else 0.0 for j in range(size)] for i in range(size)])
+
+    @classmethod
+    def Translation(cls, vector):
+        matrix = cls.Identity(4)
+        for i in range(3):
+            matrix.rows[i][3] = vector[i]
+        return matrix
+
+    def __matmul__(self, vector):
+        point = tuple(vector) + (1.0,)
+        return tuple(sum(row[i] * point[i] for i in range(4)) for row in self.rows[:3])
@@ -0,0 +1,153 @@
+import bisect
+import itertools
+
+# Floor plans as slicing trees: the footprint is cut in two along its longer
+# side, each half gets the rooms whose areas add up to its share, and so on
+# down to one room per rectangle. Rooms therefore tile the footprint without
+# overlapping, however many there are. Every cut is one binary search over
+# running area totals, so n rooms take O(n log n).
+#
+# The n - 1 cuts are kept too: a door through each of them joins the rooms on
+# its two sides, so one door per cut connects every room to every other.
+
+EPSILON = 1e-6
+
+
+class Cut:
+    """A straight cut of the slicing tree: the line `axis` = `position`, from `start` to `end` along the other axis.
+
+    `low` and `high` are the indices of the rooms on either side of it (lower
+    and higher `axis` coordinates); only some of them touch the line.
+    """
+
+    def __init__(self, axis, position, start, end, low, high):
+        self.axis = axis
+        self.position = position
+        self.start = start
+        self.end = end
+        self.low = low
+        self.high = high
+
+    def spans(self, rectangles):
+        """(a, b, low room, high room) for each stretch of the cut between one room on each side.
+
+        Walls meet the cut only where a stretch ends, so a door anywhere inside
+        one opens into a single room on each side.
+        """
+        along = 1 - self.axis
+
+        def touching(rooms, edge):
+            return sorted(
+                (rectangles[i][along], rectangles[i][along + 2], i) for i in rooms
+                if abs(rectangles[i][self.axis + edge] - self.position) <= EPSILON
+            )
+
+        low, high = touching(self.low, 2), touching(self.high, 0)
+        spans = []
+        i = j = 0
+        while i < len(low) and j < len(high):
+            a, b = max(low[i][0], high[j][0]), min(low[i][1], high[j][1])
+            if b - a > EPSILON:
+                spans.append((a, b, low[i][2], high[j][2]))
+            if low[i][1] < high[j][1]:
+                i += 1
+            else:
+                j += 1
+        return spans
+
+
+def pack_rooms(areas, bounds, rng=None):
+    """Split the rectangle `bounds` (x0, y0, x1, y1) into one rectangle per entry of `areas`.
+
+    Each rectangle's area is proportional to its entry; they are returned in
+    the order of `areas`. `rng` (a random.Random) varies which room goes on
+    which side of each cut, so the same rng state always gives the same plan.
+    """
+    return slice_rooms(areas, bounds, rng)[0]
+
+
+def slice_rooms(areas, bounds, rng=None):
+    """pack_rooms(), along with the Cuts that made the plan: (rectangles, cuts)."""
+    if not areas:
+        return [], []
+    if any(area <= 0 for area in areas):
+        raise ValueError("room areas must be positive")
+
+    # Biggest rooms first, so each cut splits off similar rooms; ties in the order given.
+    order = sorted(range(len(areas)), key=lambda i: -areas[i])
+    totals = list(itertools.accumulate((areas[i] for i in order), initial=0.0))
+
+    rectangles = [None] * len(areas)
+    cuts = []
+    stack = [(0, len(order), tuple(bounds))]
+    while stack:
+        lo, hi, (x0, y0, x1, y1) = stack.pop()
+        if hi - lo == 1:
+            rectangles[order[lo]] = (x0, y0, x1, y1)
+            continue
+
+        # The split point whose running total is nearest half of this range's area.
+        half = (totals[lo] + totals[hi]) / 2
+        above = bisect.bisect_left(totals, half, lo + 1, hi)
+        mid = min((max(above - 1, lo + 1), min(above, hi - 1)), key=lambda i: abs(totals[i] - half))
+        share = (totals[mid] - totals[lo]) / (totals[hi] - totals[lo])
+
+        first, second = (lo, mid), (mid, hi)
+        if rng is not None and rng.random() < 0.5:
+            first, second, share = second, first, 1 - share
+        low, high = order[first[0]:first[1]], order[second[0]:second[1]]
+        if x1 - x0 >= y1 - y0:
+            cut = x0 + (x1 - x0) * share
+            stack.append(first + ((x0, y0, cut, y1),))
+            stack.append(second + ((cut, y0, x1, y1),))
+            cuts.append(Cut(0, cut, y0, y1, low, high))
+        else:
+            cut = y0 + (y1 - y0) * share
+            stack.append(first + ((x0, y0, x1, cut),))
+            stack.append(second + ((x0, cut, x1, y1),))
+            cuts.append(Cut(1, cut, x0, x1, low, high))
+    return rectangles, cuts
+
+
+def room_names(room_types):
+    """A unique name per room: the type itself, numbered from the second room of a type on."""
+    seen = {}
+    names = []
+    for room in room_types:
+        seen[room] = seen.get(room, 0) + 1
+        names.append(room if seen[room] == 1 else f"{room} {seen[room]}")
+    return names
+
+
+def interior_sides(rectangle, bounds):
+    """Which of the rectangle's sides ("top", "bottom", "left", "right") are inside the footprint."""
+    x0, y0, x1, y1 = rectangle
+    return {
+        side for side, edge, outer in (
+            ("top", y1, bounds[3]), ("bottom", y0, bounds[1]), ("left", x0, bounds[0]), ("right", x1, bounds[2]),
+        )
+        if abs(edge - outer) > EPSILON
+    }
+
+
+def boundary_junctions(rectangles, bounds):
+    """Where the sides shared between rectangles meet the boundary of `bounds`.
+
+    Returns {"top": [x, ...], "bottom": [x, ...], "left": [y, ...], "right": [y, ...]},
+    each sorted: the points along that side of the footprint where an interior wall ends.
+    """
+    junctions = {"top": set(), "bottom": set(), "left": set(), "right": set()}
+    for rectangle in rectangles:
+        x0, y0, x1, y1 = rectangle
+        sides = interior_sides(rectangle, bounds)
+        for side, x in (("left", x0), ("right", x1)):
+            if side in sides:
+                for end in ("top", "bottom"):
+                    if end not in sides:
+                        junctions[end].add(x)
+        for side, y in (("bottom", y0), ("top", y1)):
+            if side in sides:
+                for end in ("left", "right"):
+                    if end not in sides:
+                        junctions[end].add(y)
+    return {side: sorted(points) for side, points in junctions.items()}
@@ -0,0 +1,142 @@
+from .ir import Material
+from .timing import stage
+
+# Furniture recipes. Each takes a layout.HouseBuilder and adds its parts to the
+# scene; every part is instanced, since copies only differ by transform.
+
+WOOD = Material("Wood_Material", (0.7, 0.5, 0.3, 1))
+FABRIC = Material("Fabric_Material", (0.3, 0.3, 0.3, 1))
+LEG = Material("Leg_Material", (0.5, 0.3, 0.2, 1))
+CERAMIC = Material("Ceramic_Material", (1, 1, 1, 1))
+FAUCET_METAL = Material("Metal_Material", (0.8, 0.8, 0.8, 1))
+
+
+def bed(builder, location, name="Bed"):
+    builder.box(name, location, (1.6, 2, 0.3), material=Material("Wood_Material", (0.6, 0.4, 0.3, 1)), instance=True)
+
+    builder.box(name + "_Mattress", (location[0], location[1], location[2] + 0.35), (1.5, 1.9, 0.2),
+                material=Material("Fabric_Material", (0.9, 0.9, 0.9, 1)), instance=True)
+
+    builder.box(name + "_Headboard", (location[0], location[1] - 0.95, location[2] + 0.7), (1.6, 0.7, 0.1),
+                rotation=(1.5708, 0, 0), material=Material("Wood_Material", (0.5, 0.3, 0.2, 1)), instance=True)
+
+    leg_positions = [
+        (location[0] - 0.75, location[1] - 0.95, location[2] - 0.3),
+        (location[0] + 0.75, location[1] - 0.95, location[2] - 0.3),
+        (location[0] - 0.75, location[1] + 0.95, location[2] - 0.3),
+        (location[0] + 0.75, location[1] + 0.95, location[2] - 0.3),
+    ]
+    for i, pos in enumerate(leg_positions):
+        builder.cylinder(name + f"_Leg_{i+1}", pos, 0.08, 0.4, rotation=(1.5708, 0, 0),
+                         material=Material("Metal_Material", (0.3, 0.2, 0.1, 1)), instance=True)
+
+    pillow_positions = [
+        (location[0] - 0.4, location[1] - 0.8, location[2] + 0.5),
+        (location[0] + 0.4, location[1] - 0.8, location[2] + 0.5),
+    ]
+    for i, pos in enumerate(pillow_positions):
+        builder.box(name + f"_Pillow_{i+1}", pos, (0.5, 0.2, 0.15),
+                    material=Material("Pillow_Material", (0.95, 0.95, 0.95, 1)), instance=True)
+
+
+def sofa(builder, location, name="Sofa"):
+    builder.box(name + "_Seat", (location[0], location[1], location[2] + 0.3), (2, 1, 0.2),
+                material=FABRIC, instance=True)
+
+    builder.box(name + "_Backrest", (location[0], location[1] - 0.45, location[2] + 0.75), (2, 0.2, 0.6),
+                material=FABRIC, instance=True)
+
+    armrest_positions = [
+        (location[0] - 0.9, location[1], location[2] + 0.5),
+        (location[0] + 0.9, location[1], location[2] + 0.5),
+    ]
+    for i, pos in enumerate(armrest_positions):
+        builder.box(name + f"_Armrest_{i+1}", pos, (0.2, 1, 0.5), material=FABRIC, instance=True)
+
+    cushion_positions = [
+        (location[0] - 0.6, location[1] - 0.35, location[2] + 0.6),
+        (location[0], location[1] - 0.35, location[2] + 0.6),
+        (location[0] + 0.6, location[1] - 0.35, location[2] + 0.6),
+    ]
+    for i, pos in enumerate(cushion_positions):
+        builder.box(name + f"_Cushion_{i+1}", pos, (0.6, 0.2, 0.3),
+                    material=Material("Cushion_Material", (0.35, 0.35, 0.35, 1)), instance=True)
+
+
+def table(builder, location, name="Table"):
+    builder.box(name + "_Top", (location[0], location[1], location[2] + 0.75), (1.2, 0.8, 0.1),
+                material=WOOD, instance=True)
+
+    leg_positions = [
+        (location[0] - 0.5, location[1] - 0.3, location[2] + 0.35),
+        (location[0] + 0.5, location[1] - 0.3, location[2] + 0.35),
+        (location[0] - 0.5, location[1] + 0.3, location[2] + 0.35),
+        (location[0] + 0.5, location[1] + 0.3, location[2] + 0.35),
+    ]
+    for i, pos in enumerate(leg_positions):
+        builder.cylinder(name + f"_Leg_{i+1}", pos, 0.05, 0.7, rotation=(1.5708, 0, 0), material=LEG, instance=True)
+
+
+def chair(builder, location, name="Chair"):
+    builder.box(name + "_Seat", (location[0], location[1], location[2] + 0.4), (0.5, 0.5, 0.1),
+                material=WOOD, instance=True)
+
+    builder.box(name + "_Backrest", (location[0], location[1] - 0.22, location[2] + 0.8), (0.5, 0.1, 0.4),
+                material=WOOD, instance=True)
+
+    leg_positions = [
+        (location[0] - 0.2, location[1] - 0.2, location[2] + 0.2),
+        (location[0] + 0.2, location[1] - 0.2, location[2] + 0.2),
+        (location[0] - 0.2, location[1] + 0.2, location[2] + 0.2),
+        (location[0] + 0.2, location[1] + 0.2, location[2] + 0.2),
+    ]
+    for i, pos in enumerate(leg_positions):
+        builder.cylinder(name + f"_Leg_{i+1}", pos, 0.05, 0.4, rotation=(1.5708, 0, 0), material=LEG, instance=True)
+
+
+def toilet(builder, location, name="Toilet"):
+    builder.cylinder(name + "_Bowl", location, 0.3, 0.5, material=CERAMIC, instance=True)
+
+    builder.torus(name + "_Seat", (location[0], location[1], location[2] + 0.2), scale=(0.4, 0.4, 0.05),
+                  material=Material("Seat_Material", (0.9, 0.9, 0.9, 1)), instance=True)
+
+    builder.box(name + "_Tank", (location[0], location[1] - 0.2, location[2] + 0.5), (0.4, 0.2, 0.4),
+                material=CERAMIC, instance=True)
+
+
+def sink(builder, location, name="Sink"):
+    builder.box(name + "_Countertop", (location[0], location[1], location[2] - 0.1), (1, 0.5, 0.1),
+                material=Material("Countertop_Material", (0.6, 0.6, 0.6, 1)), instance=True)
+
+    # depth includes the old 0.8 z-scale of the bowl
+    builder.cylinder(name + "_Bowl", (location[0], location[1], location[2] + 0.05), 0.3, 0.15 * 0.8,
+                     material=CERAMIC, instance=True)
+
+    builder.cylinder(name + "_Faucet_Base", (location[0] + 0.3, location[1] - 0.15, location[2] + 0.2), 0.05, 0.2,
+                     rotation=(1.5708, 0, 0), material=FAUCET_METAL, instance=True)
+
+    builder.cylinder(name + "_Faucet_Spout", (location[0] + 0.3, location[1] - 0.15, location[2] + 0.4), 0.04, 0.3,
+                     rotation=(0, 1.5708, 0), material=FAUCET_METAL, instance=True)
+
+    builder.cylinder(name + "_Drain", (location[0], location[1], location[2] - 0.05), 0.05, 0.02,
+                     material=Material("Drain_Material", (0.2, 0.2, 0.2, 1)), instance=True)
+
+
+@stage("furniture")
+def furnish_room(builder, room, x, y, kind=None):
+    # kind is the room's type when its name differs ("Bedroom 2").
+    kind = kind or room
+    if "Bedroom" in kind:
+        bed(builder, (x, y, 0.3), f"{room} Bed")
+    elif kind == "Living Room":
+        sofa(builder, (x, y, 0.3), "Sofa")
+    elif kind in ("Kitchen", "Dining Room"):
+        table(builder, (x, y, 0.3), "Dining Table")
+        chair(builder, (x - 1, y, 0.3), "Dining Chair 1")
+        chair(builder, (x + 1, y, 0.3), "Dining Chair 2")
+    elif kind == "Bathroom":
+        sink(builder, (x, y, 0.3), "Bathroom Sink")
+        toilet(builder, (x, y - 1, 0.3), "Bathroom Toilet")
+    elif kind == "Office":
+        table(builder, (x, y, 0.3), "Office Desk")
+        chair(builder, (x, y - 0.5, 0.3), "Office Chair")
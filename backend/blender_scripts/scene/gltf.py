@@ -0,0 +1,390 @@
+import functools
+import json
+import os
+import struct
+
+import numpy as np
+
+from . import primitives
+from .ir import BOX, CYLINDER, PLANE, TORUS, WALL
+from .timing import stage
+
+# Writes a Scene straight to glTF 2.0 binary (GLB) without Blender. Every part
+# is an instance of a few unit shapes (box, cylinder, torus, plane) under a
+# linear transform, so the vertices of all parts sharing a shape are produced
+# by one NumPy einsum instead of a Python loop per vertex.
+
+GLB_MAGIC = 0x46546C67
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+BYTE = 5120
+SHORT = 5122
+UNSIGNED_SHORT = 5123
+UNSIGNED_INT = 5125
+FLOAT = 5126
+COMPONENT_TYPES = {"<i1": BYTE, "<i2": SHORT, "<u2": UNSIGNED_SHORT, "<u4": UNSIGNED_INT, "<f4": FLOAT}
+
+# Quantized meshes use KHR_mesh_quantization: int16 positions (rescaled by the
+# node transform), int8 normals and uint16 UVs, about half the float32 size.
+# Draco needs an encoder only the Blender exporter has.
+POSITION_RANGE = 32767
+
+IMAGE_TYPES = {".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png", ".webp": "image/webp"}
+
+# Blender is Z-up, glTF is Y-up: (x, y, z) -> (x, z, -y), as Blender's own exporter does.
+Y_UP = np.array([[1.0, 0.0, 0.0], [0.0, 0.0, 1.0], [0.0, -1.0, 0.0]])
+
+
+class Template:
+    """A unit shape expanded for flat shading: every face corner is its own vertex."""
+
+    __slots__ = ("positions", "normals", "uvs", "indices")
+
+    def __init__(self, verts, faces, uvs=None):
+        verts = np.asarray(verts, dtype=np.float64)
+        corners = [index for face in faces for index in face]
+        self.positions = verts[corners]
+        self.uvs = np.asarray(uvs, dtype=np.float64)[corners] if uvs is not None else None
+
+        normals, indices, base = [], [], 0
+        for face in faces:
+            a, b, c = verts[face[0]], verts[face[1]], verts[face[2]]
+            normal = np.cross(b - a, c - a)
+            normals.extend([normal / np.linalg.norm(normal)] * len(face))
+            # Faces are convex, so a fan from the first corner triangulates them.
+            for i in range(1, len(face) - 1):
+                indices.extend((base, base + i, base + i + 1))
+            base += len(face)
+        self.normals = np.array(normals)
+        self.indices = np.array(indices, dtype=np.int64)
+
+
+@functools.lru_cache(maxsize=None)
+def template(shape, segments=0):
+    if shape == BOX:
+        return Template(*primitives.box((1, 1, 1)))
+    if shape == CYLINDER:
+        return Template(*primitives.cylinder(1, 1, segments))
+    if shape == TORUS:
+        return Template(*primitives.torus_with_segments(segments))
+    if shape == PLANE:
+        return Template(*primitives.plane((1, 1), segments))
+    raise ValueError(f"Unsupported shape: {shape}")
+
+
+def euler_matrix(rotation):
+    # Blender's default XYZ Euler order: X is applied first.
+    x, y, z = rotation
+    cx, sx, cy, sy, cz, sz = np.cos(x), np.sin(x), np.cos(y), np.sin(y), np.cos(z), np.sin(z)
+    rx = np.array([[1, 0, 0], [0, cx, -sx], [0, sx, cx]])
+    ry = np.array([[cy, 0, sy], [0, 1, 0], [-sy, 0, cy]])
+    rz = np.array([[cz, -sz, 0], [sz, cz, 0], [0, 0, 1]])
+    return rz @ ry @ rx
+
+
+def shapes_of(part):
+    """(shape key, scale, offset from the part's origin) of each unit shape making up `part`."""
+    if part.kind == BOX:
+        return [((BOX, 0), part.dims, (0, 0, 0))]
+    if part.kind == CYLINDER:
+        radius, depth = part.dims
+        return [((CYLINDER, part.segments), (radius, radius, depth), (0, 0, 0))]
+    if part.kind == TORUS:
+        return [((TORUS, part.segments), part.dims, (0, 0, 0))]
+    if part.kind == PLANE:
+        return [((PLANE, part.segments), part.dims + (1,), (0, 0, 0))]
+    if part.kind == WALL:
+        return [((BOX, 0), size, offset) for offset, size in part.pieces]
+    raise ValueError(f"Unsupported part kind: {part.kind}")
+
+
+def cofactors(linear):
+    # Transforms normals like the inverse transpose, but stays defined for flat (zero) scales.
+    c0, c1, c2 = linear[:, :, 0], linear[:, :, 1], linear[:, :, 2]
+    return np.stack([np.cross(c1, c2), np.cross(c2, c0), np.cross(c0, c1)], axis=2)
+
+
+def bake(shape, linear, offsets):
+    """Positions, normals, UVs and indices of n copies of `shape` under (n, 3, 3) `linear` and (n, 3) `offsets`."""
+    unit = template(*shape)
+    count, size = len(linear), len(unit.positions)
+
+    positions = np.einsum("nij,vj->nvi", linear, unit.positions) + offsets[:, None, :]
+    normals = np.einsum("nij,vj->nvi", cofactors(linear), unit.normals)
+    lengths = np.linalg.norm(normals, axis=2, keepdims=True)
+    normals /= np.where(lengths > 0, lengths, 1)
+
+    uvs = None
+    if unit.uvs is not None:
+        uvs = np.broadcast_to(unit.uvs, (count, size, 2)).reshape(-1, 2)
+    indices = (unit.indices[None, :] + (np.arange(count) * size)[:, None]).reshape(-1)
+    return positions.reshape(-1, 3), normals.reshape(-1, 3), uvs, indices
+
+
+def concat(pieces):
+    positions, normals, uvs, indices, base = [], [], [], [], 0
+    textured = any(piece[2] is not None for piece in pieces)
+    for piece_positions, piece_normals, piece_uvs, piece_indices in pieces:
+        positions.append(piece_positions)
+        normals.append(piece_normals)
+        if textured:
+            uvs.append(piece_uvs if piece_uvs is not None else np.zeros((len(piece_positions), 2)))
+        indices.append(piece_indices + base)
+        base += len(piece_positions)
+    return (np.concatenate(positions), np.concatenate(normals),
+            np.concatenate(uvs) if textured else None, np.concatenate(indices))
+
+
+def bake_world(parts):
+    """All of `parts` in one vertex buffer, in glTF world space."""
+    batches = {}
+    for part in parts:
+        euler = euler_matrix(part.rotation)
+        rotation = Y_UP @ euler
+        origin = np.asarray(part.location, dtype=np.float64)
+        for shape, scale, offset in shapes_of(part):
+            batch = batches.setdefault(shape, ([], []))
+            batch[0].append(rotation * np.asarray(scale, dtype=np.float64))
+            batch[1].append(Y_UP @ (origin + euler @ np.asarray(offset, dtype=np.float64)))
+    return concat([bake(shape, np.array(linear), np.array(offsets)) for shape, (linear, offsets) in batches.items()])
+
+
+def bake_local(part):
+    """`part` in its own frame (scaled, not rotated or moved), converted to glTF axes."""
+    return concat([
+        bake(shape, (Y_UP * np.asarray(scale, dtype=np.float64))[None], (Y_UP @ np.asarray(offset, dtype=np.float64))[None])
+        for shape, scale, offset in shapes_of(part)
+    ])
+
+
+def node_transform(part):
+    node = {"translation": [float(c) for c in Y_UP @ np.asarray(part.location, dtype=np.float64)]}
+    if any(part.rotation):
+        rotation = Y_UP @ euler_matrix(part.rotation) @ Y_UP.T
+        matrix = np.eye(4)
+        matrix[:3, :3] = rotation
+        matrix[:3, 3] = node.pop("translation")
+        node["matrix"] = [float(c) for c in matrix.T.reshape(-1)]  # column-major
+    return node
+
+
+class GLBBuilder:
+    def __init__(self, textures=None, texture_dir=None, quantize=False):
+        # textures maps a material's texture name to the file to embed (e.g. a resized variant).
+        self.textures = textures or {}
+        self.texture_dir = texture_dir
+        self.quantize = quantize
+        # mesh index -> (centre, scale) its quantized positions must be multiplied back by
+        self._dequantize = {}
+        self.binary = bytearray()
+        self.gltf = {
+            "asset": {"version": "2.0", "generator": "civi native exporter"},
+            "scene": 0,
+            "scenes": [{"nodes": []}],
+            "nodes": [], "meshes": [], "materials": [], "accessors": [], "bufferViews": [],
+        }
+        self._materials = {}
+        self._images = {}
+        self.stats = {"vertices": 0, "triangles": 0}
+
+    def buffer_view(self, data, target=None):
+        # Every view starts on a 4-byte boundary, as accessors of 4-byte components require.
+        self.binary.extend(b"\0" * (-len(self.binary) % 4))
+        view = {"buffer": 0, "byteOffset": len(self.binary), "byteLength": len(data)}
+        if target is not None:
+            view["target"] = target
+        self.binary.extend(data)
+        self.gltf["bufferViews"].append(view)
+        return len(self.gltf["bufferViews"]) - 1
+
+    def require_extension(self, name):
+        for key in ("extensionsUsed", "extensionsRequired"):
+            if name not in self.gltf.setdefault(key, []):
+                self.gltf[key].append(name)
+
+    def accessor(self, array, kind, target, dtype=None, normalized=False, bounds=False):
+        if dtype is None:
+            if array.dtype.kind == "f":
+                dtype = "<f4"
+            else:
+                dtype = "<u2" if array.max(initial=0) < 65536 else "<u4"
+        array = array.astype(dtype)
+
+        data, stride = array, None
+        if array.ndim == 2 and array.nbytes // len(array) % 4 and target == ARRAY_BUFFER:
+            # Vertex attributes must start on 4-byte boundaries; pad each element (e.g. int16 VEC3 -> 8 bytes).
+            width = array.shape[1]
+            while (width * array.itemsize) % 4:
+                width += 1
+            data = np.zeros((len(array), width), dtype=dtype)
+            data[:, :array.shape[1]] = array
+            stride = width * array.itemsize
+
+        accessor = {
+            "bufferView": self.buffer_view(data.tobytes(), target),
+            "componentType": COMPONENT_TYPES[dtype],
+            "count": len(array),
+            "type": kind,
+        }
+        if stride:
+            self.gltf["bufferViews"][accessor["bufferView"]]["byteStride"] = stride
+        if normalized:
+            accessor["normalized"] = True
+        if bounds:
+            accessor["min"] = [float(c) for c in array.min(axis=0)]
+            accessor["max"] = [float(c) for c in array.max(axis=0)]
+        self.gltf["accessors"].append(accessor)
+        return len(self.gltf["accessors"]) - 1
+
+    def image(self, texture):
+        if texture in self._images:
+            return self._images[texture]
+
+        path = self.textures.get(texture) or os.path.join(self.texture_dir or "", texture)
+        mime_type = IMAGE_TYPES.get(os.path.splitext(path)[1].lower())
+        index = None
+        if mime_type and os.path.exists(path):
+            with open(path, "rb") as f:
+                view = self.buffer_view(f.read())
+            images = self.gltf.setdefault("images", [])
+            images.append({"bufferView": view, "mimeType": mime_type, "name": os.path.basename(texture)})
+            self.gltf.setdefault("samplers", [{}])
+            textures = self.gltf.setdefault("textures", [])
+            if mime_type == "image/webp":
+                # No PNG/JPEG fallback is embedded, so viewers without WebP support must refuse the file.
+                textures.append({"sampler": 0, "extensions": {"EXT_texture_webp": {"source": len(images) - 1}}})
+                self.require_extension("EXT_texture_webp")
+            else:
+                textures.append({"sampler": 0, "source": len(images) - 1})
+            index = len(textures) - 1
+        self._images[texture] = index
+        return index
+
+    def material(self, material):
+        if material is None:
+            return None
+        if material.key in self._materials:
+            return self._materials[material.key]
+
+        pbr = {"baseColorFactor": [float(c) for c in material.color], "metallicFactor": 0.0, "roughnessFactor": 0.5}
+        texture = self.image(material.texture) if material.texture else None
+        if texture is not None:
+            pbr["baseColorTexture"] = {"index": texture}
+            pbr["baseColorFactor"] = [1.0, 1.0, 1.0, 1.0]
+
+        entry = {"name": material.name, "pbrMetallicRoughness": pbr}
+        if material.transparent:
+            entry["alphaMode"] = "BLEND"
+        self.gltf["materials"].append(entry)
+        index = self._materials[material.key] = len(self.gltf["materials"]) - 1
+        return index
+
+    def mesh(self, name, geometry, material):
+        positions, normals, uvs, indices = geometry
+        if uvs is not None:
+            # glTF puts the UV origin at the top left, Blender at the bottom left.
+            uvs = uvs * (1, -1) + (0, 1)
+
+        if self.quantize:
+            self.require_extension("KHR_mesh_quantization")
+            low, high = positions.min(axis=0), positions.max(axis=0)
+            centre = (low + high) / 2
+            scale = max(float((high - low).max()) / 2, 1e-9) / POSITION_RANGE
+            attributes = {
+                "POSITION": self.accessor(np.rint((positions - centre) / scale), "VEC3", ARRAY_BUFFER, "<i2", bounds=True),
+                "NORMAL": self.accessor(np.rint(normals * 127), "VEC3", ARRAY_BUFFER, "<i1", normalized=True),
+            }
+            if uvs is not None:
+                attributes["TEXCOORD_0"] = self.accessor(np.rint(np.clip(uvs, 0, 1) * 65535), "VEC2", ARRAY_BUFFER,
+                                                         "<u2", normalized=True)
+        else:
+            attributes = {
+                "POSITION": self.accessor(positions, "VEC3", ARRAY_BUFFER, bounds=True),
+                "NORMAL": self.accessor(normals, "VEC3", ARRAY_BUFFER),
+            }
+            if uvs is not None:
+                attributes["TEXCOORD_0"] = self.accessor(uvs, "VEC2", ARRAY_BUFFER)
+
+        primitive = {"attributes": attributes, "indices": self.accessor(indices, "SCALAR", ELEMENT_ARRAY_BUFFER)}
+        material_index = self.material(material)
+        if material_index is not None:
+            primitive["material"] = material_index
+
+        self.gltf["meshes"].append({"name": name, "primitives": [primitive]})
+        index = len(self.gltf["meshes"]) - 1
+        if self.quantize:
+            self._dequantize[index] = (centre, scale)
+        self.stats["vertices"] += len(positions)
+        self.stats["triangles"] += len(indices) // 3
+        return index
+
+    def node(self, name, mesh, **transform):
+        if mesh in self._dequantize:
+            transform = self.dequantized(transform, *self._dequantize[mesh])
+        self.gltf["nodes"].append(dict(name=name, mesh=mesh, **transform))
+        self.gltf["scenes"][0]["nodes"].append(len(self.gltf["nodes"]) - 1)
+
+    @staticmethod
+    def dequantized(transform, centre, scale):
+        # The uniform scale keeps the viewer's normal matrix a pure rotation, so stored normals stay valid.
+        if "matrix" not in transform:
+            translation = np.asarray(transform.get("translation", (0, 0, 0))) + centre
+            return {"translation": [float(c) for c in translation], "scale": [scale] * 3}
+        matrix = np.array(transform["matrix"]).reshape(4, 4).T
+        local = np.diag([scale, scale, scale, 1.0])
+        local[:3, 3] = centre
+        return {"matrix": [float(c) for c in (matrix @ local).T.reshape(-1)]}
+
+    def to_bytes(self):
+        gltf = {key: value for key, value in self.gltf.items() if value != []}
+        if self.binary:
+            self.binary.extend(b"\0" * (-len(self.binary) % 4))
+            gltf["buffers"] = [{"byteLength": len(self.binary)}]
+
+        content = json.dumps(gltf, separators=(",", ":")).encode("utf-8")
+        content += b" " * (-len(content) % 4)
+        chunks = struct.pack("<II", len(content), CHUNK_JSON) + content
+        if self.binary:
+            chunks += struct.pack("<II", len(self.binary), CHUNK_BIN) + bytes(self.binary)
+        return struct.pack("<III", GLB_MAGIC, 2, 12 + len(chunks)) + chunks
+
+
+@stage("export")
+def write_glb(scene, output_path, merged=True, textures=None, texture_dir=None, compress="none"):
+    """Export `scene` to `output_path`; returns counts of what was written.
+
+    merged joins all parts of one material into a single node, like the
+    Blender backend's merge_by_material; otherwise every part keeps its own
+    node and instanced parts share one mesh.
+    """
+    if compress not in ("none", "quantize"):
+        raise ValueError(f"The native writer cannot apply {compress} compression")
+    builder = GLBBuilder(textures, texture_dir, quantize=compress == "quantize")
+
+    if merged:
+        groups = {}
+        for part in scene.parts:
+            key = part.material.key if part.material else None
+            groups.setdefault(key, (part.material, []))[1].append(part)
+        for material, parts in groups.values():
+            name = f"{material.name if material else 'Untextured'}_Merged"
+            builder.node(name, builder.mesh(name, bake_world(parts), material))
+    else:
+        shared = {}
+        for part in scene.parts:
+            mesh = shared.get(part.prototype_key) if part.instance else None
+            if mesh is None:
+                mesh = builder.mesh(part.name, bake_local(part), part.material)
+                if part.instance:
+                    shared[part.prototype_key] = mesh
+            builder.node(part.name, mesh, **node_transform(part))
+
+    data = builder.to_bytes()
+    with open(output_path, "wb") as f:
+        f.write(data)
+
+    return dict(builder.stats, nodes=len(builder.gltf["nodes"]), meshes=len(builder.gltf["meshes"]),
+                materials=len(builder.gltf["materials"]), bytes=len(data))
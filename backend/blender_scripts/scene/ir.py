@@ -0,0 +1,83 @@
+# Compact, Blender-independent description of a generated house. The layout
+# engine (scene/layout.py) produces a Scene; backends such as
+# generate_model.py turn it into actual geometry.
+
+BOX = "box"            # dims: (size_x, size_y, size_z)
+CYLINDER = "cylinder"  # dims: (radius, depth); segments around the axis
+TORUS = "torus"        # dims: scale of the unit torus (major radius 1, minor 0.25); segments around the ring
+PLANE = "plane"        # dims: (size_x, size_y); segments = cuts per side
+WALL = "wall"          # dims: full wall size; pieces: solid (offset, size) boxes left after openings
+
+SHELL = "shell"
+
+
+def room_tag(room):
+    return f"room:{room}"
+
+
+class Material:
+    __slots__ = ("name", "color", "texture", "transparent")
+
+    def __init__(self, name, color, texture=None, transparent=False):
+        self.name = name
+        self.color = tuple(color)
+        self.texture = texture
+        self.transparent = transparent
+
+    @property
+    def key(self):
+        return (self.color, self.texture, self.transparent)
+
+    def __repr__(self):
+        return f"Material({self.name!r}, {self.color}, texture={self.texture!r}, transparent={self.transparent})"
+
+
+class Part:
+    __slots__ = ("kind", "name", "location", "rotation", "dims", "material", "tag", "instance", "segments", "pieces")
+
+    def __init__(self, kind, name, location, dims, rotation=(0, 0, 0), material=None, tag=SHELL,
+                 instance=False, segments=0, pieces=None):
+        self.kind = kind
+        self.name = name
+        self.location = tuple(location)
+        self.rotation = tuple(rotation)
+        self.dims = tuple(dims)
+        self.material = material
+        self.tag = tag
+        # Instanced parts may share one mesh with every part of the same kind, dims and material.
+        self.instance = instance
+        self.segments = segments
+        self.pieces = pieces
+
+    @property
+    def prototype_key(self):
+        return (self.kind, self.dims, self.segments, self.material.key if self.material else None)
+
+    def record(self):
+        """Everything that decides the part's geometry and look, as plain JSON-able values."""
+        return (self.kind, self.name, self.location, self.rotation, self.dims, self.segments, self.pieces,
+                self.material.key if self.material else None, self.material.name if self.material else None)
+
+    def __repr__(self):
+        return f"Part({self.kind!r}, {self.name!r}, at={self.location}, dims={self.dims}, tag={self.tag!r})"
+
+
+class Scene:
+    __slots__ = ("parts", "info")
+
+    def __init__(self, info=None):
+        self.parts = []
+        self.info = info or {}
+
+    def add(self, part):
+        self.parts.append(part)
+        return part
+
+    def tags(self):
+        """Distinct part tags, in first-use order (the shell first, then rooms as they were laid out)."""
+        return list(dict.fromkeys(part.tag for part in self.parts))
+
+    def subset(self, tag):
+        chunk = Scene(dict(self.info, chunk=tag))
+        chunk.parts = [part for part in self.parts if part.tag == tag]
+        return chunk
@@ -0,0 +1,373 @@
+import random
+
+from . import furniture
+from .floorplan import boundary_junctions, interior_sides, room_names, slice_rooms
+from .ir import BOX, CYLINDER, PLANE, TORUS, SHELL, Material, Part, Scene, room_tag
+from .openings import EPSILON, NoRoomForOpenings, free_intervals, interval_capacity, place_openings
+from .timing import report, stage
+from .walls import WallSet
+
+# The layout engine decides where every floor, wall, door, window and piece of
+# furniture goes without touching bpy, so it can run (and be tested or
+# benchmarked) anywhere. Its output is a Scene of Parts for a backend to build.
+
+WALL_THICKNESS = 0.2
+FLOOR_TEXTURE = "vinyl.jpg"
+# Every texture file a layout can refer to, so they can be prepared before a build.
+TEXTURES = (FLOOR_TEXTURE,)
+
+# Door width, thickness and height; the frame adds DOOR_FRAME_WIDTH on either side, may run up to
+# the walls meeting its own, and keeps DOOR_GAP of clear wall to any other door.
+DOOR_SIZE = (0.9, WALL_THICKNESS, 2)
+DOOR_FRAME_WIDTH = 0.1
+DOOR_GAP = 0.1
+
+TRIM = Material("Trim_Material", (0.3, 0.3, 0.3, 1))
+DOOR = Material("Wood_Material", (0.4, 0.2, 0.1, 1))
+DOOR_FRAME = Material("Frame_Material", (0.3, 0.15, 0.08, 1))
+HANDLE = Material("Handle_Material", (0.8, 0.8, 0.1, 1))
+GLASS = Material("Glass_Material", (0.5, 0.7, 1, 0.1), transparent=True)
+WINDOW_FRAME = Material("Frame_Material", (0.2, 0.2, 0.2, 1))
+
+
+def box_bounds(location, size):
+    return tuple(location[i] - size[i] / 2 for i in range(3)) + tuple(location[i] + size[i] / 2 for i in range(3))
+
+
+def floor_material(texture=None):
+    return Material("Floor_Material", (0.8, 0.8, 0.8, 1), texture)
+
+
+class HouseBuilder:
+    def __init__(self, seed=None):
+        # Window and room placement are random; a fixed seed makes the result reproducible (and cacheable).
+        self.random = random.Random(seed)
+        self.scene = Scene()
+        self.walls = WallSet()
+        # Tag given to new parts: SHELL for the house itself, room_tag(room) while a room is being built.
+        self.tag = SHELL
+
+    def box(self, name, location, size, rotation=(0, 0, 0), material=None, instance=False):
+        return self.scene.add(Part(BOX, name, location, size, rotation, material, self.tag, instance))
+
+    def cylinder(self, name, location, radius, depth, rotation=(0, 0, 0), material=None, segments=32, instance=False):
+        return self.scene.add(Part(CYLINDER, name, location, (radius, depth), rotation, material, self.tag,
+                                   instance, segments))
+
+    def torus(self, name, location, scale=(1, 1, 1), rotation=(0, 0, 0), material=None, segments=48, instance=False):
+        return self.scene.add(Part(TORUS, name, location, scale, rotation, material, self.tag, instance, segments))
+
+    def plane(self, name, location, size, material=None, cuts=0):
+        return self.scene.add(Part(PLANE, name, location, size[:2], material=material, tag=self.tag, segments=cuts))
+
+    @stage("floors_walls")
+    def wall(self, location, size, name="Wall", add_trim=True):
+        wall = self.walls.add(name, location, size, self.tag)
+
+        if add_trim:
+            trim_height = 0.2
+            self.box(name + "_Top_Trim", (location[0], location[1], location[2] + size[2] / 2 + trim_height / 2),
+                     (size[0], size[1], trim_height), material=TRIM)
+            self.box(name + "_Bottom_Trim", (location[0], location[1], location[2] - size[2] / 2 - trim_height / 2),
+                     (size[0], size[1], trim_height), material=TRIM)
+
+        return wall
+
+    @stage("cuts")
+    def subtract_from_wall(self, location, size):
+        # Openings are recorded on the walls and cut out analytically when the walls become parts.
+        bounds = box_bounds(location, size)
+        return sum(1 for wall in self.walls.within(bounds) if wall.cut(bounds))
+
+    def door(self, location, size=(1, 0.1, 2), name="Door", axis=0):
+        # size is (width along the wall, thickness, height); axis is the one the wall runs along.
+        def oriented(along, across, up):
+            return (along, across, up) if axis == 0 else (across, along, up)
+
+        def offset(du, dv, dz):
+            shifted = list(location)
+            shifted[axis] += du
+            shifted[1 - axis] += dv
+            shifted[2] += dz
+            return tuple(shifted)
+
+        self.subtract_from_wall(location, oriented(*size))
+        door = self.box(name, location, oriented(*size), material=DOOR, instance=True)
+
+        frame_thickness = 0.1
+        frame_height = size[2] + 0.2
+        frame_width = size[0] + DOOR_FRAME_WIDTH * 2
+
+        frame_positions = [
+            offset(-frame_width/2 + frame_thickness/2, 0, 0),
+            offset(frame_width/2 - frame_thickness/2, 0, 0),
+            offset(0, 0, frame_height/2 - frame_thickness/2),
+        ]
+
+        frame_parts = []
+        for i, pos in enumerate(frame_positions):
+            frame_parts.append(self.box(name + f"_Frame_{i+1}", pos,
+                                        oriented(frame_thickness, size[1] + 0.05,
+                                                 frame_height if i < 2 else frame_thickness),
+                                        material=DOOR_FRAME, instance=True))
+
+        handle_location = offset(size[0] / 2 - 0.05, size[1] / 2 + 0.01, -size[2] / 3)
+        handle = self.cylinder(name + "_Handle", handle_location, 0.05, 0.2,
+                               rotation=(1.57, 0, 0) if axis == 0 else (0, 1.57, 0), material=HANDLE, instance=True)
+
+        return door, frame_parts, handle
+
+    def window(self, location, size=(1.5, 0.1, 1.5), name="Window", axis=0, wall_thickness=WALL_THICKNESS):
+        # size is (width along the wall, cut depth, height); axis is the one the wall runs along.
+        def oriented(along, across, up):
+            return (along, across, up) if axis == 0 else (across, along, up)
+
+        def offset(du, dz):
+            shifted = list(location)
+            shifted[axis] += du
+            shifted[2] += dz
+            return tuple(shifted)
+
+        self.subtract_from_wall(location, oriented(size[0], size[1], size[2]))
+
+        glass = self.box(name + "_Glass", location, oriented(size[0], 0.05, size[2]), material=GLASS, instance=True)
+
+        frame_thickness = 0.1
+        frame_depth = wall_thickness + 0.05
+        frame_size = (size[0] + frame_thickness, frame_depth, size[2] + frame_thickness)
+
+        frame_pieces = [
+            (offset(-frame_size[0] / 2 + frame_thickness / 2, 0), oriented(frame_thickness, frame_depth, frame_size[2])),
+            (offset(frame_size[0] / 2 - frame_thickness / 2, 0), oriented(frame_thickness, frame_depth, frame_size[2])),
+            (offset(0, frame_size[2] / 2 - frame_thickness / 2), oriented(frame_size[0], frame_depth, frame_thickness)),
+            (offset(0, -frame_size[2] / 2 + frame_thickness / 2), oriented(frame_size[0], frame_depth, frame_thickness)),
+        ]
+
+        frames = [
+            self.box(name + f"_Frame_{i+1}", pos, piece_size, material=WINDOW_FRAME, instance=True)
+            for i, (pos, piece_size) in enumerate(frame_pieces)
+        ]
+        return glass, frames
+
+    @stage("floors_walls")
+    def floor(self, location, size, name="Floor", texture=None):
+        # Two cuts per side, like the old edit-mode subdivide.
+        return self.plane(name, location, size, material=floor_material(texture), cuts=2)
+
+    @stage("floors_walls")
+    def finish(self):
+        # Walls go last: only now are all of their openings known.
+        for part in self.walls.parts():
+            self.scene.add(part)
+        return self.scene
+
+
+# Rooms per budget tier; each tier takes budgets up to its bound, the last one everything above.
+BUDGET_TIERS = (
+    (500, ("Bedroom", "Bathroom")),
+    (1000, ("Bedroom", "Bathroom", "Kitchen")),
+    (3000, ("Bedroom", "Bathroom", "Kitchen", "Living Room")),
+    (8000, ("Master Bedroom", "Guest Bedroom", "Bathroom", "Kitchen", "Living Room")),
+    (None, ("Master Bedroom", "Guest Bedroom", "Bathroom", "Kitchen", "Living Room", "Office")),
+)
+
+
+def budget_tier(budget):
+    """Index into BUDGET_TIERS; the layout depends on the budget only through it."""
+    for tier, (bound, _) in enumerate(BUDGET_TIERS):
+        if bound is None or budget <= bound:
+            return tier
+
+
+def rooms_for_budget(budget):
+    return list(BUDGET_TIERS[budget_tier(budget)][1])
+
+
+# Floor area of each room type relative to a bathroom; the floor plan gives every room its share of the house.
+ROOM_AREAS = {
+    "Bathroom": 1.0,
+    "Bedroom": 2.25,
+    "Kitchen": 2.25,
+    "Office": 2.25,
+    "Guest Bedroom": 2.25,
+    "Master Bedroom": 2.25,
+    "Living Room": 6.0,
+}
+DEFAULT_ROOM_AREA = 2.25
+
+
+# Window width along the wall, cut depth and height; the clear wall kept between a window and any
+# door, other window or interior wall; and the most windows asked for per wall.
+WINDOW_SIZE = (1.5, 0.5, 1.5)
+WINDOW_GAP = 0.5
+WINDOWS_PER_WALL = 2
+
+
+def add_windows(house, wall, junctions, height):
+    """Up to WINDOWS_PER_WALL windows along an exterior wall, clear of its doors and of the walls meeting it.
+
+    `junctions` are the points along the wall's axis where interior walls end against it.
+    Returns how many of the windows asked for did not fit.
+    """
+    rng = house.random
+    length = wall.size[wall.axis]
+    start = wall.location[wall.axis] - length / 2
+    # In the wall's own coordinates: the doors cut into it so far, and the interior walls' ends.
+    blocked = [(u0, u1) for u0, u1, _, _ in wall.openings]
+    blocked += [(u - start - WALL_THICKNESS / 2, u - start + WALL_THICKNESS / 2) for u in junctions]
+    free = free_intervals(WALL_THICKNESS, length - WALL_THICKNESS, blocked, WINDOW_GAP)
+
+    wanted = rng.randint(0, WINDOWS_PER_WALL)
+    try:
+        centres = place_openings(free, wanted, WINDOW_SIZE[0], WINDOW_GAP, rng)
+    except NoRoomForOpenings:
+        # A crowded wall gets as many as fit, down to none; the caller reports the rest.
+        capacity = sum(interval_capacity(a, b, WINDOW_SIZE[0], WINDOW_GAP) for a, b in free)
+        centres = place_openings(free, capacity, WINDOW_SIZE[0], WINDOW_GAP, rng)
+    for u in centres:
+        location = list(wall.location)
+        location[wall.axis] = start + u
+        location[2] = rng.uniform(1, height - 1)
+        house.window(tuple(location), size=WINDOW_SIZE, name=f"{wall.name} Window", axis=wall.axis)
+    return wanted - len(centres)
+
+
+def door_footprint(location, axis):
+    """(x0, y0, x1, y1) of a door and its frame centred at `location` in a wall along `axis`."""
+    half = [0.0, 0.0]
+    half[axis] = DOOR_SIZE[0] / 2 + DOOR_FRAME_WIDTH
+    half[1 - axis] = (DOOR_SIZE[1] + 0.05) / 2
+    return (location[0] - half[0], location[1] - half[1], location[0] + half[0], location[1] + half[1])
+
+
+def front_door_x(width, junctions):
+    """Where along the front wall the front door goes: as near its middle as the walls meeting it allow."""
+    half = DOOR_SIZE[0] / 2 + DOOR_FRAME_WIDTH
+    free = free_intervals(-width / 2 + WALL_THICKNESS / 2, width / 2 - WALL_THICKNESS / 2,
+                          [(x - WALL_THICKNESS / 2, x + WALL_THICKNESS / 2) for x in junctions])
+    # A front too narrow for the door anywhere keeps it in the middle.
+    spots = [min(max(0.0, a + half), b - half) for a, b in free if b - a >= 2 * half - EPSILON]
+    return min(spots, key=abs, default=0.0)
+
+
+def add_doors(house, names, plan, cuts, doors):
+    """A door through each cut of the floor plan, which connects every room to every other.
+
+    Each door opens into one room on either side, clear of the walls that
+    meet the cut and of `doors`, the footprints of doors already placed
+    (door_footprint), which it is added to. Returns the cuts with no room
+    for a door, which leave the rooms on their two sides unconnected there.
+    """
+    width = DOOR_SIZE[0] + 2 * DOOR_FRAME_WIDTH
+    clearance = WALL_THICKNESS / 2
+    # How close to a cut's line other doors can come before they would touch a door in it.
+    reach = (DOOR_SIZE[1] + 0.05) / 2 + DOOR_GAP
+    numbers = {}
+    crowded = []
+    for cut in cuts:
+        along = 1 - cut.axis
+        spans = cut.spans(plan)
+        taken = [(door[along], door[along + 2]) for door in doors
+                 if door[cut.axis] < cut.position + reach and door[cut.axis + 2] > cut.position - reach]
+        free = [interval for a, b, _, _ in spans
+                for interval in free_intervals(a + clearance, b - clearance, taken, DOOR_GAP)]
+        try:
+            (centre,) = place_openings(free, 1, width, rng=house.random)
+        except NoRoomForOpenings:
+            crowded.append(cut)
+            continue
+
+        # The door belongs with the room on the low side, whose top or right wall it goes through.
+        room = next(names[low] for a, b, low, _ in spans if a <= centre <= b)
+        numbers[room] = numbers.get(room, 0) + 1
+        location = [0.0, 0.0, DOOR_SIZE[2] / 2]
+        location[cut.axis], location[along] = cut.position, centre
+        house.tag = room_tag(room)
+        name = f"{room} Door" if numbers[room] == 1 else f"{room} Door {numbers[room]}"
+        house.door(tuple(location), DOOR_SIZE, name, axis=along)
+        doors.append(door_footprint(location, along))
+    return crowded
+
+
+@stage("layout")
+def generate_layout(width, depth, height, budget, seed=None, rooms=None, entrance=True):
+    """The house as a Scene; `rooms` (room types, repeats allowed) overrides the budget's rooms.
+
+    Without `entrance` there is no front door, as on the upper storeys of a building.
+    """
+    house = HouseBuilder(seed)
+    wall_thickness = WALL_THICKNESS
+
+    house.floor((0, 0, -0.05), (width, depth, 0.1), "Floor")
+
+    exterior = {
+        "Front Wall": ((0, depth / 2, height / 2), (width, wall_thickness, height)),
+        "Back Wall": ((0, -depth / 2, height / 2), (width, wall_thickness, height)),
+        "Right Wall": ((width / 2, 0, height / 2), (wall_thickness, depth, height)),
+        "Left Wall": ((-width / 2, 0, height / 2), (wall_thickness, depth, height)),
+    }
+    exterior_walls = {
+        wall_name: house.wall(location, size, wall_name) for wall_name, (location, size) in exterior.items()
+    }
+
+    room_types = list(rooms) if rooms is not None else rooms_for_budget(budget)
+    names = room_names(room_types)
+    footprint = (-width / 2, -depth / 2, width / 2, depth / 2)
+    plan, cuts = slice_rooms([ROOM_AREAS.get(room, DEFAULT_ROOM_AREA) for room in room_types], footprint,
+                             house.random)
+    room_positions = {
+        room: ((x0 + x1) / 2, (y0 + y1) / 2, x1 - x0, y1 - y0) for room, (x0, y0, x1, y1) in zip(names, plan)
+    }
+
+    with stage("rooms"):
+        for index, (room, rectangle) in enumerate(zip(names, plan)):
+            report("room", room=room, index=index, count=len(names))
+            x, y, room_width, room_depth = room_positions[room]
+            house.tag = room_tag(room)
+
+            house.floor((x, y, -0.05), (room_width, room_depth, 0.1), f"{room} Floor", texture=FLOOR_TEXTURE)
+
+            # Rooms tile the footprint, so every side is either an exterior wall or shared with
+            # neighbours: each room builds its own top and right walls, and its neighbours' walls
+            # (or the exterior) close the other two.
+            sides = interior_sides(rectangle, footprint)
+            if "top" in sides:
+                house.wall((x, y + room_depth / 2, height / 2), (room_width, wall_thickness, height), f"{room} Top Wall")
+            if "right" in sides:
+                house.wall((x + room_width / 2, y, height / 2), (wall_thickness, room_depth, height), f"{room} Right Wall")
+
+        # Doors go in once every wall they could cut is there, the front door clear of the walls meeting it.
+        house.tag = SHELL
+        junctions = boundary_junctions(plan, footprint)
+        doors = []
+        if entrance:
+            front_door = (front_door_x(width, junctions["top"]), depth / 2 + 0.05, DOOR_SIZE[2] / 2)
+            house.door(front_door, DOOR_SIZE, "Front Door")
+            doors.append(door_footprint(front_door, 0))
+        crowded = add_doors(house, names, plan, cuts, doors)
+
+    # Windows go in once every door is cut, between the interior walls that meet the exterior ones.
+    house.tag = SHELL
+    missing_windows = {}
+    for wall_name, side in (("Front Wall", "top"), ("Back Wall", "bottom"), ("Right Wall", "right"),
+                            ("Left Wall", "left")):
+        missing = add_windows(house, exterior_walls[wall_name], junctions[side], height)
+        if missing:
+            missing_windows[wall_name] = missing
+
+    for room, room_type in zip(names, room_types):
+        house.tag = room_tag(room)
+        x, y = room_positions[room][:2]
+        furniture.furnish_room(house, room, x, y, kind=room_type)
+
+    house.tag = SHELL
+    scene = house.finish()
+    scene.info.update(
+        width=width, depth=depth, height=height,
+        num_rooms=len(room_positions),
+        room_positions=room_positions,
+        crowded_cuts=len(crowded),
+        # Windows asked for per exterior wall that did not fit in it.
+        missing_windows=missing_windows,
+    )
+    return scene
@@ -0,0 +1,47 @@
+from .ir import BOX, CYLINDER, TORUS, Part, Scene
+
+# Levels of detail for furniture and fixtures (every instanced part). At room
+# scale a table leg is a few pixels wide, so the viewer can show a cheap level
+# first and swap in the full model once it has loaded.
+FULL = "full"    # as laid out
+LOW = "low"      # curved parts with few segments
+PROXY = "proxy"  # every curved part replaced by its bounding box
+LEVELS = (FULL, LOW, PROXY)
+
+LOW_CYLINDER_SEGMENTS = 8
+LOW_TORUS_SEGMENTS = 12
+
+
+def copy_part(part, **changes):
+    fields = {name: getattr(part, name) for name in Part.__slots__}
+    fields.update(changes)
+    return Part(**fields)
+
+
+def bounding_box(part):
+    """BOX dims enclosing a cylinder or torus in its own (unrotated) frame."""
+    if part.kind == CYLINDER:
+        radius, depth = part.dims
+        return (2 * radius, 2 * radius, depth)
+    # The unit torus reaches 1.25 from its centre and is 0.5 thick.
+    sx, sy, sz = part.dims
+    return (2.5 * sx, 2.5 * sy, 0.5 * sz)
+
+
+def lod_part(part, level):
+    if level == FULL or not part.instance or part.kind not in (CYLINDER, TORUS):
+        return part
+    if level == PROXY:
+        return copy_part(part, kind=BOX, dims=bounding_box(part), segments=0)
+    segments = LOW_CYLINDER_SEGMENTS if part.kind == CYLINDER else LOW_TORUS_SEGMENTS
+    return copy_part(part, segments=min(part.segments, segments))
+
+
+def with_lod(scene, level):
+    if level not in LEVELS:
+        raise ValueError(f"lod must be one of {', '.join(LEVELS)}")
+    if level == FULL:
+        return scene
+    reduced = Scene(dict(scene.info, lod=level))
+    reduced.parts = [lod_part(part, level) for part in scene.parts]
+    return reduced
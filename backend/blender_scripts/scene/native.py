@@ -0,0 +1,91 @@
+import concurrent.futures
+import multiprocessing
+import threading
+
+from . import timing
+from .layout import generate_layout
+from .lod import with_lod
+
+# The native engine: a layout written straight to GLB by gltf.write_glb,
+# without Blender. Nothing here needs Django, so it also runs in the worker
+# processes that generate the parts of a site side by side.
+
+
+def generate(params):
+    """Write the model `params` describe (normalized, with output_path and textures); returns its stats."""
+    # Imported lazily: NumPy is only needed when the native engine is asked for.
+    from .gltf import write_glb
+
+    timing.reset()
+    scene = generate_layout(params["width"], params["depth"], params["height"], params["budget"], params["seed"],
+                            entrance=params.get("entrance", True))
+    scene = with_lod(scene, params["lod"])
+    if params.get("chunk"):
+        scene = scene.subset(params["chunk"])
+    stats = write_glb(scene, params["output_path"], merged=params["nodes"] == "merged",
+                      textures=params["textures"], compress=params["compress"])
+    counts = {"objects": stats["nodes"], "triangles": stats["triangles"], "materials": stats["materials"]}
+    # Returned rather than printed: this runs in the server's own threads and processes.
+    return {"engine": "native", "stages": timing.snapshot(), "counts": counts,
+            "missing_windows": scene.info["missing_windows"]}
+
+
+def generate_many(params_list, workers):
+    """Run generate() for every entry on up to `workers` processes; yields (index, stats or exception) as each ends.
+
+    Layout and export are pure Python for the most part, so threads would
+    take turns on the GIL. Starting a process and importing NumPy in it
+    takes longer than a part, so the processes are started once and kept;
+    with one worker or one entry there is nothing to overlap, and the
+    entries run right here instead.
+    """
+    if workers < 2 or len(params_list) < 2:
+        for index, params in enumerate(params_list):
+            try:
+                yield index, generate(params)
+            except Exception as e:
+                yield index, e
+        return
+
+    executor = get_executor(workers)
+    futures = {executor.submit(generate, params): index for index, params in enumerate(params_list)}
+    for future in concurrent.futures.as_completed(futures):
+        try:
+            yield futures[future], future.result()
+        except concurrent.futures.BrokenExecutor as e:
+            # A worker died (killed, out of memory); the next call starts a new pool.
+            discard_executor(executor)
+            yield futures[future], e
+        except Exception as e:
+            yield futures[future], e
+
+
+_executor = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+
+def get_executor(workers):
+    """The shared pool of `workers` processes, started on first use (or when asked for another size).
+
+    Workers are spawned rather than forked, as the server that calls this
+    has threads of its own.
+    """
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is not None and _executor_workers != workers:
+            _executor.shutdown(wait=False)
+            _executor = None
+        if _executor is None:
+            context = multiprocessing.get_context("spawn")
+            _executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=context)
+            _executor_workers = workers
+        return _executor
+
+
+def discard_executor(executor):
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,106 @@
+# 2D interval arithmetic for cutting door, window and room openings out of
+# walls without boolean modifiers. Walls are rectangles in their own plane:
+# u runs along the wall from 0 to its length, z from 0 (base) to its height.
+
+EPSILON = 1e-6
+
+
+def subtract_intervals(start, end, cuts):
+    """Parts of [start, end] not covered by any (a, b) in cuts."""
+    remaining = []
+    cursor = start
+    for a, b in sorted(cuts):
+        if b <= cursor + EPSILON:
+            continue
+        if a >= end - EPSILON:
+            break
+        if a > cursor + EPSILON:
+            remaining.append((cursor, a))
+        cursor = max(cursor, b)
+    if cursor < end - EPSILON:
+        remaining.append((cursor, end))
+    return remaining
+
+
+def wall_segments(length, height, openings):
+    """Rectangles (u0, u1, z0, z1) covering the wall minus openings given as (u0, u1, z0, z1)."""
+    openings = [
+        (max(u0, 0.0), min(u1, length), max(z0, 0.0), min(z1, height))
+        for u0, u1, z0, z1 in openings
+        if u1 > EPSILON and u0 < length - EPSILON and z1 > EPSILON and z0 < height - EPSILON
+    ]
+    if not openings:
+        return [(0.0, length, 0.0, height)]
+
+    # Between consecutive opening edges the set of openings covering u is constant.
+    edges = sorted({0.0, length} | {u for u0, u1, _, _ in openings for u in (u0, u1)})
+
+    segments = []
+    open_runs = {}
+    last = length
+    for a, b in zip(edges, edges[1:]):
+        if b - a <= EPSILON:
+            continue
+        cuts = [(z0, z1) for u0, u1, z0, z1 in openings if u0 <= a + EPSILON and u1 >= b - EPSILON]
+        runs = {}
+        for z0, z1 in subtract_intervals(0.0, height, cuts):
+            # Extend the segment from the previous strip when its z-range carries on unchanged.
+            start = open_runs.pop((z0, z1), a)
+            runs[(z0, z1)] = start
+        for (z0, z1), start in open_runs.items():
+            segments.append((start, a, z0, z1))
+        open_runs = runs
+        last = b
+
+    for (z0, z1), start in open_runs.items():
+        segments.append((start, last, z0, z1))
+    return sorted(segments)
+
+
+class NoRoomForOpenings(ValueError):
+    pass
+
+
+def free_intervals(start, end, blocked, gap=0.0):
+    """Parts of [start, end] at least `gap` away from every (a, b) in blocked."""
+    return subtract_intervals(start, end, [(a - gap, b + gap) for a, b in blocked])
+
+
+def interval_capacity(start, end, width, gap=0.0):
+    """How many openings of `width`, `gap` apart, fit in [start, end]."""
+    return max(0, int((end - start + gap + EPSILON) // (width + gap)))
+
+
+def place_openings(free, count, width, gap=0.0, rng=None):
+    """Centres of `count` openings of `width` in the free intervals, at least `gap` apart.
+
+    Openings are spread over the intervals in proportion to how many each
+    can hold, and each interval's spare length is shared out between the
+    spaces around its openings: evenly, or varied by `rng` (a random.Random).
+    Raises NoRoomForOpenings if fewer than `count` fit.
+    """
+    capacities = [interval_capacity(a, b, width, gap) for a, b in free]
+    total = sum(capacities)
+    if count > total:
+        raise NoRoomForOpenings(f"{count} openings of width {width:g} do not fit, at most {total} do")
+    if count <= 0:
+        return []
+
+    # Largest remainder: never more than an interval holds, since each share is at most its capacity.
+    shares = [count * capacity / total for capacity in capacities]
+    counts = [int(share) for share in shares]
+    by_remainder = sorted(range(len(free)), key=lambda i: counts[i] - shares[i])
+    for i in by_remainder[:count - sum(counts)]:
+        counts[i] += 1
+
+    centres = []
+    for (a, b), k in zip(free, counts):
+        if not k:
+            continue
+        spaces = [1.0 + (rng.random() - 0.5 if rng is not None else 0.0) for _ in range(k + 1)]
+        scale = (b - a - k * width - (k - 1) * gap) / sum(spaces)
+        cursor = a + spaces[0] * scale
+        for space in spaces[1:]:
+            centres.append(cursor + width / 2)
+            cursor += width + gap + space * scale
+    return centres
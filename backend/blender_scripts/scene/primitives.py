@@ -0,0 +1,93 @@
+import math
+
+# Vertex/face lists for the shapes the generator uses, centred on the origin
+# with outward (counter-clockwise) winding. Defaults match the bpy.ops primitives.
+
+
+def box(size):
+    sx, sy, sz = size[0] / 2, size[1] / 2, size[2] / 2
+    verts = [
+        (-sx, -sy, -sz), (sx, -sy, -sz), (sx, sy, -sz), (-sx, sy, -sz),
+        (-sx, -sy, sz), (sx, -sy, sz), (sx, sy, sz), (-sx, sy, sz),
+    ]
+    faces = [
+        (0, 3, 2, 1),  # bottom
+        (4, 5, 6, 7),  # top
+        (0, 1, 5, 4),  # -y
+        (2, 3, 7, 6),  # +y
+        (3, 0, 4, 7),  # -x
+        (1, 2, 6, 5),  # +x
+    ]
+    return verts, faces
+
+
+def cylinder(radius, depth, segments=32):
+    half = depth / 2
+    ring = [(radius * math.cos(2 * math.pi * i / segments), radius * math.sin(2 * math.pi * i / segments)) for i in range(segments)]
+    verts = [(x, y, -half) for x, y in ring] + [(x, y, half) for x, y in ring]
+
+    faces = [(i, (i + 1) % segments, segments + (i + 1) % segments, segments + i) for i in range(segments)]
+    faces.append(tuple(range(segments - 1, -1, -1)))
+    faces.append(tuple(range(segments, 2 * segments)))
+    return verts, faces
+
+
+def torus(major_radius=1.0, minor_radius=0.25, major_segments=48, minor_segments=12):
+    verts = []
+    for i in range(major_segments):
+        theta = 2 * math.pi * i / major_segments
+        for j in range(minor_segments):
+            phi = 2 * math.pi * j / minor_segments
+            r = major_radius + minor_radius * math.cos(phi)
+            verts.append((r * math.cos(theta), r * math.sin(theta), minor_radius * math.sin(phi)))
+
+    faces = []
+    for i in range(major_segments):
+        i2 = (i + 1) % major_segments
+        for j in range(minor_segments):
+            j2 = (j + 1) % minor_segments
+            faces.append((
+                i * minor_segments + j,
+                i2 * minor_segments + j,
+                i2 * minor_segments + j2,
+                i * minor_segments + j2,
+            ))
+    return verts, faces
+
+
+def torus_with_segments(segments=48):
+    """The default torus with `segments` around the ring and a quarter as many around the tube."""
+    return torus(major_segments=segments, minor_segments=max(3, segments // 4))
+
+
+def plane(size, cuts=0):
+    """Flat grid of (cuts + 1)^2 quads, with per-vertex UVs spanning 0..1."""
+    n = cuts + 1
+    verts, uvs = [], []
+    for j in range(n + 1):
+        for i in range(n + 1):
+            u, v = i / n, j / n
+            verts.append(((u - 0.5) * size[0], (v - 0.5) * size[1], 0.0))
+            uvs.append((u, v))
+
+    faces = []
+    for j in range(n):
+        for i in range(n):
+            a = j * (n + 1) + i
+            faces.append((a, a + 1, a + n + 2, a + n + 1))
+    return verts, faces, uvs
+
+
+def scaled(verts, scale):
+    return [(x * scale[0], y * scale[1], z * scale[2]) for x, y, z in verts]
+
+
+def boxes(pieces):
+    """One mesh made of several boxes, each given as (offset, size) from the shared origin."""
+    verts, faces = [], []
+    for offset, size in pieces:
+        box_verts, box_faces = box(size)
+        base = len(verts)
+        verts.extend((x + offset[0], y + offset[1], z + offset[2]) for x, y, z in box_verts)
+        faces.extend(tuple(i + base for i in face) for face in box_faces)
+    return verts, faces
@@ -0,0 +1,56 @@
+import math
+
+# Uniform-grid index over axis-aligned bounding boxes (x0, y0, z0, x1, y1, z1).
+# Boxes are bucketed by their x/y footprint, so a query only looks at items in
+# the cells it overlaps instead of scanning the whole scene.
+
+
+def intersects(a, b):
+    return all(a[i] <= b[i + 3] and b[i] <= a[i + 3] for i in range(3))
+
+
+class GridIndex:
+    def __init__(self, cell_size=2.0):
+        self.cell_size = cell_size
+        self._cells = {}
+        self._entries = {}
+        self._sequence = 0
+
+    def _cells_for(self, bounds):
+        size = self.cell_size
+        x0, y0 = math.floor(bounds[0] / size), math.floor(bounds[1] / size)
+        x1, y1 = math.floor(bounds[3] / size), math.floor(bounds[4] / size)
+        return [(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+    def insert(self, item, bounds):
+        self.remove(item)
+        self._sequence += 1
+        self._entries[id(item)] = (self._sequence, item, bounds)
+        for cell in self._cells_for(bounds):
+            self._cells.setdefault(cell, set()).add(id(item))
+
+    def remove(self, item):
+        entry = self._entries.pop(id(item), None)
+        if entry is None:
+            return
+        for cell in self._cells_for(entry[2]):
+            bucket = self._cells.get(cell)
+            if bucket is not None:
+                bucket.discard(id(item))
+                if not bucket:
+                    del self._cells[cell]
+
+    def query(self, bounds):
+        """Items whose boxes intersect `bounds`, in insertion order."""
+        found = set()
+        for cell in self._cells_for(bounds):
+            found.update(self._cells.get(cell, ()))
+
+        hits = []
+        for key in found:
+            sequence, item, item_bounds = self._entries[key]
+            if intersects(bounds, item_bounds):
+                hits.append((sequence, item))
+        # Insertion order keeps results (and so generation) deterministic.
+        hits.sort(key=lambda hit: hit[0])
+        return [item for _, item in hits]
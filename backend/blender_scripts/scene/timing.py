@@ -0,0 +1,69 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Where generation time goes, per stage. Stages nest (material lookups happen
+# while parts are built), and each one is charged only its own time, so the
+# totals of one generation add up to its wall time. State is per thread
+# because the server generates on several threads at once.
+#
+# A listener, if set, also hears about progress: the first entry into each
+# stage since reset(), and whatever the generator report()s (one event per room).
+_local = threading.local()
+
+
+def _state():
+    if not hasattr(_local, "totals"):
+        _local.totals = {}
+        _local.calls = {}
+        _local.stack = []
+        _local.listener = None
+    return _local
+
+
+def set_listener(listener):
+    """Call listener(event_dict) with this thread's progress events; None stops it."""
+    _state().listener = listener
+
+
+def report(event, **fields):
+    listener = _state().listener
+    if listener is not None:
+        listener(dict(event=event, **fields))
+
+
+def reset():
+    state = _state()
+    state.totals.clear()
+    state.calls.clear()
+
+
+def snapshot():
+    """{stage: seconds} since the last reset() on this thread."""
+    return dict(_state().totals)
+
+
+def _charge(state, entry, now):
+    name, started = entry
+    state.totals[name] = state.totals.get(name, 0.0) + now - started
+    entry[1] = now
+
+
+@contextmanager
+def stage(name):
+    """Time the block (or, as a decorator, the function) as `name`, excluding nested stages."""
+    state = _state()
+    now = time.perf_counter()
+    if state.stack:
+        _charge(state, state.stack[-1], now)
+    state.stack.append([name, now])
+    state.calls[name] = state.calls.get(name, 0) + 1
+    if state.listener is not None and state.calls[name] == 1:
+        state.listener({"event": "stage", "stage": name})
+    try:
+        yield
+    finally:
+        now = time.perf_counter()
+        _charge(state, state.stack.pop(), now)
+        if state.stack:
+            state.stack[-1][1] = now
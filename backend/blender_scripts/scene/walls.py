@@ -0,0 +1,89 @@
+from .ir import WALL, Part, SHELL
+from .openings import wall_segments
+from .spatial import GridIndex
+
+# Walls are recorded as rectangles and only turned into parts by WallSet.parts(),
+# once every door, window and room opening is known. Openings are subtracted
+# analytically, so no boolean modifier is ever applied to a wall.
+
+
+class Wall:
+    def __init__(self, name, location, size, tag=SHELL):
+        self.name = name
+        self.tag = tag
+        self.location = tuple(location)
+        self.size = tuple(size)
+        # Index of the axis the wall runs along; the other horizontal axis is its thickness.
+        self.axis = 0 if size[0] >= size[1] else 1
+        self.openings = []
+
+    def bounds(self):
+        return tuple(self.location[i] - self.size[i] / 2 for i in range(3)) + \
+            tuple(self.location[i] + self.size[i] / 2 for i in range(3))
+
+    def cut(self, bounds):
+        """Open the part of the wall inside the box `bounds` (x0, y0, z0, x1, y1, z1).
+
+        The cut only counts when the box spans the wall's centre line.
+        """
+        across = 1 - self.axis
+        if not bounds[across] <= self.location[across] <= bounds[across + 3]:
+            return False
+
+        start = self.location[self.axis] - self.size[self.axis] / 2
+        base = self.location[2] - self.size[2] / 2
+        u0, u1 = bounds[self.axis] - start, bounds[self.axis + 3] - start
+        z0, z1 = bounds[2] - base, bounds[5] - base
+        if u1 <= 0 or u0 >= self.size[self.axis] or z1 <= 0 or z0 >= self.size[2]:
+            return False
+
+        self.openings.append((u0, u1, z0, z1))
+        return True
+
+    def segment_boxes(self):
+        """(centre, size) of each solid piece left after the openings."""
+        length, height = self.size[self.axis], self.size[2]
+        thickness = self.size[1 - self.axis]
+        start = self.location[self.axis] - length / 2
+        base = self.location[2] - height / 2
+
+        boxes = []
+        for u0, u1, z0, z1 in wall_segments(length, height, self.openings):
+            centre = list(self.location)
+            centre[self.axis] = start + (u0 + u1) / 2
+            centre[2] = base + (z0 + z1) / 2
+            size = [0.0, 0.0, z1 - z0]
+            size[self.axis] = u1 - u0
+            size[1 - self.axis] = thickness
+            boxes.append((tuple(centre), tuple(size)))
+        return boxes
+
+    def part(self, material=None):
+        pieces = [
+            (tuple(c - l for c, l in zip(centre, self.location)), size)
+            for centre, size in self.segment_boxes()
+        ]
+        return Part(WALL, self.name, self.location, self.size, material=material, tag=self.tag, pieces=pieces)
+
+
+class WallSet:
+    def __init__(self):
+        self._walls = []
+        self._index = GridIndex()
+
+    def __iter__(self):
+        return iter(self._walls)
+
+    def add(self, name, location, size, tag=SHELL):
+        wall = Wall(name, location, size, tag)
+        self._walls.append(wall)
+        self._index.insert(wall, wall.bounds())
+        return wall
+
+    def within(self, bounds):
+        """Walls whose real bounds intersect `bounds`, oldest first."""
+        return self._index.query(bounds)
+
+    def parts(self, material=None):
+        # Walls cut away entirely by later rooms produce no part at all.
+        return [wall.part(material) for wall in self._walls if wall.segment_boxes()]
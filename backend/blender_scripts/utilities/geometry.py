@@ -0,0 +1,166 @@
+import bpy
+
+from blender_scripts.scene import primitives
+
+# Objects are built straight from mesh data instead of bpy.ops primitives,
+# which skips operator context checks, undo pushes and a depsgraph update
+# per part. They are linked to the scene in one go by flush().
+_pending = []
+
+# Furniture and fixture parts that only differ by transform share one mesh
+# datablock, which the glTF exporter then writes once and references per node.
+_prototypes = {}
+instance_stats = {"built": 0, "shared": 0}
+
+
+def reset():
+    _pending.clear()
+    _prototypes.clear()
+    instance_stats.update(built=0, shared=0)
+
+
+def flush():
+    collection = bpy.context.scene.collection
+    for obj in _pending:
+        collection.objects.link(obj)
+    _pending.clear()
+
+
+def new_object(name, verts, faces, location=(0, 0, 0), rotation=(0, 0, 0), material=None, uvs=None):
+    return place_object(name, build_mesh(name, verts, faces, material, uvs), location, rotation)
+
+
+def build_mesh(name, verts, faces, material=None, uvs=None):
+    mesh = bpy.data.meshes.new(name)
+    mesh.from_pydata(verts, [], faces)
+    if uvs:
+        # Loops are stored face by face, in the order the faces were given.
+        layer = mesh.uv_layers.new(name="UVMap")
+        layer.data.foreach_set("uv", [c for face in faces for index in face for c in uvs[index]])
+    mesh.update()
+    if material is not None:
+        mesh.materials.append(material)
+    return mesh
+
+
+def place_object(name, mesh, location=(0, 0, 0), rotation=(0, 0, 0)):
+    obj = bpy.data.objects.new(name, mesh)
+    obj.location = location
+    obj.rotation_euler = rotation
+    _pending.append(obj)
+    return obj
+
+
+def prototype(key, name, build, material=None):
+    """Mesh for `key` (shape + dimensions), built by build() -> (verts, faces) on first use."""
+    key = key + (material.name if material is not None else None,)
+    mesh = _prototypes.get(key)
+    if mesh is None:
+        verts, faces = build()
+        mesh = _prototypes[key] = build_mesh(name, verts, faces, material)
+        instance_stats["built"] += 1
+    else:
+        instance_stats["shared"] += 1
+    return mesh
+
+
+def add_box(name, location, size, rotation=(0, 0, 0), material=None, instance=False):
+    if instance:
+        key = ("box",) + tuple(round(c, 4) for c in size)
+        mesh = prototype(key, name, lambda: primitives.box(size), material)
+        return place_object(name, mesh, location, rotation)
+    verts, faces = primitives.box(size)
+    return new_object(name, verts, faces, location, rotation, material)
+
+
+def add_cylinder(name, location, radius, depth, rotation=(0, 0, 0), material=None, segments=32, instance=False):
+    if instance:
+        key = ("cylinder", round(radius, 4), round(depth, 4), segments)
+        mesh = prototype(key, name, lambda: primitives.cylinder(radius, depth, segments), material)
+        return place_object(name, mesh, location, rotation)
+    verts, faces = primitives.cylinder(radius, depth, segments)
+    return new_object(name, verts, faces, location, rotation, material)
+
+
+def add_torus(name, location, scale=(1, 1, 1), rotation=(0, 0, 0), material=None, segments=48, instance=False):
+    def build():
+        verts, faces = primitives.torus_with_segments(segments)
+        return primitives.scaled(verts, scale), faces
+
+    if instance:
+        key = ("torus", segments) + tuple(round(c, 4) for c in scale)
+        return place_object(name, prototype(key, name, build, material), location, rotation)
+    verts, faces = build()
+    return new_object(name, verts, faces, location, rotation, material)
+
+
+def add_boxes(name, location, pieces, material=None):
+    verts, faces = primitives.boxes(pieces)
+    return new_object(name, verts, faces, location, material=material)
+
+
+def add_plane(name, location, size, material=None, cuts=0):
+    verts, faces, uvs = primitives.plane(size, cuts)
+    return new_object(name, verts, faces, location, material=material, uvs=uvs)
+
+def scene_counts():
+    """Mesh objects in the scene and the triangles they draw; a shared mesh counts once per object."""
+    objects = [obj for obj in bpy.context.scene.collection.objects if obj.type == 'MESH']
+    per_mesh = {}
+    triangles = 0
+    for obj in objects:
+        mesh = obj.data
+        if mesh.name not in per_mesh:
+            per_mesh[mesh.name] = sum(len(polygon.vertices) - 2 for polygon in mesh.polygons)
+        triangles += per_mesh[mesh.name]
+    return {"objects": len(objects), "triangles": triangles}
+
+
+def remove_object(obj):
+    mesh = obj.data
+    if obj in _pending:
+        _pending.remove(obj)
+    bpy.data.objects.remove(obj, do_unlink=True)
+    # Prototype meshes stay registered for later copies even with no users left.
+    if mesh is not None and mesh.users == 0 and mesh not in _prototypes.values():
+        bpy.data.meshes.remove(mesh)
+
+
+def merge_by_material(objects):
+    """Join mesh objects that share a material into one object per material (one glTF primitive each)."""
+    import bmesh
+
+    groups = {}
+    for obj in objects:
+        if obj.type != 'MESH':
+            continue
+        material = obj.data.materials[0] if len(obj.data.materials) else None
+        groups.setdefault(material.name if material else None, (material, []))[1].append(obj)
+
+    merged_objects = []
+    for material_name, (material, group) in groups.items():
+        if len(group) < 2:
+            continue
+
+        bm = bmesh.new()
+        for obj in group:
+            # matrix_basis is valid without a depsgraph update; generated parts have no parents.
+            mesh = obj.data.copy()
+            mesh.transform(obj.matrix_basis)
+            bm.from_mesh(mesh)
+            bpy.data.meshes.remove(mesh)
+
+        name = f"{material_name or 'Untextured'}_Merged"
+        mesh = bpy.data.meshes.new(name)
+        bm.to_mesh(mesh)
+        bm.free()
+        mesh.materials.clear()
+        if material is not None:
+            mesh.materials.append(material)
+
+        for obj in group:
+            remove_object(obj)
+        merged_objects.append(place_object(name, mesh))
+
+    flush()
+    return merged_objects
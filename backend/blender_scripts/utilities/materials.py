@@ -0,0 +1,68 @@
+import os
+
+import bpy
+
+# Materials are looked up by value rather than by name: two parts that both
+# ask for "Wood_Material" in different colours get two materials, and every
+# request for the same colour, texture and transparency gets the same one.
+# Each texture image is loaded from disk once per scene.
+_materials = {}
+_images = {}
+material_stats = {"hits": 0, "misses": 0, "images_loaded": 0}
+
+
+def reset():
+    _materials.clear()
+    _images.clear()
+    material_stats.update(hits=0, misses=0, images_loaded=0)
+
+
+def load_image(texture_path):
+    if texture_path not in _images:
+        try:
+            _images[texture_path] = bpy.data.images.load(texture_path, check_existing=True)
+            material_stats["images_loaded"] += 1
+            print(f"Texture loaded: {texture_path}")
+        except RuntimeError as e:
+            print(f"Failed to load texture: {texture_path} - {e}")
+            _images[texture_path] = None
+    return _images[texture_path]
+
+
+def get_material(color, name="Material", texture_path=None, transparency=False):
+    color = tuple(color)
+    if texture_path and not os.path.exists(texture_path):
+        print(f"Error: Texture file not found at {texture_path}")
+        texture_path = None
+
+    key = (color, texture_path, transparency)
+    mat = _materials.get(key)
+    if mat is not None:
+        material_stats["hits"] += 1
+        return mat
+    material_stats["misses"] += 1
+
+    # Blender suffixes the name (.001, ...) when another value already took it.
+    mat = _materials[key] = bpy.data.materials.new(name=name)
+    mat.use_nodes = True
+    nodes = mat.node_tree.nodes
+    bsdf = nodes.get("Principled BSDF")
+
+    image = load_image(texture_path) if texture_path else None
+    if image is not None:
+        tex_image = nodes.new(type="ShaderNodeTexImage")
+        tex_image.image = image
+
+        tex_coord = nodes.new("ShaderNodeTexCoord")
+        mapping = nodes.new("ShaderNodeMapping")
+        mat.node_tree.links.new(tex_coord.outputs["UV"], mapping.inputs["Vector"])
+        mat.node_tree.links.new(mapping.outputs["Vector"], tex_image.inputs["Vector"])
+        mat.node_tree.links.new(tex_image.outputs["Color"], bsdf.inputs["Base Color"])
+    else:
+        bsdf.inputs["Base Color"].default_value = color
+
+    if transparency:
+        bsdf.inputs["Alpha"].default_value = color[3]
+        mat.blend_method = 'BLEND'
+
+    return mat